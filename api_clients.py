@@ -0,0 +1,202 @@
+import os
+import hashlib
+import importlib
+import threading
+from collections import OrderedDict
+
+# Connection pool and timeout settings shared by every Anthropic and OpenAI client.
+# Override with the NOVELLA_HTTP_* environment variables or configure().
+DEFAULT_SETTINGS = {
+    "max_connections": 100,      # Open connections per client
+    "max_keepalive": 20,         # Idle connections kept for reuse
+    "keepalive_expiry": 60.0,    # Seconds an idle connection is kept
+    "connect_timeout": 10.0,
+    "read_timeout": 600.0,       # Long enough for a slow streamed chapter
+    "max_retries": 2,
+    "http2": False,              # Needs the h2 package (pip install h2)
+    "max_clients": 32            # Pooled clients kept (one per provider and key), least recently used dropped first
+}
+
+_ENV_NAMES = {
+    "max_connections": "NOVELLA_HTTP_MAX_CONNECTIONS",
+    "max_keepalive": "NOVELLA_HTTP_MAX_KEEPALIVE",
+    "keepalive_expiry": "NOVELLA_HTTP_KEEPALIVE_EXPIRY",
+    "connect_timeout": "NOVELLA_HTTP_CONNECT_TIMEOUT",
+    "read_timeout": "NOVELLA_HTTP_READ_TIMEOUT",
+    "max_retries": "NOVELLA_API_MAX_RETRIES",
+    "http2": "NOVELLA_HTTP2",
+    "max_clients": "NOVELLA_HTTP_MAX_CLIENTS"
+}
+
+_settings = None
+_clients = OrderedDict()
+_lock = threading.Lock()
+
+def _settings_from_env():
+    settings = dict(DEFAULT_SETTINGS)
+    for name, env_name in _ENV_NAMES.items():
+        value = os.environ.get(env_name)
+        if value is None:
+            continue
+        if isinstance(DEFAULT_SETTINGS[name], bool):
+            settings[name] = value.lower() in ("1", "true", "yes", "on")
+        else:
+            settings[name] = type(DEFAULT_SETTINGS[name])(value)
+    return settings
+
+def get_settings():
+    """Current pool settings (defaults, then environment, then configure())"""
+    global _settings
+    with _lock:
+        if _settings is None:
+            _settings = _settings_from_env()
+        return dict(_settings)
+
+def configure(**settings):
+    """
+    Change the pool settings for clients created from now on
+
+    Args:
+        **settings: Any of the DEFAULT_SETTINGS keys
+    """
+    global _settings
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown client settings: {', '.join(sorted(unknown))}")
+    current = get_settings()
+    current.update(settings)
+    with _lock:
+        _settings = current
+
+def _http_module(sdk):
+    """The HTTP library the SDK is built on (httpx, or httpx2 in newer SDK releases)"""
+    base = sdk.DefaultHttpxClient.__mro__[1]
+    return importlib.import_module(base.__module__.split(".")[0])
+
+def _http_client(sdk, settings):
+    """Build the SDK's httpx client with our limits, timeouts and HTTP/2 setting"""
+    httpx = _http_module(sdk)
+
+    http2 = settings["http2"]
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+
+    return sdk.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive"],
+            keepalive_expiry=settings["keepalive_expiry"]
+        ),
+        timeout=httpx.Timeout(settings["read_timeout"], connect=settings["connect_timeout"]),
+        http2=http2
+    )
+
+def _get_client(provider, api_key, build):
+    if not api_key:
+        raise ValueError(f"{provider} API key is required")
+    # Key the registry by a digest so the raw key is not kept twice
+    key = (provider, hashlib.sha256(api_key.encode('utf-8')).hexdigest())
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+    if client is not None:
+        return client
+
+    settings = get_settings()
+    client = build(settings)
+    with _lock:
+        # Another thread may have built one meanwhile; keep the first
+        existing = _clients.setdefault(key, client)
+        _clients.move_to_end(key)
+        # Evicted clients are only dropped, not closed: a running job may still be streaming
+        # through one, and its connections are released once the last reference goes away
+        while len(_clients) > max(1, settings["max_clients"]):
+            _clients.popitem(last=False)
+    if existing is not client:
+        # Never handed out, so nothing can be using it
+        _close(client)
+    return existing
+
+def _close(client):
+    try:
+        client.close()
+    except Exception as e:
+        print(f"Error closing API client: {e}")
+
+def get_anthropic_client(api_key):
+    """
+    Shared Anthropic client for an API key
+
+    Clients are thread-safe and keep their connections alive, so every
+    generation using the same key reuses one connection pool instead of
+    paying for a new TLS handshake.
+
+    Args:
+        api_key (str): Anthropic API key
+
+    Returns:
+        anthropic.Anthropic: The pooled client
+    """
+    import anthropic
+
+    def build(settings):
+        return anthropic.Anthropic(api_key=api_key, max_retries=settings["max_retries"],
+                                   http_client=_http_client(anthropic, settings))
+
+    return _get_client("Anthropic", api_key, build)
+
+def get_openai_client(api_key):
+    """
+    Shared OpenAI client for an API key (see get_anthropic_client)
+
+    Args:
+        api_key (str): OpenAI API key
+
+    Returns:
+        openai.OpenAI: The pooled client
+    """
+    import openai
+
+    def build(settings):
+        return openai.OpenAI(api_key=api_key, max_retries=settings["max_retries"],
+                             http_client=_http_client(openai, settings))
+
+    return _get_client("OpenAI", api_key, build)
+
+def warm_up(anthropic_api_key=None, openai_api_key=None):
+    """
+    Import the SDKs and build the pooled clients ahead of the first request
+
+    Meant for a background thread at startup, so the first generation doesn't
+    pay for SDK imports and client setup. Keys default to ANTHROPIC_API_KEY and
+    OPENAI_API_KEY; without a key only the SDK is imported.
+    """
+    anthropic_api_key = anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
+    openai_api_key = openai_api_key or os.environ.get("OPENAI_API_KEY")
+    try:
+        import anthropic  # noqa: F401
+        if anthropic_api_key:
+            get_anthropic_client(anthropic_api_key)
+        import openai  # noqa: F401
+        if openai_api_key:
+            get_openai_client(openai_api_key)
+    except Exception as e:
+        print(f"API client warm-up failed: {e}")
+
+def close_all():
+    """Close every pooled client and its connections"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        _close(client)
+
+def pooled_client_count():
+    """Number of live pooled clients"""
+    with _lock:
+        return len(_clients)
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+
+# Default location and size cap, overridable from the environment / .env
+DEFAULT_CACHE_DIR = ".novella_cache"
+DEFAULT_MAX_MB = 2048
+
+def _file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _same_artifact(size, sha256, output_path):
+    """Whether output_path already holds the cached artifact (same size and content hash)"""
+    if not sha256:
+        return False
+    try:
+        if os.path.getsize(output_path) != size:
+            return False
+        return _file_digest(output_path) == sha256
+    except FileNotFoundError:
+        return False
+
+class ArtifactCache:
+    """
+    Content-addressed store for exported artifacts (PDF, EPUB, audiobook).
+
+    Artifacts are keyed by a hash of the source text, the exporter name and
+    version, and the export options, so identical inputs are only ever
+    exported once. The index lives in SQLite, which keeps LRU bookkeeping and
+    hit/miss counters consistent across sessions and worker processes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir (str, optional): Directory for cached files (NOVELLA_CACHE_DIR)
+            max_bytes (int, optional): Size cap before LRU eviction (NOVELLA_CACHE_MAX_MB)
+        """
+        self.cache_dir = cache_dir or os.environ.get("NOVELLA_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("NOVELLA_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.db_path = os.path.join(self.cache_dir, "index.db")
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                sha256 TEXT
+            )""")
+            # Indexes created before content hashes were recorded
+            columns = [row[1] for row in db.execute("PRAGMA table_info(entries)")]
+            if "sha256" not in columns:
+                db.execute("ALTER TABLE entries ADD COLUMN sha256 TEXT")
+            db.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def make_key(source_text, exporter, version, options=None):
+        """
+        Build the content address for an artifact
+
+        Args:
+            source_text (str): Full text of the novella file
+            exporter (str): Exporter name, e.g. "pdf"
+            version (str): Exporter version; bump it when the output format changes
+            options (dict, optional): Options that affect the output
+
+        Returns:
+            str: Hex digest identifying the artifact
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{exporter}:{version}\n".encode("utf-8"))
+        digest.update(json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+        digest.update(b"\n")
+        digest.update(source_text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _count(self, db, name):
+        db.execute("INSERT INTO stats (name, value) VALUES (?, 1) "
+                   "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, key, output_path, count_miss=True):
+        """
+        Copy a cached artifact to output_path if present
+
+        An output_path already holding the artifact (same size and content
+        hash) is left alone instead of being copied again.
+
+        Args:
+            key (str): Artifact key from make_key
+            output_path (str): Where the artifact should end up
+            count_miss (bool, optional): Count a miss in the stats (off when a fetch follows)
+
+        Returns:
+            str: output_path on a hit, None on a miss
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT filename, size, sha256 FROM entries WHERE key = ?", (key,)).fetchone()
+            cached_path = os.path.join(self.cache_dir, row[0]) if row else None
+            if cached_path and os.path.exists(cached_path):
+                db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        if cached_path:
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            try:
+                if not _same_artifact(row[1], row[2], output_path):
+                    shutil.copyfile(cached_path, output_path)
+            except FileNotFoundError:
+                # Evicted by another process since the lookup
+                cached_path = None
+
+        with self._connect() as db:
+            if not cached_path:
+                if row:
+                    db.execute("DELETE FROM entries WHERE key = ? AND filename = ?", (key, row[0]))
+                if count_miss:
+                    self._count(db, "misses")
+                return None
+            self._count(db, "hits")
+        return output_path
+
+    def put(self, key, artifact_path):
+        """
+        Store a freshly exported artifact and evict old entries over the size cap
+
+        Args:
+            key (str): Artifact key from make_key
+            artifact_path (str): Path of the exported file
+        """
+        filename = key + os.path.splitext(artifact_path)[1]
+        cached_path = os.path.join(self.cache_dir, filename)
+
+        # Copy to a temp file first so readers never see a partial artifact
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(artifact_path, tmp_path)
+        os.replace(tmp_path, cached_path)
+
+        size = os.path.getsize(cached_path)
+        sha256 = _file_digest(cached_path)
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO entries (key, filename, size, last_access, sha256) "
+                       "VALUES (?, ?, ?, ?, ?)", (key, filename, size, time.time(), sha256))
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the store fits under max_bytes"""
+        with self._connect() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, filename, size in db.execute(
+                    "SELECT key, filename, size FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except FileNotFoundError:
+                    pass
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count(db, "evictions")
+                total -= size
+
+    def fetch(self, source_text, exporter, version, options, output_path, build):
+        """
+        Return a cached artifact or build and store it
+
+        Args:
+            source_text (str): Full text of the novella file
+            exporter (str): Exporter name, e.g. "pdf"
+            version (str): Exporter version
+            options (dict): Options that affect the output
+            output_path (str): Where the artifact should end up
+            build (callable): Builds the artifact and returns its path, or (path, complete);
+                an incomplete artifact is returned but never stored
+
+        Returns:
+            str: Path to the artifact
+        """
+        key = self.make_key(source_text, exporter, version, options)
+        if self.get(key, output_path):
+            return output_path
+
+        artifact_path = build()
+        complete = True
+        if isinstance(artifact_path, tuple):
+            artifact_path, complete = artifact_path
+        if complete and artifact_path and os.path.exists(artifact_path):
+            self.put(key, artifact_path)
+        return artifact_path
+
+    def stats(self):
+        """
+        Report cache counters and size
+
+        Returns:
+            dict: hits, misses, evictions, entries, bytes and hit_rate
+        """
+        with self._connect() as db:
+            counters = dict(db.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": size,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+        }
+
+    def clear(self):
+        """Remove every cached artifact (counters are kept)"""
+        with self._connect() as db:
+            for (filename,) in db.execute("SELECT filename FROM entries").fetchall():
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except FileNotFoundError:
+                    pass
+            db.execute("DELETE FROM entries")
+
+if __name__ == "__main__":
+    import sys
+
+    cache = ArtifactCache()
+    if len(sys.argv) > 1 and sys.argv[1] == "clear":
+        cache.clear()
+        print(f"Cleared artifact cache in {cache.cache_dir}")
+    else:
+        stats = cache.stats()
+        print(f"Artifact cache: {cache.cache_dir}")
+        print(f"Entries: {stats['entries']} ({stats['bytes'] / (1024 * 1024):.1f} MB of {cache.max_bytes / (1024 * 1024):.0f} MB)")
+        print(f"Hits: {stats['hits']} | Misses: {stats['misses']} | Hit rate: {stats['hit_rate']:.1%} | Evictions: {stats['evictions']}")
@@ -2,8 +2,8 @@ import os
 import re
 import json
 import time
-from openai import OpenAI
-from pydub import AudioSegment
+import tracing
+from api_clients import get_openai_client, get_settings
 import tempfile
 
 class AudiobookGenerator:
@@ -25,12 +25,21 @@ class AudiobookGenerator:
     # Maximum characters per API call
     MAX_CHUNK_SIZE = 4000  # OpenAI TTS limit is 4096 chars
     
-    def __init__(self, api_key=None):
+    # TTS model, and a version to bump when narration output changes (for the artifact cache)
+    TTS_MODEL = "tts-1-hd"
+    EXPORTER_VERSION = "1"
+    
+    # First retry delay for a failed TTS request (doubles per attempt, capped)
+    RETRY_BASE_SECONDS = 0.5
+    RETRY_MAX_SECONDS = 8.0
+    
+    def __init__(self, api_key=None, output_dir="audio_files"):
         """
         Initialize the AudiobookGenerator with OpenAI API key
         
         Args:
             api_key (str, optional): OpenAI API key
+            output_dir (str, optional): Directory for segment and audiobook files
         """
         # Get API key from environment if not provided
         if not api_key:
@@ -38,11 +47,24 @@ class AudiobookGenerator:
             if not api_key:
                 raise ValueError("OpenAI API key not provided and OPENAI_API_KEY environment variable not set")
         
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=api_key)
+        # Shared OpenAI client for this key: every generator (and every TTS
+        # request) reuses the same keep-alive connection pool
+        self.client = get_openai_client(api_key)
+        
+        # TTS requests are retried here rather than inside the SDK, so each
+        # attempt shows up as its own trace span
+        self.max_retries = get_settings()["max_retries"]
+        self._tts_client = self.client.with_options(max_retries=0)
+        
+        # Seconds per successful TTS request, for the performance metrics
+        self.segment_latencies = []
+        
+        # Segments of the last generate_audiobook() call that could not be narrated
+        self.failed_segments = 0
         
         # Create directory for audio files if it doesn't exist
-        os.makedirs("audio_files", exist_ok=True)
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
     
     def _clean_text(self, text):
         """
@@ -203,26 +225,40 @@ class AudiobookGenerator:
         
         if not output_file:
             # Create a temporary file if no output file specified
-            fd, output_file = tempfile.mkstemp(suffix=".mp3", dir="audio_files")
+            fd, output_file = tempfile.mkstemp(suffix=".mp3", dir=self.output_dir)
             os.close(fd)
         
-        try:
-            response = self.client.audio.speech.create(
-                model="tts-1-hd",
-                voice=voice,
-                input=text,
-                response_format="mp3"
-            )
-            
-            # Save the audio file
-            response.stream_to_file(output_file)
-            return output_file
-            
-        except Exception as e:
-            print(f"Error generating audio: {e}")
-            return None
+        with tracing.span("tts.segment", chars=len(text), voice=voice) as segment_span:
+            try:
+                request_start = time.time()
+                for attempt in range(1, self.max_retries + 2):
+                    try:
+                        with tracing.span("tts.attempt", attempt=attempt):
+                            response = self._tts_client.audio.speech.create(
+                                model=self.TTS_MODEL,
+                                voice=voice,
+                                input=text,
+                                response_format="mp3"
+                            )
+                            
+                            # Save the audio file
+                            response.stream_to_file(output_file)
+                        break
+                    except Exception as e:
+                        if attempt > self.max_retries or not _retryable(e):
+                            raise
+                        time.sleep(min(self.RETRY_MAX_SECONDS, self.RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+                segment_span.set(attempts=attempt)
+                self.segment_latencies.append(time.time() - request_start)
+                return output_file
+                
+            except Exception as e:
+                segment_span.set_error(e)
+                print(f"Error generating audio: {e}")
+                return None
     
-    def generate_audiobook(self, txt_filename, title, voice=None, max_workers=8):
+    @tracing.traced("audio.audiobook")
+    def generate_audiobook(self, txt_filename, title, voice=None, max_workers=8, text=None):
         """
         Generate complete audiobook from a novella text file, using parallel audio generation for speed.
         
@@ -231,25 +267,27 @@ class AudiobookGenerator:
             title (str): Title of the novella
             voice (str, optional): Voice to use for TTS
             max_workers (int, optional): Number of parallel workers (adjust to your API rate limit)
+            text (str, optional): Already-read text of the file, to skip re-reading it
         
         Returns:
             tuple: (List of chapter audio files, combined audiobook file)
         """
         import concurrent.futures
-        import shutil
         
         # Clean the title for filenames
         clean_title = ''.join(c if c.isalnum() else '_' for c in title)
         
         # Create directory for this audiobook if it doesn't exist
-        audiobook_dir = os.path.join("audio_files", clean_title)
+        audiobook_dir = os.path.join(self.output_dir, clean_title)
         os.makedirs(audiobook_dir, exist_ok=True)
         
-        # Read the text file
-        with open(txt_filename, 'r', encoding='utf-8') as file:
-            text = file.read()
+        # Read the text file unless the caller already has it
+        if text is None:
+            with open(txt_filename, 'r', encoding='utf-8') as file:
+                text = file.read()
         
         # Split into chapters
+        split_start = time.time()
         chapters = self._split_into_chapters(text)
         
         # Further split chapters if needed to stay under API limits
@@ -257,11 +295,13 @@ class AudiobookGenerator:
         chapters = [self._further_split_if_needed([chapter]) for chapter in chapters]
         # Flatten the list of lists
         chapters = [chunk for sublist in chapters for chunk in sublist]
+        tracing.record_span("audio.split", split_start, time.time(), segments=len(chapters))
         
         # Prepare filenames for each chunk
         chapter_filenames = [os.path.join(audiobook_dir, f"chapter_{i+1:03d}.mp3") for i in range(len(chapters))]
         audio_files = [None] * len(chapters)
         combined = None
+        self.failed_segments = 0
         
         try:
             print(f"Generating audio for {len(chapters)} segments in parallel...")
@@ -276,41 +316,86 @@ class AudiobookGenerator:
                 )
                 return i, audio_file
             
+            # Segment spans join this audiobook's trace from the worker threads
+            context = tracing.current_context()
             with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(generate_for_index, i) for i in range(len(chapters))]
+                futures = [executor.submit(tracing.run_in_context, context, generate_for_index, i)
+                           for i in range(len(chapters))]
                 for future in concurrent.futures.as_completed(futures):
                     i, audio_file = future.result()
                     audio_files[i] = audio_file
-                    print(f"Generated {audio_file}")
+                    if audio_file:
+                        print(f"Generated {audio_file}")
             
             # Remove any None entries (in case of errors)
+            self.failed_segments = audio_files.count(None)
+            if self.failed_segments:
+                print(f"Warning: {self.failed_segments} of {len(chapters)} segments could not be narrated; "
+                      "the audiobook is incomplete")
             audio_files = [f for f in audio_files if f]
             
             # Combine all audio files into a single audiobook
-            if audio_files:
-                combined_file = os.path.join("audio_files", f"{clean_title}_audiobook.mp3")
-                combined = self._combine_audio_files(audio_files, combined_file)
-                print(f"Combined audiobook saved to {combined}")
-                
-                # Delete individual chapter files after combining
-                for f in audio_files:
-                    try:
-                        os.remove(f)
-                    except Exception as e:
-                        print(f"Could not delete {f}: {e}")
-                # Optionally, remove the chapter directory if empty
-                try:
-                    if os.path.isdir(audiobook_dir) and not os.listdir(audiobook_dir):
-                        shutil.rmtree(audiobook_dir)
-                except Exception as e:
-                    print(f"Could not remove directory {audiobook_dir}: {e}")
+            combined = self.finish_audiobook(audio_files, title)
             
             return audio_files, combined
         except Exception as e:
             print(f"Error generating audiobook: {e}")
+            self.failed_segments = max(self.failed_segments, 1)
             return audio_files, combined
 
+    def prepare_segments(self, text):
+        """
+        Clean a piece of novella text and split it into TTS-sized segments
+        
+        Args:
+            text (str): Text of one chapter (or any passage)
+            
+        Returns:
+            list: List of text segments, all below maximum size
+        """
+        text = self._clean_text(text).strip()
+        if not text:
+            return []
+        return self._further_split_if_needed([text])
+    
+    def finish_audiobook(self, audio_files, title):
+        """
+        Combine generated segment files into the final audiobook and remove the segments
+        
+        Args:
+            audio_files (list): Segment audio file paths, in reading order
+            title (str): Title of the novella
+            
+        Returns:
+            str: Path to the combined audiobook file, or None if nothing was combined
+        """
+        import shutil
+        
+        if not audio_files:
+            return None
+        
+        clean_title = ''.join(c if c.isalnum() else '_' for c in title)
+        audiobook_dir = os.path.join(self.output_dir, clean_title)
+        combined_file = os.path.join(self.output_dir, f"{clean_title}_audiobook.mp3")
+        combined = self._combine_audio_files(audio_files, combined_file)
+        print(f"Combined audiobook saved to {combined}")
+        
+        # Delete individual chapter files after combining
+        for f in audio_files:
+            try:
+                os.remove(f)
+            except Exception as e:
+                print(f"Could not delete {f}: {e}")
+        # Optionally, remove the chapter directory if empty
+        try:
+            if os.path.isdir(audiobook_dir) and not os.listdir(audiobook_dir):
+                shutil.rmtree(audiobook_dir)
+        except Exception as e:
+            print(f"Could not remove directory {audiobook_dir}: {e}")
+        
+        return combined
     
+    @tracing.traced("audio.combine")
     def _combine_audio_files(self, audio_files, output_file):
         """
         Combine multiple audio files into a single file
@@ -326,6 +411,9 @@ class AudiobookGenerator:
             return None
         
         try:
+            # pydub is only needed here; importing it lazily keeps startup fast
+            from pydub import AudioSegment
+            
             # Start with the first file
             combined = AudioSegment.from_mp3(audio_files[0])
             
@@ -362,7 +450,7 @@ class AudiobookGenerator:
         clean_title = ''.join(c if c.isalnum() else '_' for c in title)
         
         # Create directory for this audiobook if it doesn't exist
-        audiobook_dir = os.path.join("audio_files", clean_title)
+        audiobook_dir = os.path.join(self.output_dir, clean_title)
         os.makedirs(audiobook_dir, exist_ok=True)
         
         # Read the text file
@@ -408,7 +496,7 @@ class AudiobookGenerator:
         # Combine all audio files after generation is complete
         combined_file = None
         if audio_files:
-            combined_file = os.path.join("audio_files", f"{clean_title}_audiobook.mp3")
+            combined_file = os.path.join(self.output_dir, f"{clean_title}_audiobook.mp3")
             combined_file = self._combine_audio_files(audio_files, combined_file)
             
             # Final callback with 100% progress
@@ -418,6 +506,15 @@ class AudiobookGenerator:
         return audio_files, combined_file
 
 
+def _retryable(error):
+    """Whether a failed TTS request is worth retrying (connection errors, timeouts, 408/409/429/5xx)"""
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
 # For direct testing
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Re-export a directory (or glob) of novella text files to PDF/EPUB/audiobook
+across a process pool, skipping outputs that are already up to date.
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import concurrent.futures
+
+# Text files in a project directory that are not manuscripts
+NON_NOVELLA_FILES = {"requirements.txt", "VERSION.txt"}
+
+def find_novellas(target):
+    """
+    Resolve a directory or glob pattern to a sorted list of novella text files
+
+    Args:
+        target (str): Directory path or glob pattern
+
+    Returns:
+        list: Paths of .txt files to export
+    """
+    if os.path.isdir(target):
+        pattern = os.path.join(target, "*.txt")
+    else:
+        pattern = target
+    return sorted(
+        path for path in glob.glob(pattern)
+        if path.endswith(".txt") and os.path.basename(path) not in NON_NOVELLA_FILES
+    )
+
+def title_for(txt_filename, content):
+    """Take the title from the novella header, falling back to the filename"""
+    match = re.match(r'--- NOVELLA: (.*?) ---', content)
+    if match:
+        return match.group(1)
+    return os.path.splitext(os.path.basename(txt_filename))[0].replace('_', ' ')
+
+def _outputs_for(txt_filename, formats):
+    """Output paths the exporters will write for a text file"""
+    outputs = []
+    if "pdf" in formats:
+        outputs.append(txt_filename.replace('.txt', '.pdf'))
+    if "epub" in formats:
+        outputs.append(txt_filename.replace('.txt', '.epub'))
+    return outputs
+
+def _is_newer(output, source_mtime):
+    return os.path.exists(output) and os.path.getmtime(output) >= source_mtime
+
+def is_up_to_date(txt_filename, formats, voice=None):
+    """
+    Check whether every requested output exists and is newer than its source
+
+    The audiobook lives under audio_files/; when it is missing or older, an
+    identical one in the artifact cache is restored instead.
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        formats (list): Requested formats ("pdf", "epub", "audio")
+        voice (str, optional): Voice of the audiobook
+
+    Returns:
+        bool: True if nothing needs to be rebuilt
+    """
+    source_mtime = os.path.getmtime(txt_filename)
+    for output in _outputs_for(txt_filename, formats):
+        if not _is_newer(output, source_mtime):
+            return False
+    if "audio" in formats:
+        from export_pipeline import _artifact, restore_cached
+        with open(txt_filename, 'r', encoding='utf-8') as file:
+            title = title_for(txt_filename, file.readline())
+        if not _is_newer(_artifact("audio", txt_filename, title, voice=voice)[2], source_mtime):
+            with open(txt_filename, 'r', encoding='utf-8') as file:
+                content = file.read()
+            return restore_cached("audio", txt_filename, title, content, voice=voice) is not None
+    return True
+
+def export_one(txt_filename, formats, check="hash", voice=None):
+    """
+    Export one novella (process-pool entry point)
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        formats (list): Formats to build ("pdf", "epub", "audio")
+        check (str): "mtime" skips files whose outputs are newer than the source,
+            "hash" reuses identical artifacts from the artifact cache, "none" always rebuilds
+        voice (str, optional): Voice to use for TTS
+
+    Returns:
+        dict: file, status ("exported", "skipped" or "failed"), words, bytes, seconds, error;
+            a file whose every output came from the artifact cache is "skipped"
+    """
+    from convert_pdf import count_words
+    from export_pipeline import export_pdf, export_epub, export_audio, restore_cached
+
+    start_time = time.time()
+    result = {"file": txt_filename, "status": "exported", "words": 0, "bytes": 0, "seconds": 0.0, "error": None}
+    try:
+        if check == "mtime" and is_up_to_date(txt_filename, formats, voice):
+            result["status"] = "skipped"
+            return result
+
+        with open(txt_filename, 'r', encoding='utf-8') as file:
+            content = file.read()
+        title = title_for(txt_filename, content)
+        use_cache = check == "hash"
+        if use_cache:
+            # Cache hits are restored in place; only the rest is exported (and counted)
+            formats = [kind for kind in formats
+                       if not restore_cached(kind, txt_filename, title, content, voice=voice)]
+            if not formats:
+                result["status"] = "skipped"
+                return result
+        result["words"] = count_words(content)
+        result["bytes"] = len(content.encode('utf-8'))
+
+        if "pdf" in formats:
+            export_pdf(txt_filename, title, content=content, use_cache=use_cache)
+        if "epub" in formats:
+            export_epub(txt_filename, title, content=content, use_cache=use_cache)
+        if "audio" in formats:
+            if not export_audio(txt_filename, title, voice=voice, content=content, use_cache=use_cache):
+                raise RuntimeError("audiobook generation failed")
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    finally:
+        result["seconds"] = time.time() - start_time
+    return result
+
+def batch_export(target, formats=("pdf", "epub"), workers=None, check="hash", voice=None):
+    """
+    Export every novella matched by target across a process pool
+
+    Failures are reported and skipped so one bad manuscript does not stop the batch.
+
+    Args:
+        target (str): Directory path or glob pattern
+        formats (tuple): Formats to build ("pdf", "epub", "audio")
+        workers (int, optional): Worker processes (defaults to CPU count)
+        check (str): Up-to-date check, see export_one
+        voice (str, optional): Voice to use for TTS
+
+    Returns:
+        tuple: (list of per-file result dicts, summary dict)
+    """
+    files = find_novellas(target)
+    results = []
+    start_time = time.time()
+
+    if files:
+        workers = workers or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            futures = [executor.submit(export_one, f, list(formats), check, voice) for f in files]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result["status"] == "failed":
+                    print(f"FAILED   {result['file']}: {result['error']}")
+                elif result["status"] == "skipped":
+                    print(f"skipped  {result['file']} (up to date or cached)")
+                else:
+                    print(f"exported {result['file']} ({result['words']:,} words, {result['seconds']:.2f}s)")
+
+    elapsed = time.time() - start_time
+    exported = [r for r in results if r["status"] == "exported"]
+    words = sum(r["words"] for r in exported)
+    size = sum(r["bytes"] for r in exported)
+    summary = {
+        "files": len(files),
+        "exported": len(exported),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "seconds": elapsed,
+        "files_per_sec": len(exported) / elapsed if elapsed > 0 else 0.0,
+        "words_per_sec": words / elapsed if elapsed > 0 else 0.0,
+        "mb_per_sec": size / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    }
+    return results, summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch export novella text files to PDF/EPUB/audiobook")
+    parser.add_argument("target", type=str, nargs="?", default="archives", help="Directory or glob of .txt files (default: archives)")
+    parser.add_argument("--formats", type=str, default="pdf,epub", help="Comma-separated formats: pdf, epub, audio")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--check", choices=["hash", "mtime", "none"], default="hash",
+                        help="Skip unchanged work by content hash (artifact cache), by mtime, or never")
+    parser.add_argument("--voice", type=str, default=None, help="Voice for audiobooks")
+
+    args = parser.parse_args()
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - {"pdf", "epub", "audio"}
+    if unknown:
+        print(f"Unknown format(s): {', '.join(sorted(unknown))}")
+        sys.exit(1)
+
+    results, summary = batch_export(args.target, formats, args.workers, args.check, args.voice)
+
+    if not summary["files"]:
+        print(f"No novella text files found for '{args.target}'")
+        sys.exit(1)
+
+    print("-" * 50)
+    print(f"{summary['exported']} exported, {summary['skipped']} skipped, {summary['failed']} failed "
+          f"in {summary['seconds']:.2f}s")
+    print(f"Throughput: {summary['files_per_sec']:.2f} files/s | {summary['words_per_sec']:,.0f} words/s | "
+          f"{summary['mb_per_sec']:.2f} MB/s")
+    sys.exit(1 if summary["failed"] else 0)
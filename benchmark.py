@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the text, export and audio hot paths, and for startup time.
+
+Runs each function on the novellas in archives/ and on synthetic books built
+from them at 1x, 10x and 100x the size of one novella, and records wall time,
+MB/s, words/s and peak memory (tracemalloc and RSS). Results are written as
+JSON; with --baseline the run fails when a metric regresses past a threshold.
+The "startup" benchmark times a cold import of the app and its main modules.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+
+# Default allowed slowdown / memory growth against the baseline before the run fails
+DEFAULT_TIME_THRESHOLD = 0.20
+DEFAULT_MEMORY_THRESHOLD = 0.50
+
+# Benchmarks that are too slow to repeat at the largest scales run once there
+SLOW_BENCHMARKS = ("create_ebook_pdf", "convert_to_epub", "combine_audio_files")
+
+# Largest synthetic scale per benchmark (combining decodes every segment to PCM)
+MAX_SCALE = {"combine_audio_files": 10}
+
+# Seconds of silent audio per synthetic TTS segment
+SEGMENT_SECONDS = 2.0
+
+# Modules whose cold import time is measured by the "startup" benchmark
+STARTUP_MODULES = ("novella_app", "storygen2", "audio_gen", "token_counter", "job_manager")
+
+# Child process for the startup benchmark: time one import and report it on stdout
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+sys.stdout.write("\\n%.6f\\n" % (time.perf_counter() - start))
+"""
+
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS counter for this process (Linux); False if unsupported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb():
+    """Peak RSS of this process in MB from /proc/self/status (None if unavailable)"""
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def load_corpus(archive_dir, scales):
+    """
+    Build the benchmark inputs
+
+    Args:
+        archive_dir (str): Directory of novella text files
+        scales (list): Synthetic book sizes, in multiples of one novella
+
+    Returns:
+        dict: Input name -> text ("archives" is every novella concatenated,
+            "Nx" is the median-length novella repeated N times)
+    """
+    texts = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, "*.txt"))):
+        with open(path, 'r', encoding='utf-8') as file:
+            texts.append(file.read())
+    if not texts:
+        raise FileNotFoundError(f"No novella text files in {archive_dir}")
+
+    corpus = {"archives": "\n\n".join(texts)}
+    base = sorted(texts, key=len)[len(texts) // 2]
+    for scale in scales:
+        corpus[f"{scale}x"] = "\n\n".join([base] * scale)
+    return corpus
+
+def _scale_of(input_name):
+    """Scale of a synthetic input name ("10x" -> 10), 0 for the archives"""
+    return int(input_name[:-1]) if input_name.endswith("x") else 0
+
+def _benchmarks(workdir):
+    """Benchmark name -> function(text) running the hot path once"""
+    from storygen2 import count_words
+    from convert_pdf import create_ebook_pdf
+    from convert_epub import convert_to_epub
+    from audio_gen import AudiobookGenerator
+
+    # No TTS requests are made; the generator is only used for splitting and combining
+    generator = AudiobookGenerator(api_key="benchmark-no-requests", output_dir=os.path.join(workdir, "audio"))
+    txt_filename = os.path.join(workdir, "benchmark.txt")
+
+    def token_count(text):
+        from token_counter import token_counter
+        return token_counter(text)
+
+    def pdf(text):
+        return create_ebook_pdf(txt_filename, "Benchmark", content=text)
+
+    def epub(text):
+        return convert_to_epub(txt_filename, "Benchmark", content=text)
+
+    def split(text):
+        return generator._further_split_if_needed(generator._split_into_chapters(text))
+
+    def combine(text):
+        # One silent MP3 per TTS chunk the text would be narrated in
+        from mock_api import SILENT_MP3_FRAME
+        chunks = generator._further_split_if_needed(generator._split_into_chapters(text))
+        segment_dir = os.path.join(workdir, "segments")
+        os.makedirs(segment_dir, exist_ok=True)
+        body = SILENT_MP3_FRAME * int(SEGMENT_SECONDS / 0.026)
+        segments = []
+        for i in range(len(chunks)):
+            path = os.path.join(segment_dir, f"segment_{i:04d}.mp3")
+            with open(path, 'wb') as file:
+                file.write(body)
+            segments.append(path)
+        result = generator._combine_audio_files(segments, os.path.join(workdir, "combined.mp3"))
+        if not result:
+            raise RuntimeError("combining failed (is ffmpeg installed?)")
+        return result
+
+    return {
+        "count_words": count_words,
+        "token_counter": token_count,
+        "create_ebook_pdf": pdf,
+        "convert_to_epub": epub,
+        "split_chapters": split,
+        "combine_audio_files": combine
+    }
+
+def measure(func, text, words, repeat):
+    """
+    Time a function on one input and measure its peak memory
+
+    Timing runs come first without tracemalloc (it slows allocation-heavy code
+    down); one extra run under tracemalloc gives the Python peak allocation.
+
+    Returns:
+        dict: seconds (median), mb_per_sec, words_per_sec, peak_alloc_mb, peak_rss_mb
+    """
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    rss_reset = _reset_peak_rss()
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(text)
+        times.append(time.perf_counter() - start_time)
+    peak_rss = _peak_rss_mb() if rss_reset else None
+
+    tracemalloc.start()
+    try:
+        func(text)
+        _, peak_alloc = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = statistics.median(times)
+    return {
+        "seconds": seconds,
+        "mb_per_sec": size_mb / seconds if seconds > 0 else None,
+        "words_per_sec": words / seconds if seconds > 0 else None,
+        "peak_alloc_mb": peak_alloc / (1024 * 1024),
+        "peak_rss_mb": peak_rss,
+        "input_mb": size_mb,
+        "repeat": repeat
+    }
+
+def measure_startup(module, repeat):
+    """
+    Cold import time of a module, each run in a fresh interpreter
+
+    Returns:
+        dict: seconds (median of repeat runs) and repeat
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT.format(module=module)], cwd=package_dir,
+                                capture_output=True, text=True, timeout=300)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return {"seconds": statistics.median(times), "repeat": repeat}
+
+def run_benchmarks(archive_dir="archives", scales=(1, 10, 100), only=None, repeat=3):
+    """
+    Run every benchmark on every input
+
+    Args:
+        archive_dir (str): Directory of novella text files
+        scales (tuple): Synthetic book sizes
+        only (list, optional): Benchmark names to run
+        repeat (int): Timed runs per measurement (1 for slow benchmarks above 10x)
+
+    Returns:
+        dict: Metadata and results keyed "benchmark[input]"
+    """
+    from storygen2 import count_words
+
+    corpus = load_corpus(archive_dir, scales)
+    workdir = tempfile.mkdtemp(prefix="novella_bench_")
+    results = {}
+    try:
+        benchmarks = _benchmarks(workdir)
+        for name, func in benchmarks.items():
+            if only and name not in only:
+                continue
+            for input_name, text in corpus.items():
+                scale = _scale_of(input_name)
+                if scale > MAX_SCALE.get(name, scale):
+                    continue
+                key = f"{name}[{input_name}]"
+                runs = 1 if name in SLOW_BENCHMARKS and scale > 10 else repeat
+                try:
+                    results[key] = measure(func, text, count_words(text), runs)
+                except Exception as e:
+                    results[key] = {"error": f"{e.__class__.__name__}: {e}"}
+                result = results[key]
+                if "error" in result:
+                    print(f"{key:40s} skipped: {result['error']}")
+                else:
+                    print(f"{key:40s} {result['seconds']:9.4f}s {result['mb_per_sec']:9.2f} MB/s "
+                          f"{result['words_per_sec']:12,.0f} words/s {result['peak_alloc_mb']:8.1f} MB alloc")
+        if not only or "startup" in only:
+            for module in STARTUP_MODULES:
+                key = f"startup[{module}]"
+                try:
+                    results[key] = measure_startup(module, max(repeat, 3))
+                    print(f"{key:40s} {results[key]['seconds']:9.4f}s import")
+                except Exception as e:
+                    results[key] = {"error": f"{e.__class__.__name__}: {e}"}
+                    print(f"{key:40s} skipped: {results[key]['error']}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scales": list(scales),
+        "results": results
+    }
+
+def compare(current, baseline, time_threshold=DEFAULT_TIME_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    """
+    Find regressions against a baseline run
+
+    Args:
+        current (dict): Output of run_benchmarks
+        baseline (dict): Earlier output of run_benchmarks
+        time_threshold (float): Allowed relative slowdown (0.2 = 20%)
+        memory_threshold (float): Allowed relative growth of peak allocation
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before or "error" in before or "error" in result:
+            continue
+        if result["seconds"] > before["seconds"] * (1 + time_threshold):
+            regressions.append(f"{key}: {before['seconds']:.4f}s -> {result['seconds']:.4f}s "
+                               f"(+{result['seconds'] / before['seconds'] - 1:.0%})")
+        if "peak_alloc_mb" not in result or "peak_alloc_mb" not in before:
+            continue
+        if result["peak_alloc_mb"] > before["peak_alloc_mb"] * (1 + memory_threshold) and result["peak_alloc_mb"] > 1:
+            regressions.append(f"{key}: peak allocation {before['peak_alloc_mb']:.1f} MB -> "
+                               f"{result['peak_alloc_mb']:.1f} MB")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark NovellaGPT's text, export and audio hot paths")
+    parser.add_argument("--archives", type=str, default="archives", help="Directory of novella text files")
+    parser.add_argument("--scales", type=str, default="1,10,100", help="Synthetic book sizes (multiples of one novella)")
+    parser.add_argument("--only", type=str, default=None, help="Comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement (median is reported)")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results to --baseline instead of comparing")
+    parser.add_argument("--time-threshold", type=float, default=DEFAULT_TIME_THRESHOLD, help="Allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD, help="Allowed peak memory growth")
+
+    args = parser.parse_args()
+
+    try:
+        current = run_benchmarks(args.archives, [int(s) for s in args.scales.split(",") if s],
+                                 args.only.split(",") if args.only else None, args.repeat)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(current, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Could not read baseline {args.baseline}: {e}")
+            sys.exit(1)
+        regressions = compare(current, baseline, args.time_threshold, args.memory_threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
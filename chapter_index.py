@@ -0,0 +1,270 @@
+import os
+import re
+import json
+import mmap
+import hashlib
+import contextlib
+
+# Bump when the sidecar layout changes so old indexes are rebuilt
+INDEX_VERSION = 1
+
+# A markdown heading starts a chapter (same rule the EPUB exporter uses)
+HEADING_PATTERN = re.compile(rb'^#+\s+\S.*$')
+
+# Page size used when a novella has no chapter headings to paginate by
+FALLBACK_PAGE_BYTES = 20000
+
+# Generation markers that close the novella body
+END_MARKERS = (b"--- END OF NOVELLA ---", b"--- GENERATION INTERRUPTED BY USER ---")
+
+# Header line the generator writes before the novella text
+START_MARKER = re.compile(rb'^--- NOVELLA: .*? ---[ \t]*\r?\n?')
+
+def index_path(txt_filename):
+    """Path of the .idx sidecar for a novella text file"""
+    return os.path.splitext(txt_filename)[0] + ".idx"
+
+def _file_hash(txt_filename):
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(txt_filename, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def build_index(txt_filename, count_tokens=True):
+    """
+    Scan a novella text file and write its chapter index sidecar
+
+    Each chapter spans from its heading line to the next heading (or the end
+    marker), so it can later be read with one seek and one read.
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        count_tokens (bool, optional): Also store a token count per chapter (skipped
+            while the tokenizer is not in the local cache)
+
+    Returns:
+        dict: The index (title, offset, length, words and tokens for each chapter)
+    """
+    from convert_pdf import count_words
+
+    stat = os.stat(txt_filename)
+    digest = hashlib.sha256()
+    starts = []
+    body_end = None
+    position = 0
+
+    with open(txt_filename, 'rb') as file:
+        for line in file:
+            digest.update(line)
+            stripped = line.rstrip(b"\r\n")
+            if body_end is None:
+                if stripped.startswith(END_MARKERS):
+                    body_end = position
+                elif HEADING_PATTERN.match(stripped):
+                    title = stripped.lstrip(b"#").strip().decode('utf-8', errors='replace')
+                    starts.append((position, title))
+            position += len(line)
+
+    if body_end is None:
+        body_end = position
+
+    counter = None
+    if count_tokens:
+        # Token counts are best-effort, and never wait on a download of the tokenizer
+        from token_counter import token_counter, is_cached, warm_up
+        counter = token_counter if is_cached() and warm_up() else None
+
+    chapters = []
+    with open(txt_filename, 'rb') as file:
+        for i, (offset, title) in enumerate(starts):
+            end = starts[i+1][0] if i+1 < len(starts) else body_end
+            file.seek(offset)
+            text = file.read(end - offset).decode('utf-8', errors='replace')
+            chapters.append({
+                "title": title,
+                "offset": offset,
+                "length": end - offset,
+                "words": count_words(text),
+                "tokens": counter(text) if counter else None
+            })
+
+    index = {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": digest.hexdigest(),
+        "chapters": chapters
+    }
+    _write_index(txt_filename, index)
+    return index
+
+def _write_index(txt_filename, index):
+    """Write the sidecar atomically so readers never see a partial index"""
+    path = index_path(txt_filename)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(index, file, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def load_index(txt_filename, count_tokens=True):
+    """
+    Load a novella's chapter index, rebuilding it if missing or stale
+
+    The index is trusted while the file's size and mtime match. If only the
+    mtime moved, the content hash decides whether a rebuild is needed.
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        count_tokens (bool, optional): Count tokens if the index has to be rebuilt
+
+    Returns:
+        dict: The chapter index
+    """
+    path = index_path(txt_filename)
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return build_index(txt_filename, count_tokens)
+
+    stat = os.stat(txt_filename)
+    if index.get("version") != INDEX_VERSION or index.get("size") != stat.st_size:
+        return build_index(txt_filename, count_tokens)
+    if index.get("mtime") != stat.st_mtime:
+        if index.get("sha256") != _file_hash(txt_filename):
+            return build_index(txt_filename, count_tokens)
+        # Touched but unchanged: refresh the stored mtime and keep the index
+        index["mtime"] = stat.st_mtime
+        _write_index(txt_filename, index)
+    return index
+
+def read_chapter(txt_filename, number, index=None):
+    """
+    Read one chapter with a single seek and read
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        number (int): Zero-based chapter number
+        index (dict, optional): Already-loaded index
+
+    Returns:
+        tuple: (chapter title, chapter text including its heading)
+    """
+    if index is None:
+        index = load_index(txt_filename)
+    chapter = index["chapters"][number]
+    with open(txt_filename, 'rb') as file:
+        file.seek(chapter["offset"])
+        data = file.read(chapter["length"])
+    return chapter["title"], data.decode('utf-8', errors='replace')
+
+class MappedNovella:
+    """
+    Read-only, memory-mapped view of a novella paginated by chapter.
+
+    Only the page being viewed is decoded; the file is mapped for the duration
+    of each read and shared through the OS page cache, so an instance holds no
+    file descriptor or mapping and can be cached and dropped freely.
+    """
+
+    def __init__(self, txt_filename):
+        """
+        Index and paginate a novella text file
+
+        Args:
+            txt_filename (str): Path to the novella text file
+        """
+        self.txt_filename = txt_filename
+        self.index = load_index(txt_filename, count_tokens=False)
+        with self._mapped() as data:
+            self.pages = self._paginate(data)
+
+    @contextlib.contextmanager
+    def _mapped(self):
+        """The file's contents as a read-only mapping (b"" for an empty file)"""
+        with open(self.txt_filename, 'rb') as file:
+            if not os.fstat(file.fileno()).st_size:
+                yield b""
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def _paginate(self, data):
+        """
+        Chapters from the index, or fixed-size pages broken at line ends if there are none
+
+        Text before the first chapter heading (a dedication, an epigraph...)
+        becomes a "Front matter" page.
+        """
+        chapters = self.index["chapters"]
+        if chapters:
+            pages = []
+            start = START_MARKER.match(data[:chapters[0]["offset"]])
+            front = start.end() if start else 0
+            while front < chapters[0]["offset"] and data[front:front + 1] in (b"\n", b"\r"):
+                front += 1
+            if data[front:chapters[0]["offset"]].strip():
+                pages.append({"title": "Front matter", "offset": front, "length": chapters[0]["offset"] - front})
+            return pages + [{"title": c["title"], "offset": c["offset"], "length": c["length"]} for c in chapters]
+
+        pages = []
+        offset = 0
+        size = len(data)
+        while offset < size:
+            end = min(size, offset + FALLBACK_PAGE_BYTES)
+            if end < size:
+                newline = data.find(b"\n", end)
+                end = size if newline == -1 else newline + 1
+            pages.append({"title": f"Page {len(pages) + 1}", "offset": offset, "length": end - offset})
+            offset = end
+        return pages
+
+    def read(self, number):
+        """
+        Decode one page
+
+        Args:
+            number (int): Zero-based page number
+
+        Returns:
+            str: Text of the page
+        """
+        page = self.pages[number]
+        with self._mapped() as data:
+            return data[page["offset"]:page["offset"] + page["length"]].decode('utf-8', errors='replace')
+
+    def close(self):
+        """Nothing stays open between reads; kept for callers that close readers"""
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect chapter index sidecars (.idx) for novella text files")
+    parser.add_argument("txt_files", nargs="+", help="Novella text files")
+    parser.add_argument("--show", action="store_true", help="Print the chapter table")
+    parser.add_argument("--chapter", type=int, default=None, help="Print one chapter (1-based)")
+    parser.add_argument("--no-tokens", action="store_true", help="Skip per-chapter token counts")
+
+    args = parser.parse_args()
+
+    for txt_filename in args.txt_files:
+        try:
+            if args.show or args.chapter:
+                index = load_index(txt_filename, count_tokens=not args.no_tokens)
+            else:
+                index = build_index(txt_filename, count_tokens=not args.no_tokens)
+        except Exception as e:
+            print(f"Error indexing {txt_filename}: {e}")
+            continue
+
+        print(f"{index_path(txt_filename)}: {len(index['chapters'])} chapters")
+        if args.show:
+            for i, chapter in enumerate(index["chapters"]):
+                tokens = chapter["tokens"] if chapter["tokens"] is not None else "-"
+                print(f"  {i+1:3d}. {chapter['title'][:50]:50s} @{chapter['offset']:>9} "
+                      f"{chapter['length']:>8} bytes {chapter['words']:>7} words {tokens:>7} tokens")
+        if args.chapter:
+            title, text = read_chapter(txt_filename, args.chapter - 1, index)
+            print(text)
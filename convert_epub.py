@@ -1,9 +1,17 @@
 import re
 import time
 import os
+import tracing
 from ebooklib import epub
 
-def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
+# Bump when the EPUB layout changes so cached artifacts are rebuilt
+EXPORTER_VERSION = "1"
+
+# Markdown headings start a new EPUB chapter
+CHAPTER_HEADING_PATTERN = r'(?m)^(#+\s+.*?)$'
+
+@tracing.traced("epub.export")
+def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7", content=None, rendered_chapters=None):
     """
     Convert a text file containing a novella to EPUB format
     
@@ -11,16 +19,21 @@ def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
         txt_filename (str): Path to the text file
         title (str): Title of the novella
         author (str, optional): Author name
+        content (str, optional): Already-read text of the file, to skip re-reading it
+        rendered_chapters (dict, optional): Chapter XHTML already rendered during generation,
+            keyed by chapter_key(header_text, content_text)
         
     Returns:
         str: Path to the generated EPUB file
     """
     # Create epub file path
     epub_filename = txt_filename.replace('.txt', '.epub')
+    stage_start = time.time()
     
-    # Read the text content
-    with open(txt_filename, 'r', encoding='utf-8') as file:
-        content = file.read()
+    # Read the text content unless the caller already has it
+    if content is None:
+        with open(txt_filename, 'r', encoding='utf-8') as file:
+            content = file.read()
     
     # Remove header and footer markers
     content = re.sub(r'--- NOVELLA: .*? ---\n\n', '', content)
@@ -28,6 +41,9 @@ def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
     content = re.sub(r'--- WORD COUNT: \d+ ---\n', '', content)
     content = re.sub(r'--- GENERATION INTERRUPTED BY USER ---\n', '', content)
     
+    tracing.record_span("epub.clean", stage_start, time.time(), chars=len(content))
+    stage_start = time.time()
+    
     # Initialize EPUB book
     book = epub.EpubBook()
     
@@ -121,7 +137,7 @@ def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
     toc = []
     
     # Check for # headers for chapter detection
-    chapter_splits = re.split(r'(?m)^(#+\s+.*?)$', content)
+    chapter_splits = re.split(CHAPTER_HEADING_PATTERN, content)
     
     # If no chapters found or only one part
     if len(chapter_splits) <= 1:
@@ -159,25 +175,20 @@ def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
             chapter_id = f"chapter_{current_file_index+1}"
             file_name = f"{chapter_id}.xhtml"
             
-            # Create chapter
+            # Create chapter, reusing the XHTML if it was rendered while streaming
             c = epub.EpubHtml(title=header_text, file_name=file_name, lang='en')
-            c.content = f'''
-            <html xmlns="http://www.w3.org/1999/xhtml">
-            <head>
-                <title>{header_text}</title>
-                <link rel="stylesheet" href="style/default.css" type="text/css" />
-            </head>
-            <body class="chapter">
-                <h1>{header_text}</h1>
-                {_format_paragraphs(content_text)}
-            </body>
-            </html>
-            '''
+            key = chapter_key(header_text, content_text)
+            if rendered_chapters and key in rendered_chapters:
+                c.content = rendered_chapters[key]
+            else:
+                c.content = render_chapter(header_text, content_text)
             book.add_item(c)
             chapters.append(c)
             toc.append(epub.Link(file_name, header_text, chapter_id))
             current_file_index += 1
     
+    tracing.record_span("epub.render", stage_start, time.time(), chapters=len(chapters))
+    
     # Add chapters to the book
     book.toc = toc
     
@@ -192,10 +203,40 @@ def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
     book.spine = ['nav', title_page] + chapters
     
     # Write the epub file
+    stage_start = time.time()
     epub.write_epub(epub_filename, book, {})
+    tracing.record_span("epub.write", stage_start, time.time())
     
     return epub_filename
 
+def chapter_key(header_text, content_text):
+    """Key identifying a chapter's header and body, insensitive to surrounding whitespace"""
+    return (header_text.strip('#').strip(), content_text.strip())
+
+def render_chapter(header_text, content_text):
+    """
+    Render a single chapter to XHTML
+    
+    Args:
+        header_text (str): Chapter title, without the leading #
+        content_text (str): Chapter body text
+        
+    Returns:
+        str: XHTML document for the chapter
+    """
+    return f'''
+            <html xmlns="http://www.w3.org/1999/xhtml">
+            <head>
+                <title>{header_text}</title>
+                <link rel="stylesheet" href="style/default.css" type="text/css" />
+            </head>
+            <body class="chapter">
+                <h1>{header_text}</h1>
+                {_format_paragraphs(content_text)}
+            </body>
+            </html>
+            '''
+
 def _format_paragraphs(text):
     """Format text into HTML paragraphs"""
     # Split into paragraphs
@@ -1,8 +1,12 @@
 import re
 import time
 import textwrap
+import tracing
 from fpdf import FPDF
 
+# Bump when the PDF layout changes so cached artifacts are rebuilt
+EXPORTER_VERSION = "1"
+
 def count_words(text):
     """Count the number of words in the text"""
     # Remove header/footer markers
@@ -37,13 +41,26 @@ def count_words(text):
     
     return len(words)
 
-def create_ebook_pdf(txt_filename, title):
-    """Create a professional ebook-style PDF from a text file"""
+@tracing.traced("pdf.export")
+def create_ebook_pdf(txt_filename, title, content=None):
+    """
+    Create a professional ebook-style PDF from a text file
+
+    Args:
+        txt_filename (str): Path to the text file (also names the PDF)
+        title (str): Title of the novella
+        content (str, optional): Already-read text of the file, to skip re-reading it
+
+    Returns:
+        str: Path to the generated PDF file
+    """
     pdf_filename = txt_filename.replace('.txt', '.pdf')
+    stage_start = time.time()
     
-    # Read the text content
-    with open(txt_filename, 'r', encoding='utf-8') as file:
-        content = file.read()
+    # Read the text content unless the caller already has it
+    if content is None:
+        with open(txt_filename, 'r', encoding='utf-8') as file:
+            content = file.read()
     
     # Remove header and footer markers for PDF
     content = re.sub(r'--- NOVELLA: .*? ---\n\n', '', content)
@@ -128,6 +145,8 @@ def create_ebook_pdf(txt_filename, title):
     # Split into paragraphs
     paragraphs = cleaned_content.split('\n\n')
     in_chapter = False
+    tracing.record_span("pdf.clean", stage_start, time.time(), chars=len(content))
+    stage_start = time.time()
     
     # Start content on new page
     pdf.add_page()
@@ -220,8 +239,12 @@ def create_ebook_pdf(txt_filename, title):
         
         pdf.ln(7)  # Increased space between paragraphs for better readability
     
+    tracing.record_span("pdf.layout", stage_start, time.time(), paragraphs=len(paragraphs), pages=pdf.page_no())
+    
     # Save the pdf
+    stage_start = time.time()
     pdf.output(pdf_filename)
+    tracing.record_span("pdf.write", stage_start, time.time())
     return pdf_filename
 
 if __name__ == "__main__":
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Corpus analytics for a directory of generated novellas.
+
+Scans every .txt file with a process pool and writes one table (CSV or JSON)
+with each book's length, chapter count, sentence-length distribution,
+dialogue ratio and tokens per word. Text statistics are computed with NumPy
+over the raw bytes, tokens with tiktoken's batch encoder. Results are cached
+per file by content hash, so rerunning on an unchanged corpus only stats the
+files.
+"""
+
+import os
+import sys
+import csv
+import json
+import glob
+import time
+import hashlib
+import argparse
+import concurrent.futures
+
+import numpy as np
+
+from chapter_index import HEADING_PATTERN, END_MARKERS
+from artifact_cache import DEFAULT_CACHE_DIR
+
+# Bump when the statistics change so cached results are recomputed
+ANALYTICS_VERSION = 1
+
+# Per-file results, keyed by path with size/mtime and content hash
+DEFAULT_CACHE_FILE = os.path.join(os.environ.get("NOVELLA_CACHE_DIR", DEFAULT_CACHE_DIR), "corpus_stats.json")
+
+# Columns of the output table
+COLUMNS = ("file", "bytes", "words", "chapters", "paragraphs", "sentences", "sentence_words_mean",
+           "sentence_words_median", "sentence_words_p90", "dialogue_ratio", "tokens", "tokens_per_word")
+
+# Byte classes for the vectorized scans
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\n\r\x0b\x0c")] = True
+_SENTENCE_END = np.zeros(256, dtype=bool)
+_SENTENCE_END[list(b".!?")] = True
+
+def novella_body(data):
+    """The novella text without the generation header and end markers"""
+    if data.startswith(b"--- NOVELLA:"):
+        data = data[data.find(b"\n") + 1:]
+    for marker in END_MARKERS:
+        end = data.find(marker)
+        if end != -1:
+            data = data[:end]
+    return data
+
+def _since_last(values, starts):
+    """values minus their value at the most recent start position (values must be non-decreasing)"""
+    base = np.where(starts, values, 0)
+    return values - np.maximum.accumulate(base)
+
+def text_statistics(data):
+    """
+    Length, sentence and dialogue statistics of a novella body
+
+    Words are whitespace-separated runs. A sentence ends at '.', '!' or '?'
+    followed by whitespace or a closing quote, or at a paragraph break.
+    Dialogue is the share of non-space bytes inside straight or curly double
+    quotes, with quote state reset at every paragraph.
+
+    Args:
+        data (bytes): UTF-8 novella body
+
+    Returns:
+        dict: words, chapters, paragraphs, sentences, sentence length stats, dialogue_ratio
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    if not len(arr):
+        return {"words": 0, "chapters": 0, "paragraphs": 0, "sentences": 0, "sentence_words_mean": None,
+                "sentence_words_median": None, "sentence_words_p90": None, "dialogue_ratio": None}
+
+    space = _WHITESPACE[arr]
+    previous_space = np.concatenate(([True], space[:-1]))
+    word_start = ~space & previous_space
+    words_so_far = np.cumsum(word_start)
+
+    # Paragraphs start after a blank line
+    newline = arr == 0x0A
+    paragraph_break = newline & np.concatenate(([False], newline[:-1]))
+    paragraph_start = np.concatenate(([True], paragraph_break[:-1]))
+    paragraphs = len(np.unique(np.cumsum(paragraph_start)[word_start]))
+
+    # Quotes: straight " and UTF-8 curly quotes (E2 80 9C opens, E2 80 9D closes)
+    straight = arr == 0x22
+    curly_lead = np.concatenate(([False, False], (arr[:-2] == 0xE2) & (arr[1:-1] == 0x80)))
+    curly_open = curly_lead & (arr == 0x9C)
+    curly_close = curly_lead & (arr == 0x9D)
+
+    # Sentence ends: terminal punctuation followed by whitespace/closing quote/end, or a paragraph break
+    next_byte = np.concatenate((arr[1:], [0x20]))
+    closes = (next_byte == 0x22) | (next_byte == 0xE2)
+    sentence_end = (_SENTENCE_END[arr] & (_WHITESPACE[next_byte] | closes)) | paragraph_break
+    counts = words_so_far[sentence_end]
+    lengths = np.diff(np.concatenate(([0], counts, [words_so_far[-1]])))
+    lengths = lengths[lengths > 0]
+
+    inside_straight = _since_last(np.cumsum(straight), paragraph_start) % 2 == 1
+    depth = _since_last(np.cumsum(curly_open), paragraph_start) - _since_last(np.cumsum(curly_close), paragraph_start)
+    inside = inside_straight | (depth > 0)
+    text_bytes = np.count_nonzero(~space)
+
+    chapters = sum(1 for line in data.split(b"\n") if HEADING_PATTERN.match(line.rstrip(b"\r")))
+    return {
+        "words": int(words_so_far[-1]),
+        "chapters": chapters,
+        "paragraphs": paragraphs,
+        "sentences": int(len(lengths)),
+        "sentence_words_mean": round(float(lengths.mean()), 2) if len(lengths) else None,
+        "sentence_words_median": float(np.median(lengths)) if len(lengths) else None,
+        "sentence_words_p90": float(np.percentile(lengths, 90)) if len(lengths) else None,
+        "dialogue_ratio": round(float(np.count_nonzero(inside & ~space)) / text_bytes, 4) if text_bytes else None
+    }
+
+def count_tokens(data):
+    """
+    Tokens in a novella body with tiktoken, encoding its paragraphs in one batch
+
+    Returns:
+        int: Token count, or None if the tokenizer is unavailable
+    """
+    from token_counter import warm_up, get_encoder
+    if not warm_up():
+        return None
+    paragraphs = [paragraph for paragraph in data.decode('utf-8', errors='replace').split("\n\n") if paragraph.strip()]
+    # Each paragraph break is one more token ("\n\n") between the batch entries
+    return sum(len(tokens) for tokens in get_encoder().encode_ordinary_batch(paragraphs, num_threads=1)) + \
+        max(0, len(paragraphs) - 1)
+
+def analyze_file(path, tokens=True):
+    """
+    Statistics for one novella file (run in a worker process)
+
+    Returns:
+        dict: sha256, and the statistics in COLUMNS
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    body = novella_body(data)
+    stats = text_statistics(body)
+    stats["bytes"] = len(body)
+    stats["tokens"] = count_tokens(body) if tokens else None
+    stats["tokens_per_word"] = round(stats["tokens"] / stats["words"], 4) if stats["tokens"] and stats["words"] else None
+    stats["sha256"] = hashlib.sha256(data).hexdigest()
+    return stats
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as file:
+            cache = json.load(file)
+        # Anything but an object of the current version is treated like a corrupt cache
+        if (isinstance(cache, dict) and cache.get("version") == ANALYTICS_VERSION
+                and isinstance(cache.get("files"), dict)):
+            return cache
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": ANALYTICS_VERSION, "files": {}}
+
+def _save_cache(cache_file, cache):
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = cache_file + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump(cache, file)
+    os.replace(temp_file, cache_file)
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def analyze_corpus(directory, cache_file=DEFAULT_CACHE_FILE, workers=None, tokens=True):
+    """
+    Statistics for every .txt file in a directory
+
+    Unchanged files (same size and mtime, or same content hash) come from the
+    cache; the rest are analyzed in a process pool.
+
+    Args:
+        directory (str): Directory of novella text files
+        cache_file (str, optional): JSON cache of per-file results (None disables caching)
+        workers (int, optional): Worker processes (default: CPU count)
+        tokens (bool, optional): Count tokens with tiktoken
+
+    Returns:
+        tuple: (list of rows, one per file, ordered by name; number of files analyzed)
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "*.txt")))
+    cache = _load_cache(cache_file) if cache_file else {"version": ANALYTICS_VERSION, "files": {}}
+    entries = cache["files"]
+    rows = {}
+    pending = []
+    tokenizer_ok = None
+
+    def count_tokens_now():
+        # Load the tokenizer only once some file needs counting; offline, cached rows without tokens stay valid
+        nonlocal tokenizer_ok
+        if tokenizer_ok is None:
+            from token_counter import warm_up
+            tokenizer_ok = tokens and warm_up()
+        return tokenizer_ok
+
+    for path in paths:
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = entries.get(key)
+        if entry and (entry["tokens_counted"] or not tokens or not count_tokens_now()):
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                rows[path] = entry["stats"]
+                continue
+            # Touched but maybe not changed: compare contents before re-analyzing
+            if entry["size"] == stat.st_size and entry["stats"]["sha256"] == _file_sha256(path):
+                entry["mtime_ns"] = stat.st_mtime_ns
+                rows[path] = entry["stats"]
+                continue
+        pending.append((path, stat))
+
+    if pending:
+        tokens = count_tokens_now()
+        if len(pending) == 1 or workers == 1:
+            results = [analyze_file(path, tokens) for path, _ in pending]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(analyze_file, [path for path, _ in pending], [tokens] * len(pending)))
+        for (path, stat), stats in zip(pending, results):
+            rows[path] = stats
+            entries[os.path.abspath(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                              "tokens_counted": stats["tokens"] is not None,
+                                              "stats": stats}
+
+    # Forget files that are gone
+    present = {os.path.abspath(path) for path in paths}
+    gone = [key for key in entries if os.path.dirname(key) == os.path.abspath(directory) and key not in present]
+    for key in gone:
+        del entries[key]
+    if cache_file and (pending or gone or not os.path.exists(cache_file)):
+        _save_cache(cache_file, cache)
+
+    table = []
+    for path in paths:
+        row = {column: rows[path].get(column) for column in COLUMNS if column != "file"}
+        table.append({"file": os.path.basename(path), **row})
+    return table, len(pending)
+
+def write_table(rows, output):
+    """Write the rows as CSV, or JSON if the output name ends in .json"""
+    with open(output, 'w', encoding='utf-8', newline='') as file:
+        if output.endswith(".json"):
+            json.dump(rows, file, indent=2)
+        else:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile a directory of novellas: length, chapters, sentences, dialogue, tokens")
+    parser.add_argument("directory", type=str, nargs="?", default="archives", help="Directory of novella text files")
+    parser.add_argument("--output", type=str, default="corpus_stats.csv", help="Table to write (.csv or .json)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-tokens", action="store_true", help="Skip token counting")
+    parser.add_argument("--cache", type=str, default=DEFAULT_CACHE_FILE, help="Per-file result cache")
+    parser.add_argument("--no-cache", action="store_true", help="Analyze every file again")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}")
+        sys.exit(1)
+
+    start_time = time.time()
+    rows, analyzed = analyze_corpus(args.directory, None if args.no_cache else args.cache, args.workers,
+                                    tokens=not args.no_tokens)
+    elapsed = time.time() - start_time
+
+    print(f"{'file':40s} {'words':>9s} {'chapters':>8s} {'sent.':>7s} {'w/sent':>6s} {'dialogue':>8s} {'tok/word':>8s}")
+    for row in rows:
+        mean = f"{row['sentence_words_mean']:.1f}" if row['sentence_words_mean'] is not None else "-"
+        dialogue = f"{row['dialogue_ratio']:.1%}" if row['dialogue_ratio'] is not None else "-"
+        per_word = f"{row['tokens_per_word']:.2f}" if row['tokens_per_word'] is not None else "-"
+        print(f"{row['file'][:40]:40s} {row['words']:9,d} {row['chapters']:8d} {row['sentences']:7,d} "
+              f"{mean:>6s} {dialogue:>8s} {per_word:>8s}")
+    total_words = sum(row["words"] for row in rows)
+    print(f"{len(rows)} books, {total_words:,} words; analyzed {analyzed}, "
+          f"{len(rows) - analyzed} from cache, in {elapsed:.2f}s")
+
+    write_table(rows, args.output)
+    print(f"Table written to {args.output}")
@@ -0,0 +1,259 @@
+import os
+import time
+import multiprocessing
+import concurrent.futures
+import tracing
+
+DEFAULT_AUTHOR = "Generated with Claude 3.7"
+
+def _read(txt_filename, content):
+    """Return the file's text, reading it only if the caller doesn't already have it"""
+    if content is None:
+        with open(txt_filename, 'r', encoding='utf-8') as file:
+            content = file.read()
+    return content
+
+def _cache(use_cache):
+    """Artifact cache to use for an export, or None when caching is off"""
+    if not use_cache:
+        return None
+    from artifact_cache import ArtifactCache
+    return ArtifactCache()
+
+def _artifact(kind, txt_filename, title, author=DEFAULT_AUTHOR, voice=None, output_dir="audio_files"):
+    """
+    Cache identity of one export
+
+    Returns:
+        tuple: (exporter version, options that affect the output, output path)
+    """
+    if kind == "pdf":
+        from convert_pdf import EXPORTER_VERSION
+        return EXPORTER_VERSION, {"title": title}, txt_filename.replace('.txt', '.pdf')
+    if kind == "epub":
+        from convert_epub import EXPORTER_VERSION
+        return EXPORTER_VERSION, {"title": title, "author": author}, txt_filename.replace('.txt', '.epub')
+    from audio_gen import AudiobookGenerator
+    if not voice or voice not in AudiobookGenerator.AVAILABLE_VOICES:
+        voice = AudiobookGenerator.DEFAULT_VOICE
+    clean_title = ''.join(c if c.isalnum() else '_' for c in title)
+    return (AudiobookGenerator.EXPORTER_VERSION, {"voice": voice, "model": AudiobookGenerator.TTS_MODEL},
+            os.path.join(output_dir, f"{clean_title}_audiobook.mp3"))
+
+def restore_cached(kind, txt_filename, title, content, author=DEFAULT_AUTHOR, voice=None, output_dir="audio_files"):
+    """
+    Put a cached artifact in place without building anything
+
+    Args:
+        kind (str): "pdf", "epub" or "audio"
+        txt_filename (str): Path to the novella text file
+        title (str): Title of the novella
+        content (str): Text of the file
+        author (str, optional): Author name (EPUB)
+        voice (str, optional): Voice (audiobook)
+        output_dir (str, optional): Directory for the audiobook
+
+    Returns:
+        str: Path of the artifact, or None if it is not cached (the miss is left for the build to count)
+    """
+    from artifact_cache import ArtifactCache
+    version, options, output_path = _artifact(kind, txt_filename, title, author, voice, output_dir)
+    cache = ArtifactCache()
+    return cache.get(cache.make_key(content, kind, version, options), output_path, count_miss=False)
+
+def export_pdf(txt_filename, title, content=None, use_cache=True):
+    """
+    Build the PDF for a novella, reusing a cached copy for identical input
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        title (str): Title of the novella
+        content (str, optional): Already-read text of the file
+        use_cache (bool, optional): Look up and store the artifact in the artifact cache
+
+    Returns:
+        str: Path to the PDF file
+    """
+    from convert_pdf import create_ebook_pdf
+    content = _read(txt_filename, content)
+    build = lambda: create_ebook_pdf(txt_filename, title, content=content)
+    cache = _cache(use_cache)
+    if not cache:
+        return build()
+    version, options, output_path = _artifact("pdf", txt_filename, title)
+    return cache.fetch(content, "pdf", version, options, output_path, build)
+
+def export_epub(txt_filename, title, author=DEFAULT_AUTHOR, content=None, rendered_chapters=None, use_cache=True):
+    """
+    Build the EPUB for a novella, reusing a cached copy for identical input
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        title (str): Title of the novella
+        author (str, optional): Author name for EPUB metadata
+        content (str, optional): Already-read text of the file
+        rendered_chapters (dict, optional): EPUB chapters already rendered while streaming
+        use_cache (bool, optional): Look up and store the artifact in the artifact cache
+
+    Returns:
+        str: Path to the EPUB file
+    """
+    from convert_epub import convert_to_epub
+    content = _read(txt_filename, content)
+    build = lambda: convert_to_epub(txt_filename, title, author, content=content,
+                                    rendered_chapters=rendered_chapters)
+    cache = _cache(use_cache)
+    if not cache:
+        return build()
+    version, options, output_path = _artifact("epub", txt_filename, title, author)
+    return cache.fetch(content, "epub", version, options, output_path, build)
+
+def export_audio(txt_filename, title, voice=None, openai_api_key=None, content=None, use_cache=True,
+                 output_dir="audio_files"):
+    """
+    Build the combined audiobook for a novella, reusing a cached copy for identical input
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        title (str): Title of the novella
+        voice (str, optional): Voice to use for TTS
+        openai_api_key (str, optional): OpenAI API key
+        content (str, optional): Already-read text of the file
+        use_cache (bool, optional): Look up and store the artifact in the artifact cache
+        output_dir (str, optional): Directory for the audiobook
+
+    Returns:
+        str: Path to the combined MP3, or None if narration failed
+    """
+    from audio_gen import AudiobookGenerator
+    content = _read(txt_filename, content)
+    if not voice or voice not in AudiobookGenerator.AVAILABLE_VOICES:
+        voice = AudiobookGenerator.DEFAULT_VOICE
+
+    def build():
+        generator = AudiobookGenerator(api_key=openai_api_key, output_dir=output_dir)
+        _, combined = generator.generate_audiobook(txt_filename, title, voice, text=content)
+        # An audiobook missing failed segments is returned but not cached
+        return combined, not generator.failed_segments
+
+    cache = _cache(use_cache)
+    if not cache:
+        return build()[0]
+    version, options, output_path = _artifact("audio", txt_filename, title, voice=voice, output_dir=output_dir)
+    return cache.fetch(content, "audio", version, options, output_path, build)
+
+@tracing.traced("export.all")
+def export_all(txt_filename, title, pdf=True, epub=True, audio=False,
+               author=DEFAULT_AUTHOR, voice=None, openai_api_key=None, rendered_chapters=None,
+               use_cache=True, verbose=True, audio_dir="audio_files"):
+    """
+    Export a novella text file to PDF, EPUB and audiobook concurrently.
+
+    The stages form a small dependency graph: the text is read once, then the
+    PDF and EPUB builders (CPU-bound) run in a process pool while the audiobook
+    (I/O-bound TTS requests) runs in a thread, so the total time is roughly that
+    of the slowest exporter rather than the sum of all of them.
+
+    Args:
+        txt_filename (str): Path to the novella text file
+        title (str): Title of the novella
+        pdf (bool, optional): Build the PDF
+        epub (bool, optional): Build the EPUB
+        audio (bool, optional): Build the audiobook
+        author (str, optional): Author name for EPUB metadata
+        voice (str, optional): Voice to use for TTS
+        openai_api_key (str, optional): OpenAI API key for the audiobook stage
+        rendered_chapters (dict, optional): EPUB chapters already rendered while streaming
+        use_cache (bool, optional): Reuse artifacts already exported from identical input
+        verbose (bool, optional): Print each stage's timing as it finishes
+        audio_dir (str, optional): Directory for the audiobook
+
+    Returns:
+        tuple: (dict of stage -> output path, None if it failed; dict of stage -> seconds)
+    """
+    results = {}
+    timings = {}
+    start_time = time.time()
+
+    # Stage 1: read the source once and share it with every exporter
+    with open(txt_filename, 'r', encoding='utf-8') as file:
+        content = file.read()
+    timings["read"] = time.time() - start_time
+    tracing.record_span("export.read", start_time, time.time(), chars=len(content))
+
+    # Stage 2: independent exporters, all depending only on the read stage
+    cpu_stages = []
+    if pdf:
+        cpu_stages.append(("pdf", export_pdf, (txt_filename, title, content, use_cache)))
+    if epub:
+        cpu_stages.append(("epub", export_epub, (txt_filename, title, author, content, rendered_chapters, use_cache)))
+
+    # Exporters run in other processes and threads; hand them this trace
+    context = tracing.current_context()
+    futures = {}
+    stage_start = time.time()
+    process_pool = None
+    thread_pool = None
+    try:
+        if cpu_stages:
+            # Spawned, not forked: the app and job manager fork from threads that may hold locks
+            process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=len(cpu_stages),
+                                                                  mp_context=multiprocessing.get_context("spawn"))
+            for stage, func, args in cpu_stages:
+                futures[process_pool.submit(tracing.run_in_context, context, func, *args)] = stage
+        if audio:
+            thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            future = thread_pool.submit(tracing.run_in_context, context, export_audio, txt_filename, title, voice,
+                                        openai_api_key, content, use_cache, audio_dir)
+            futures[future] = "audio"
+
+        for future in concurrent.futures.as_completed(futures):
+            stage = futures[future]
+            timings[stage] = time.time() - stage_start
+            try:
+                results[stage] = future.result()
+            except Exception as e:
+                results[stage] = None
+                print(f"Error in {stage} export: {e}")
+            if verbose:
+                print(f"[export] {stage} finished in {timings[stage]:.2f}s")
+    finally:
+        if process_pool:
+            process_pool.shutdown()
+        if thread_pool:
+            thread_pool.shutdown()
+
+    timings["total"] = time.time() - start_time
+    if verbose:
+        print(f"[export] all stages finished in {timings['total']:.2f}s")
+
+    return results, timings
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a novella text file to PDF, EPUB and audiobook concurrently")
+    parser.add_argument("txt_file", type=str, help="Novella text file")
+    parser.add_argument("title", type=str, help="Title of the novella")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip PDF generation")
+    parser.add_argument("--no-epub", action="store_true", help="Skip EPUB generation")
+    parser.add_argument("--audio", action="store_true", help="Generate an audiobook (needs OPENAI_API_KEY)")
+    parser.add_argument("--voice", type=str, help="Voice for the audiobook", default=None)
+    parser.add_argument("--author", type=str, help="Author name for EPUB metadata", default=DEFAULT_AUTHOR)
+    parser.add_argument("--no-cache", action="store_true", help="Always rebuild instead of reusing cached artifacts")
+
+    args = parser.parse_args()
+
+    results, timings = export_all(
+        args.txt_file,
+        args.title,
+        pdf=not args.no_pdf,
+        epub=not args.no_epub,
+        audio=args.audio,
+        author=args.author,
+        voice=args.voice,
+        use_cache=not args.no_cache
+    )
+    for stage in ("pdf", "epub", "audio"):
+        if stage in results and results[stage]:
+            print(f"{stage.upper()} created: {results[stage]}")
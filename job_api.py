@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+HTTP API for NovellaGPT: submit generation, export and audio jobs, check their
+status, download their artifacts and follow their progress as server-sent events.
+
+Endpoints:
+    POST /jobs                          Submit a job (JSON body, see submit_job)
+    GET  /jobs                          List jobs
+    GET  /jobs/<id>                     Job status
+    GET  /jobs/<id>/events              Progress stream (text/event-stream)
+    GET  /jobs/<id>/artifacts           List artifacts
+    GET  /jobs/<id>/artifacts/<name>    Download an artifact (txt, pdf, epub, audiobook)
+"""
+
+import os
+import sys
+import json
+import argparse
+import mimetypes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+from job_manager import get_job_manager, run_generation_job, run_export_job, run_audio_job
+
+# API keys for the jobs come from the server's environment
+load_dotenv()
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_KEEPALIVE_SECONDS = 15
+
+# Largest accepted request body
+MAX_BODY_BYTES = 64 * 1024
+
+class ApiError(Exception):
+    """Error reported to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _local_file(path):
+    """Resolve a client-supplied text file path, refusing anything outside the working directory"""
+    if not isinstance(path, str) or not path:
+        raise ApiError(400, "txt_filename is required")
+    resolved = os.path.realpath(path)
+    if os.path.commonpath([resolved, os.getcwd()]) != os.getcwd():
+        raise ApiError(403, "txt_filename must be inside the server's working directory")
+    if not os.path.isfile(resolved):
+        raise ApiError(404, f"File not found: {path}")
+    return path
+
+def submit_job(request):
+    """
+    Submit a job from a request body
+
+    Args:
+        request (dict): {"kind": "generate", "prompt", "title", "system_prompt"?, "generate_audio"?, "voice"?, "author"?}
+            or {"kind": "export", "txt_filename", "title", "pdf"?, "epub"?, "author"?}
+            or {"kind": "audio", "txt_filename", "title", "voice"?}
+
+    Returns:
+        str: The job id
+    """
+    jobs = get_job_manager()
+    kind = request.get("kind")
+    title = request.get("title")
+    if not title or not isinstance(title, str):
+        raise ApiError(400, "title is required")
+
+    if kind == "generate":
+        if not request.get("prompt"):
+            raise ApiError(400, "prompt is required")
+        return jobs.submit(
+            "generate", run_generation_job, request["prompt"], title,
+            system_prompt=request.get("system_prompt"),
+            openai_api_key=os.environ.get("OPENAI_API_KEY"),
+            generate_audio=bool(request.get("generate_audio")),
+            voice=request.get("voice"),
+            author=request.get("author"),
+            title=title
+        )
+    if kind == "export":
+        return jobs.submit(
+            "export", run_export_job, _local_file(request.get("txt_filename")), title,
+            pdf=request.get("pdf", True), epub=request.get("epub", True), author=request.get("author"),
+            title=title
+        )
+    if kind == "audio":
+        if not os.environ.get("OPENAI_API_KEY"):
+            raise ApiError(503, "OPENAI_API_KEY is not set on the server")
+        return jobs.submit(
+            "audio", run_audio_job, _local_file(request.get("txt_filename")), title,
+            voice=request.get("voice"), openai_api_key=os.environ.get("OPENAI_API_KEY"),
+            title=title
+        )
+    raise ApiError(400, "kind must be one of: generate, export, audio")
+
+def artifact_files(snapshot):
+    """
+    Downloadable artifacts of a job
+
+    Returns:
+        dict: Artifact name -> {"path", "size"} for artifacts that exist on disk
+    """
+    files = {}
+    for name, path in snapshot["artifacts"].items():
+        if isinstance(path, str) and os.path.isfile(path):
+            files[name] = {"path": path, "size": os.path.getsize(path)}
+    return files
+
+class JobApiHandler(BaseHTTPRequestHandler):
+    """Request handler; each connection runs in its own thread"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "NovellaGPT"
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job(self, job_id):
+        snapshot = get_job_manager().get(job_id)
+        if snapshot is None:
+            raise ApiError(404, f"Unknown job {job_id}")
+        return snapshot
+
+    def _route(self):
+        return [part for part in self.path.split("?", 1)[0].split("/") if part]
+
+    def _content_length(self):
+        """Validated Content-Length of the request body (chunked bodies are not supported)"""
+        value = self.headers.get("Content-Length")
+        # The body is left unread on an error, so the connection cannot be reused
+        if value is None:
+            self.close_connection = True
+            raise ApiError(411, "Content-Length header required")
+        try:
+            length = int(value)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ApiError(400, f"Invalid Content-Length: {value!r}")
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise ApiError(413, "Request body too large")
+        return length
+
+    def do_POST(self):
+        try:
+            if self._route() != ["jobs"]:
+                raise ApiError(404, "Not found")
+            length = self._content_length()
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise ApiError(400, "Request body must be JSON")
+            if not isinstance(request, dict):
+                raise ApiError(400, "Request body must be a JSON object")
+            job_id = submit_job(request)
+            self._send_json(202, get_job_manager().get(job_id))
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+
+    def do_GET(self):
+        parts = self._route()
+        try:
+            if parts == ["jobs"]:
+                self._send_json(200, get_job_manager().list_jobs())
+            elif len(parts) == 2 and parts[0] == "jobs":
+                self._send_json(200, self._job(parts[1]))
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+                self._stream_events(self._job(parts[1]))
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "artifacts":
+                files = artifact_files(self._job(parts[1]))
+                self._send_json(200, {name: {"size": info["size"], "url": f"/jobs/{parts[1]}/artifacts/{name}"}
+                                      for name, info in files.items()})
+            elif len(parts) == 4 and parts[0] == "jobs" and parts[2] == "artifacts":
+                files = artifact_files(self._job(parts[1]))
+                if parts[3] not in files:
+                    raise ApiError(404, f"Job {parts[1]} has no artifact '{parts[3]}'")
+                self._send_file(files[parts[3]]["path"])
+            else:
+                raise ApiError(404, "Not found")
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+
+    def _send_file(self, path):
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        self.end_headers()
+        with open(path, 'rb') as file:
+            while True:
+                block = file.read(1024 * 1024)
+                if not block:
+                    break
+                self.wfile.write(block)
+
+    def _stream_events(self, snapshot):
+        """
+        Send a "progress" event per job change and a final "done" event
+
+        The handler thread sleeps on the job's condition between changes, so
+        any number of clients can watch one job at no polling cost.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        jobs = get_job_manager()
+        version = -1
+        try:
+            while True:
+                if snapshot["version"] > version:
+                    version = snapshot["version"]
+                    finished = snapshot["status"] in ("completed", "failed")
+                    event = "done" if finished else "progress"
+                    self.wfile.write(f"event: {event}\nid: {version}\ndata: {json.dumps(snapshot)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    if finished:
+                        return
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                snapshot = jobs.wait_for_change(snapshot["id"], version, SSE_KEEPALIVE_SECONDS)
+                if snapshot is None:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away
+            return
+
+    def log_message(self, format, *args):
+        # Keep the event streams out of the log; errors are still reported
+        if not self.path.endswith("/events"):
+            super().log_message(format, *args)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the NovellaGPT job API")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8600, help="Port to listen on")
+
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), JobApiHandler)
+    server.daemon_threads = True
+    print(f"NovellaGPT job API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+        server.server_close()
+        sys.exit(0)
@@ -0,0 +1,359 @@
+import os
+import time
+import uuid
+import threading
+import concurrent.futures
+
+from workspace import Workspace, safe_name
+from metrics_store import record_run
+import tracing
+
+# Jobs that finished longer ago than this are dropped from the registry
+JOB_RETENTION_SECONDS = 24 * 60 * 60
+
+# Rough output size of a full novella (thinking included), used to turn output tokens into progress
+TARGET_TOKENS = 100000
+
+class Job:
+    """A generation, export or audio job tracked by the JobManager"""
+
+    def __init__(self, kind, title=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.title = title
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Queued"
+        self.metrics = {}
+        self.artifacts = {}
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0
+        self.updated_at = self.created_at
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def update(self, progress=None, message=None, artifacts=None, **metrics):
+        """
+        Update the job's progress from its worker thread
+
+        Args:
+            progress (float, optional): Completion fraction (0-1)
+            message (str, optional): Human-readable status line
+            artifacts (dict, optional): Output paths to record
+            **metrics: Any other numbers to expose (words, tokens, ...)
+        """
+        with self._lock:
+            if progress is not None:
+                self.progress = max(0.0, min(1.0, progress))
+            if message is not None:
+                self.message = message
+            if artifacts:
+                self.artifacts.update(artifacts)
+            self.metrics.update(metrics)
+            self._notify()
+
+    def _notify(self):
+        """Wake everyone waiting for a change (caller holds the lock)"""
+        self.version += 1
+        self.updated_at = time.time()
+        self._changed.notify_all()
+
+    def _set_status(self, status, error=None):
+        with self._lock:
+            self.status = status
+            if status == "running":
+                self.started_at = time.time()
+            elif status in ("completed", "failed"):
+                self.finished_at = time.time()
+                self.error = error
+                if status == "completed":
+                    self.progress = 1.0
+            self._notify()
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the job changes past a version seen earlier
+
+        Every watcher of a job waits on the same condition, so one update
+        fans out to all of them without anyone polling.
+
+        Args:
+            version (int): The "version" of the last snapshot the caller saw
+            timeout (float, optional): Seconds to wait at most
+
+        Returns:
+            dict: A fresh snapshot (unchanged version if the wait timed out)
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version, timeout)
+        return self.snapshot()
+
+    def snapshot(self):
+        """
+        Copy of the job's state that is safe to read from any thread
+
+        Returns:
+            dict: id, kind, title, status, version, progress, message, metrics, artifacts, error and
+                timestamps (updated_at is the time of the latest change)
+        """
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "title": self.title,
+                "status": self.status,
+                "version": self.version,
+                "progress": self.progress,
+                "message": self.message,
+                "metrics": dict(self.metrics),
+                "artifacts": dict(self.artifacts),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "updated_at": self.updated_at,
+                "elapsed": end - self.started_at if self.started_at else 0.0
+            }
+
+class JobManager:
+    """
+    Process-wide registry that runs jobs in worker threads.
+
+    Jobs outlive the Streamlit script run (and the browser session) that
+    submitted them, so a page reload can reattach by job id, and several
+    users' jobs run side by side without blocking each other's UI.
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Initialize the manager
+
+        Args:
+            max_workers (int, optional): Concurrent jobs (NOVELLA_MAX_JOBS, default 8)
+        """
+        max_workers = max_workers or int(os.environ.get("NOVELLA_MAX_JOBS", 8))
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="novella-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, target, *args, title=None, **kwargs):
+        """
+        Queue a job
+
+        Args:
+            kind (str): Job type ("generate", "export", "audio")
+            target (callable): Function called as target(job, *args, **kwargs); its
+                return value (a dict of artifact paths) is recorded on the job
+            title (str, optional): Novella title, for display
+
+        Returns:
+            str: The new job's id
+        """
+        job = Job(kind, title)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, target, args, kwargs)
+        return job.id
+
+    def _run(self, job, target, args, kwargs):
+        job._set_status("running")
+        job.update(message="Running")
+        try:
+            with tracing.span("job.run", kind=job.kind, job_id=job.id):
+                tracing.record_span("job.queued", job.created_at, job.started_at)
+                artifacts = target(job, *args, **kwargs)
+            job.update(artifacts=artifacts or {}, message="Completed")
+            job._set_status("completed")
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.update(message="Failed")
+            job._set_status("failed", error=str(e) or e.__class__.__name__)
+            record_run(job.kind, job.title, status="failed", started_at=job.started_at,
+                       total_seconds=time.time() - job.started_at)
+
+    def _prune(self):
+        """Drop finished jobs past the retention window (caller holds the lock)"""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Look up a job
+
+        Args:
+            job_id (str): Job id from submit
+
+        Returns:
+            dict: Job snapshot, or None if the id is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def wait_for_change(self, job_id, version, timeout=None):
+        """
+        Block until a job changes past a version (see Job.wait_for_change)
+
+        Returns:
+            dict: Job snapshot, or None if the id is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.wait_for_change(version, timeout) if job else None
+
+    def list_jobs(self, kind=None):
+        """
+        Snapshots of all known jobs, newest first
+
+        Args:
+            kind (str, optional): Only jobs of this type
+
+        Returns:
+            list: Job snapshots
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        snapshots = [job.snapshot() for job in jobs if kind is None or job.kind == kind]
+        return sorted(snapshots, key=lambda s: s["created_at"], reverse=True)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """Return the process-wide JobManager, creating it on first use"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
+
+def txt_filename_for(title, directory=None):
+    """Text file name generate_novella writes for a title (in directory, default the working directory)"""
+    return os.path.join(directory or "", safe_name(title) + ".txt")
+
+def _publish(workspace, files):
+    """Publish the files that were produced into the job's workspace; returns name -> published path"""
+    published = {}
+    for name, paths in files.items():
+        if isinstance(paths, str):
+            paths = paths if os.path.exists(paths) else None
+        elif paths:
+            paths = [path for path in paths if os.path.exists(path)]
+        if paths:
+            published[name] = workspace.publish(name, paths)
+    return published
+
+def run_generation_job(job, prompt, title, system_prompt=None, api_key=None,
+                       openai_api_key=None, generate_audio=False, voice=None, author=None):
+    """
+    Job target: generate a novella, then export it (and narrate it if requested)
+
+    Everything is written in the job's own workspace and published when done.
+
+    Returns:
+        dict: Paths of the txt, pdf, epub and audiobook artifacts
+    """
+    from storygen2 import generate_novella, count_words, update_search_index
+    from speculative_export import ChapterStreamExporter
+    from export_pipeline import export_all, DEFAULT_AUTHOR
+    from chapter_index import index_path
+    from stream_renderer import create_renderer
+
+    narrate = bool(generate_audio and openai_api_key)
+    workspace = Workspace(job.id)
+
+    def on_progress(word_count, elapsed, stats):
+        job.update(
+            progress=min(0.95, stats["output_tokens"] / TARGET_TOKENS * 0.95),
+            message="Thinking" if stats["phase"] == "thinking" else "Generating",
+            words=word_count,
+            tokens=stats["output_tokens"],
+            thinking_tokens=stats["thinking_tokens"],
+            tokens_per_sec=stats["tokens_per_sec"],
+            first_text_seconds=stats["first_text_seconds"]
+        )
+
+    job.update(message="Waiting for Claude")
+    run_metrics = {}
+    exporter = ChapterStreamExporter(title, epub=True, audio=narrate, voice=voice, openai_api_key=openai_api_key,
+                                     audio_dir=workspace.file("audio"))
+    generate_novella(prompt, title, system_prompt, api_key=api_key, exporter=exporter,
+                     progress_callback=on_progress, output_dir=workspace.work_dir, metrics=run_metrics,
+                     renderer=create_renderer("quiet"), index_search=False)
+
+    job.update(progress=0.95, message="Finishing exports")
+    speculative = exporter.finish()
+
+    txt_filename = txt_filename_for(title, workspace.work_dir)
+    with open(txt_filename, 'r', encoding='utf-8') as file:
+        word_count = count_words(file.read())
+    job.update(words=word_count)
+
+    results, timings = export_all(txt_filename, title, pdf=True, epub=True, author=author or DEFAULT_AUTHOR,
+                                  rendered_chapters=speculative["rendered_chapters"])
+    job.update(export_timings=timings)
+
+    artifacts = _publish(workspace, {
+        "txt": txt_filename,
+        "index": index_path(txt_filename),
+        "pdf": results.get("pdf"),
+        "epub": results.get("epub"),
+        "audiobook": speculative["audiobook"],
+        "audio_segments": speculative["audio_segments"]
+    })
+    workspace.clean_work()
+    # Indexed once published; the copy in the work directory is gone by now
+    if "txt" in artifacts:
+        update_search_index(artifacts["txt"])
+    record_run("generate", title, started_at=job.started_at, total_seconds=time.time() - job.started_at,
+               stage_timings=timings, tts_latencies=speculative["tts_latencies"], **run_metrics)
+    return artifacts
+
+def run_export_job(job, txt_filename, title, pdf=True, epub=True, author=None):
+    """
+    Job target: export an existing novella text file into the job's workspace
+
+    Returns:
+        dict: Paths of the exported artifacts
+    """
+    from export_pipeline import export_all, DEFAULT_AUTHOR
+
+    workspace = Workspace(job.id)
+    job.update(message="Exporting")
+    results, timings = export_all(workspace.import_file(txt_filename), title, pdf=pdf, epub=epub,
+                                  author=author or DEFAULT_AUTHOR)
+    job.update(export_timings=timings)
+    artifacts = _publish(workspace, results)
+    workspace.clean_work()
+    record_run("export", title, started_at=job.started_at, total_seconds=timings["total"], stage_timings=timings)
+    return artifacts
+
+def run_audio_job(job, txt_filename, title, voice=None, openai_api_key=None):
+    """
+    Job target: narrate an existing novella text file into the job's workspace
+
+    Returns:
+        dict: Paths of the audiobook and its segment files
+    """
+    from audio_gen import AudiobookGenerator
+
+    workspace = Workspace(job.id)
+
+    def on_progress(progress, current, total, final_path=None):
+        job.update(progress=progress / 100, message=f"Segment {current}/{total}", segment=current, segments=total)
+
+    generator = AudiobookGenerator(api_key=openai_api_key, output_dir=workspace.file("audio"))
+    audio_files, combined = generator.generate_chapter_by_chapter(txt_filename, title, voice=voice, callback=on_progress)
+    if not combined:
+        raise RuntimeError("No audio was generated")
+    artifacts = _publish(workspace, {"audiobook": combined, "audio_segments": audio_files})
+    workspace.clean_work()
+    record_run("audio", title, started_at=job.started_at, total_seconds=time.time() - job.started_at,
+               tts_latencies=generator.segment_latencies)
+    return artifacts
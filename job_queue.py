@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+
+DEFAULT_QUEUE_DB = "novella_jobs.db"
+
+# Seconds a leased job stays owned by a worker without a heartbeat
+DEFAULT_LEASE_SECONDS = 60
+
+# Retry backoff: RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+RETRY_BASE_SECONDS = 10
+
+class JobQueue:
+    """
+    Durable job queue in a local SQLite database.
+
+    Jobs are enqueued as JSON payloads and leased by worker processes. A
+    lease has to be renewed by heartbeats; if a worker dies its lease expires
+    and another worker picks the job up. Failed jobs are retried with
+    exponential backoff until max_attempts, then moved to the dead letter
+    state ("dead") for inspection and manual retry; so is a job whose lease
+    expires on its last attempt.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Open (and create if needed) the queue database
+
+        Args:
+            db_path (str, optional): SQLite file (NOVELLA_QUEUE_DB, default novella_jobs.db)
+        """
+        self.db_path = db_path or os.environ.get("NOVELLA_QUEUE_DB", DEFAULT_QUEUE_DB)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_after REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, kind, run_after)")
+
+    def _connect(self):
+        # Autocommit mode; lease() opens its own write transaction
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, kind, payload, max_attempts=3):
+        """
+        Add a job to the queue
+
+        Args:
+            kind (str): Job type ("generate", "pdf", "epub", "audio")
+            payload (dict): JSON-serializable job arguments (no API keys; workers read those from their environment)
+            max_attempts (int, optional): Attempts before the job is dead-lettered
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, max_attempts, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), max_attempts, now, now, now)
+            )
+        return job_id
+
+    def lease(self, worker_id, kinds, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Claim the oldest ready job of the given kinds
+
+        Ready means queued and past its retry backoff, or leased by a worker whose
+        lease has expired. The claim happens in one write transaction, so two
+        workers can never lease the same job.
+
+        Args:
+            worker_id (str): Identifier of the leasing worker
+            kinds (list): Job types this worker can run right now
+            lease_seconds (float, optional): Lease length before a heartbeat is needed
+
+        Returns:
+            dict: The leased job, or None if nothing is ready
+        """
+        if not kinds:
+            return None
+        now = time.time()
+        placeholders = ",".join("?" for _ in kinds)
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # A lease that expired on its last attempt means the job keeps taking its worker down
+            # (crash, OOM kill): dead-letter it instead of handing it out forever
+            db.execute(
+                f"UPDATE jobs SET status = 'dead', error = 'Worker lost on the last attempt (lease expired)', "
+                "message = 'Failed', lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                f"WHERE kind IN ({placeholders}) AND status = 'leased' AND lease_expires < ? "
+                "AND attempts >= max_attempts",
+                (now, *kinds, now)
+            )
+            row = db.execute(
+                f"SELECT * FROM jobs WHERE kind IN ({placeholders}) AND ("
+                "(status = 'queued' AND run_after <= ?) OR (status = 'leased' AND lease_expires < ?)"
+                ") ORDER BY created_at LIMIT 1",
+                (*kinds, now, now)
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"])
+            )
+            job = self._to_dict(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+            db.execute("COMMIT")
+            return job
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, progress=None, message=None):
+        """
+        Renew a lease and optionally record progress
+
+        Returns:
+            bool: False if the worker no longer owns the job (its lease expired and was taken over)
+        """
+        now = time.time()
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ?, progress = COALESCE(?, progress), "
+                "message = COALESCE(?, message), updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (now + lease_seconds, progress, message, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result=None):
+        """
+        Mark a leased job as completed
+
+        Returns:
+            bool: False if the worker no longer owns the job
+        """
+        now = time.time()
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'completed', progress = 1, message = 'Completed', result = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result or {}), now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error, retry=True):
+        """
+        Record a failed attempt: retry with backoff, or dead-letter after max_attempts
+
+        Args:
+            job_id (str): The job
+            worker_id (str): The worker holding its lease
+            error (str): What went wrong
+            retry (bool, optional): False dead-letters the job at once (the error would only repeat)
+
+        Returns:
+            str: The job's new status ("queued" or "dead"), or None if the worker no longer owns it
+        """
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? "
+                             "AND status = 'leased'", (job_id, worker_id)).fetchone()
+            if row is None:
+                return None
+            if not retry or row["attempts"] >= row["max_attempts"]:
+                status = "dead"
+                run_after = now
+            else:
+                status = "queued"
+                run_after = now + RETRY_BASE_SECONDS * 2 ** (row["attempts"] - 1)
+            # Guarded like complete(): the lease may have been taken over since the SELECT
+            cursor = db.execute(
+                "UPDATE jobs SET status = ?, run_after = ?, error = ?, message = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased' AND attempts = ?",
+                (status, run_after, error, "Failed" if status == "dead" else "Retrying", now,
+                 job_id, worker_id, row["attempts"])
+            )
+            return status if cursor.rowcount == 1 else None
+
+    def retry(self, job_id):
+        """
+        Put a dead-lettered job back in the queue with a fresh attempt budget
+
+        Returns:
+            bool: False if the job is not dead-lettered
+        """
+        now = time.time()
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'dead'",
+                (now, now, job_id)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id):
+        """
+        Look up a job
+
+        Returns:
+            dict: The job, or None if the id is unknown
+        """
+        with self._connect() as db:
+            return self._to_dict(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list_jobs(self, status=None, limit=50):
+        """
+        Most recent jobs, newest first
+
+        Args:
+            status (str, optional): Only jobs in this state (queued, leased, completed, dead)
+            limit (int, optional): Maximum number of jobs
+
+        Returns:
+            list: Jobs
+        """
+        with self._connect() as db:
+            if status:
+                rows = db.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                                  (status, limit)).fetchall()
+            else:
+                rows = db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and feed the NovellaGPT job queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add a job")
+    enqueue_parser.add_argument("kind", choices=["generate", "pdf", "epub", "audio"])
+    enqueue_parser.add_argument("payload", type=str, help='JSON payload, e.g. \'{"txt_filename": "x.txt", "title": "X"}\'')
+    enqueue_parser.add_argument("--max-attempts", type=int, default=3)
+
+    list_parser = subparsers.add_parser("list", help="List recent jobs")
+    list_parser.add_argument("--status", type=str, default=None, help="queued, leased, completed or dead")
+
+    retry_parser = subparsers.add_parser("retry", help="Requeue a dead-lettered job")
+    retry_parser.add_argument("job_id", type=str)
+
+    args = parser.parse_args()
+    queue = JobQueue()
+
+    if args.command == "enqueue":
+        print(queue.enqueue(args.kind, json.loads(args.payload), args.max_attempts))
+    elif args.command == "list":
+        for job in queue.list_jobs(args.status):
+            print(f"{job['id']}  {job['kind']:8s} {job['status']:9s} attempts={job['attempts']}/{job['max_attempts']} "
+                  f"progress={job['progress']:.0%}  {job['error'] or job['message'] or ''}")
+    elif args.command == "retry":
+        print("Requeued" if queue.retry(args.job_id) else "Job is not dead-lettered")
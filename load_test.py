@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Load test for the NovellaGPT job API.
+
+Simulates N concurrent users, each submitting a generation job, following its
+server-sent progress events, then exporting and narrating the result, at
+increasing N. By default it starts its own job API server against the local
+mock Anthropic/OpenAI endpoints in mock_api.py (synthetic streams, or recorded
+fixtures with --fixtures), so no keys are needed.
+
+For every level it reports the p50/p95 UI update latency (time from a job
+change on the server to the event reaching the client), job throughput,
+server CPU and peak RSS, and where throughput stops growing.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+
+from server_monitor import usage
+from mock_api import MockApiServer, MockSettings
+
+# A level counts as saturated when doubling the users adds less than this much throughput
+SATURATION_GAIN = 1.10
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+def _post_json(api_url, path, data):
+    request = urllib.request.Request(f"{api_url}{path}", data=json.dumps(data).encode('utf-8'),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)
+
+def watch_job(api_url, job_id, latencies):
+    """
+    Follow a job's event stream to the end
+
+    Args:
+        api_url (str): Job API base URL
+        job_id (str): Job to follow
+        latencies (list): Receives one update latency (seconds) per event
+
+    Returns:
+        dict: The final job snapshot
+    """
+    snapshot = None
+    with urllib.request.urlopen(f"{api_url}/jobs/{job_id}/events", timeout=3600) as response:
+        event = None
+        for raw_line in response:
+            line = raw_line.decode('utf-8').rstrip("\n")
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                snapshot = json.loads(line[6:])
+                latencies.append(max(0.0, time.time() - snapshot["updated_at"]))
+                if event == "done":
+                    break
+    return snapshot
+
+def run_session(api_url, number, flows, record):
+    """
+    One simulated user: generate, then export and narrate the novella
+
+    Args:
+        api_url (str): Job API base URL
+        number (int): Session number, used in the title
+        flows (list): Any of "generate", "export", "audio"
+        record (dict): Filled with latencies, job durations, tokens and errors
+    """
+    try:
+        txt_filename = None
+        if "generate" in flows:
+            start_time = time.time()
+            job = _post_json(api_url, "/jobs", {"kind": "generate", "title": f"Load Test {number}",
+                                                "prompt": "A load test novella"})
+            final = watch_job(api_url, job["id"], record["latencies"])
+            record["durations"]["generate"] = time.time() - start_time
+            if final["status"] != "completed":
+                raise RuntimeError(f"generate job failed: {final['error']}")
+            record["tokens"] = final["metrics"].get("tokens", 0)
+            txt_filename = final["artifacts"].get("txt")
+
+        for kind in ("export", "audio"):
+            if kind not in flows or not txt_filename:
+                continue
+            start_time = time.time()
+            job = _post_json(api_url, "/jobs", {"kind": kind, "title": f"Load Test {number}",
+                                                "txt_filename": txt_filename})
+            final = watch_job(api_url, job["id"], record["latencies"])
+            record["durations"][kind] = time.time() - start_time
+            if final["status"] != "completed":
+                raise RuntimeError(f"{kind} job failed: {final['error']}")
+    except (OSError, ValueError, RuntimeError, urllib.error.URLError) as e:
+        record["error"] = str(e)
+
+def run_level(api_url, sessions, flows, pid=None):
+    """
+    Run N concurrent sessions and measure them
+
+    Args:
+        api_url (str): Job API base URL
+        sessions (int): Concurrent simulated users
+        flows (list): Flows each user runs
+        pid (int, optional): Server process to sample CPU and RSS from
+
+    Returns:
+        dict: Summary of the level
+    """
+    records = [{"latencies": [], "durations": {}, "tokens": 0, "error": None} for _ in range(sessions)]
+    peak_rss = [0]
+    sampling = threading.Event()
+
+    def sample_rss():
+        while not sampling.wait(0.5):
+            peak_rss[0] = max(peak_rss[0], usage(pid)[1])
+
+    start_cpu = usage(pid)[0] if pid else 0.0
+    sampler = None
+    if pid:
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+
+    start_time = time.time()
+    threads = [threading.Thread(target=run_session, args=(api_url, i + 1, flows, records[i]))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.time() - start_time
+
+    cpu_percent = None
+    if pid:
+        sampling.set()
+        sampler.join()
+        end_cpu, rss = usage(pid)
+        peak_rss[0] = max(peak_rss[0], rss)
+        cpu_percent = 100.0 * (end_cpu - start_cpu) / wall
+
+    latencies = [latency for record in records for latency in record["latencies"]]
+    completed = [record for record in records if not record["error"]]
+    durations = {kind: [r["durations"][kind] for r in completed if kind in r["durations"]] for kind in flows}
+    return {
+        "sessions": sessions,
+        "completed": len(completed),
+        "failed": sessions - len(completed),
+        "errors": sorted({record["error"] for record in records if record["error"]}),
+        "seconds": wall,
+        "sessions_per_min": 60.0 * len(completed) / wall if wall > 0 else 0.0,
+        "tokens_per_sec": sum(record["tokens"] for record in completed) / wall if wall > 0 else 0.0,
+        "update_latency_p50": percentile(latencies, 50),
+        "update_latency_p95": percentile(latencies, 95),
+        "job_seconds_p50": {kind: percentile(values, 50) for kind, values in durations.items()},
+        "cpu_percent": cpu_percent,
+        "peak_rss_mb": peak_rss[0] / (1024 * 1024) if pid else None
+    }
+
+def saturation_point(levels):
+    """First level whose throughput grew less than SATURATION_GAIN over the previous one (or None)"""
+    for previous, level in zip(levels, levels[1:]):
+        if level["sessions_per_min"] < previous["sessions_per_min"] * SATURATION_GAIN:
+            return previous["sessions"]
+    return None
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_api_server(mock_url, workdir, max_jobs=None):
+    """
+    Start job_api.py in a subprocess, wired to the mock endpoints
+
+    Returns:
+        tuple: (Popen, base URL)
+    """
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "ANTHROPIC_BASE_URL": mock_url,
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "ANTHROPIC_API_KEY": "mock-anthropic-key",
+        "OPENAI_API_KEY": "mock-openai-key",
+        "NOVELLA_WORKSPACE_ROOT": os.path.join(workdir, "workspaces"),
+        "NOVELLA_CACHE_DIR": os.path.join(workdir, "cache")
+    })
+    if max_jobs:
+        env["NOVELLA_MAX_JOBS"] = str(max_jobs)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_api.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port)], cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    api_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{api_url}/jobs", timeout=1).close()
+            return process, api_url
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Job API server did not start")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the NovellaGPT job API with simulated concurrent users")
+    parser.add_argument("--sessions", type=str, default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--flows", type=str, default="generate,export,audio", help="Flows per user: generate,export,audio")
+    parser.add_argument("--api-url", type=str, default=None, help="Test a running job API instead of starting one")
+    parser.add_argument("--pid", type=int, default=None, help="Server pid to sample with --api-url")
+    parser.add_argument("--max-jobs", type=int, default=None, help="NOVELLA_MAX_JOBS for the started server")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock time to first token (seconds)")
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0, help="Mock streaming rate per generation")
+    parser.add_argument("--output-tokens", type=int, default=3000, help="Mock text tokens per generation")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Mock seconds per TTS request")
+    parser.add_argument("--fixtures", type=str, default=None, help="Replay recorded fixtures (see stream_fixtures.py) instead of synthetic streams")
+    parser.add_argument("--speed", type=float, default=1.0, help="Fixture playback speed (0 = no delays)")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this JSON file")
+
+    args = parser.parse_args()
+
+    flows = [flow.strip() for flow in args.flows.split(",") if flow.strip()]
+    levels_to_run = [int(n) for n in args.sessions.split(",")]
+
+    mock = None
+    process = None
+    workdir = None
+    api_url = args.api_url
+    pid = args.pid
+    if api_url is None:
+        settings = MockSettings(latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                                output_tokens=args.output_tokens, tts_latency=args.tts_latency)
+        if args.fixtures:
+            from stream_fixtures import replay_server
+            mock = replay_server(args.fixtures, args.speed).start()
+        else:
+            mock = MockApiServer(settings=settings).start()
+        workdir = tempfile.mkdtemp(prefix="novella_load_")
+        process, api_url = start_api_server(mock.base_url, workdir, args.max_jobs)
+        pid = process.pid
+        print(f"Job API at {api_url} (pid {pid}), mock API at {mock.base_url}, workdir {workdir}")
+
+    levels = []
+    try:
+        print(f"{'users':>5} {'ok':>4} {'fail':>4} {'users/min':>9} {'tok/s':>8} {'p50 ms':>7} {'p95 ms':>7} "
+              f"{'CPU %':>6} {'RSS MB':>7}")
+        for sessions in levels_to_run:
+            level = run_level(api_url, sessions, flows, pid)
+            levels.append(level)
+            p50 = level["update_latency_p50"]
+            p95 = level["update_latency_p95"]
+            print(f"{sessions:5d} {level['completed']:4d} {level['failed']:4d} {level['sessions_per_min']:9.2f} "
+                  f"{level['tokens_per_sec']:8.0f} "
+                  f"{p50 * 1000 if p50 is not None else float('nan'):7.1f} "
+                  f"{p95 * 1000 if p95 is not None else float('nan'):7.1f} "
+                  f"{level['cpu_percent'] if level['cpu_percent'] is not None else float('nan'):6.1f} "
+                  f"{level['peak_rss_mb'] if level['peak_rss_mb'] is not None else float('nan'):7.1f}")
+            for error in level["errors"]:
+                print(f"      error: {error}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        if mock:
+            mock.shutdown()
+
+    saturated = saturation_point(levels)
+    if saturated:
+        print(f"Throughput saturates at about {saturated} concurrent users")
+    else:
+        print("Throughput did not saturate at the tested levels")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({"flows": flows, "levels": levels, "saturation_sessions": saturated}, file, indent=2)
+        print(f"Results written to {args.json}")
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+
+DEFAULT_METRICS_DB = "novella_metrics.db"
+
+# Run fields stored as columns; anything else a caller passes is kept in "extra"
+RUN_FIELDS = ("ttft_seconds", "thinking_seconds", "generation_seconds", "output_tokens",
+              "words", "tokens_per_sec", "total_seconds")
+
+class MetricsStore:
+    """
+    Local history of generation, export and audio runs in a SQLite database.
+
+    One row per run (time to first token, thinking time, output tokens/s...),
+    plus its export stage timings and TTS request latencies, for the
+    performance dashboard and the ETA model.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Open (and create if needed) the metrics database
+
+        Args:
+            db_path (str, optional): SQLite file (NOVELLA_METRICS_DB, default novella_metrics.db)
+        """
+        self.db_path = db_path or os.environ.get("NOVELLA_METRICS_DB", DEFAULT_METRICS_DB)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                title TEXT,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                ttft_seconds REAL,
+                thinking_seconds REAL,
+                generation_seconds REAL,
+                output_tokens INTEGER,
+                words INTEGER,
+                tokens_per_sec REAL,
+                total_seconds REAL,
+                extra TEXT
+            )""")
+            db.execute("CREATE TABLE IF NOT EXISTS stage_timings (run_id TEXT NOT NULL, stage TEXT NOT NULL, seconds REAL NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS tts_segments (run_id TEXT NOT NULL, seconds REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at)")
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def record_run(self, kind, title=None, status="completed", started_at=None,
+                   stage_timings=None, tts_latencies=None, **fields):
+        """
+        Store one run
+
+        Args:
+            kind (str): "generate", "export" or "audio"
+            title (str, optional): Novella title
+            status (str, optional): "completed", "failed" or "interrupted"
+            started_at (float, optional): Start time (default: now)
+            stage_timings (dict, optional): Export stage -> seconds (as returned by export_all)
+            tts_latencies (list, optional): Seconds per TTS request
+            **fields: RUN_FIELDS values; other keys are kept as extra JSON
+
+        Returns:
+            str: The run id
+        """
+        run_id = uuid.uuid4().hex[:12]
+        columns = {name: fields.pop(name, None) for name in RUN_FIELDS}
+        with self._connect() as db:
+            db.execute(
+                f"INSERT INTO runs (id, kind, title, status, started_at, {', '.join(RUN_FIELDS)}, extra) "
+                f"VALUES (?, ?, ?, ?, ?, {', '.join('?' for _ in RUN_FIELDS)}, ?)",
+                (run_id, kind, title, status, started_at or time.time(), *columns.values(),
+                 json.dumps(fields) if fields else None)
+            )
+            db.executemany("INSERT INTO stage_timings (run_id, stage, seconds) VALUES (?, ?, ?)",
+                           [(run_id, stage, seconds) for stage, seconds in (stage_timings or {}).items()])
+            db.executemany("INSERT INTO tts_segments (run_id, seconds) VALUES (?, ?)",
+                           [(run_id, seconds) for seconds in (tts_latencies or [])])
+        return run_id
+
+    def runs(self, kind=None, limit=500):
+        """
+        Recent runs, oldest first, with their stage timings
+
+        Args:
+            kind (str, optional): Only runs of this kind
+            limit (int, optional): Maximum number of runs
+
+        Returns:
+            list: Run dicts (RUN_FIELDS, id, kind, title, status, started_at, stages, extra)
+        """
+        with self._connect() as db:
+            if kind:
+                rows = db.execute("SELECT * FROM runs WHERE kind = ? ORDER BY started_at DESC LIMIT ?",
+                                  (kind, limit)).fetchall()
+            else:
+                rows = db.execute("SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (limit,)).fetchall()
+            runs = [dict(row) for row in reversed(rows)]
+            stages = {}
+            for row in db.execute("SELECT run_id, stage, seconds FROM stage_timings WHERE run_id IN "
+                                  f"({', '.join('?' for _ in runs)})", [run["id"] for run in runs]):
+                stages.setdefault(row["run_id"], {})[row["stage"]] = row["seconds"]
+        for run in runs:
+            run["stages"] = stages.get(run["id"], {})
+            run["extra"] = json.loads(run["extra"]) if run["extra"] else {}
+        return runs
+
+    def tts_latencies(self, since=None):
+        """
+        TTS request latencies
+
+        Args:
+            since (float, optional): Only runs started after this time
+
+        Returns:
+            list: Seconds per request
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT t.seconds FROM tts_segments t JOIN runs r ON r.id = t.run_id "
+                              "WHERE r.started_at >= ?", (since or 0,)).fetchall()
+        return [row[0] for row in rows]
+
+    def fit_eta(self, min_runs=3):
+        """
+        Fit generation time against output tokens over completed generations
+
+        A least-squares line: seconds = overhead + seconds_per_token * tokens,
+        where the overhead is mostly time to first token and thinking.
+
+        Returns:
+            dict: overhead, seconds_per_token and runs, or None with too few runs
+        """
+        points = [(run["output_tokens"], run["generation_seconds"]) for run in self.runs("generate")
+                  if run["status"] == "completed" and run["output_tokens"] and run["generation_seconds"]]
+        if len(points) < min_runs:
+            return None
+        n = len(points)
+        mean_x = sum(x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+        if var_x == 0:
+            # All runs the same length: fall back to the mean rate
+            slope, overhead = mean_y / mean_x, 0.0
+        else:
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+            overhead = mean_y - slope * mean_x
+        return {"overhead": overhead, "seconds_per_token": slope, "runs": n}
+
+def estimate_seconds(model, tokens):
+    """Predicted generation time for an output size from a fit_eta model"""
+    return model["overhead"] + model["seconds_per_token"] * tokens
+
+def record_run(kind, title=None, **kwargs):
+    """
+    Record a run in the default store without ever failing the caller
+
+    Returns:
+        str: The run id, or None if it could not be recorded
+    """
+    try:
+        return MetricsStore().record_run(kind, title, **kwargs)
+    except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+        print(f"Could not record run metrics: {e}")
+        return None
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Anthropic Messages API (streaming) and the OpenAI TTS API.
+
+Point the SDKs at it with ANTHROPIC_BASE_URL / OPENAI_BASE_URL to run generation,
+export and narration without keys or network access, at a chosen speed.
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, ~26 ms); a zeroed
+# body decodes as silence, so repeated frames make a valid MP3 of any length
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+WORDS = ("the", "night", "river", "lantern", "whispered", "she", "ran", "toward", "a", "door",
+         "of", "iron", "and", "memory", "while", "storm", "gathered", "over", "old", "city",
+         "he", "remembered", "promise", "under", "silver", "sky", "quietly", "broken", "map", "home")
+
+class MockSettings:
+    """Speed and size of the mock responses"""
+
+    def __init__(self, latency=0.5, tokens_per_sec=200.0, output_tokens=3000, thinking_tokens=300,
+                 chapter_tokens=600, tokens_per_delta=5, tts_latency=0.3, tts_seconds=2.0, loop_after=None):
+        """
+        Args:
+            latency (float): Seconds before the first streamed event (time to first token)
+            tokens_per_sec (float): Streaming rate of thinking and text tokens (0 for no delay)
+            output_tokens (int): Text tokens per generation
+            thinking_tokens (int): Thinking tokens streamed before the text
+            chapter_tokens (int): Tokens between chapter headings
+            tokens_per_delta (int): Tokens per content_block_delta event
+            tts_latency (float): Seconds per TTS request
+            tts_seconds (float): Length of the returned silent MP3
+            loop_after (int, optional): Text tokens after which the text falls into a loop,
+                repeating its last two paragraphs until output_tokens
+        """
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.thinking_tokens = thinking_tokens
+        self.chapter_tokens = chapter_tokens
+        self.tokens_per_delta = tokens_per_delta
+        self.tts_latency = tts_latency
+        self.tts_seconds = tts_seconds
+        self.loop_after = loop_after
+
+def synthetic_text(tokens, chapter_tokens, seed, loop_after=None):
+    """Chunks of markdown novella text, one word per token, with a heading every chapter_tokens"""
+    rng = random.Random(seed)
+    chunks = []
+    chapter = 0
+    loop = None
+    for i in range(tokens):
+        if loop_after is not None and i >= loop_after:
+            # A degenerate generation: the last two paragraphs over and over
+            if loop is None:
+                ends = [n for n, chunk in enumerate(chunks) if chunk.endswith(".\n\n")]
+                loop = chunks[ends[-3] + 1:ends[-1] + 1] if len(ends) >= 3 else list(chunks)
+            chunks.append(loop[(i - loop_after) % len(loop)])
+            continue
+        if i % chapter_tokens == 0:
+            chapter += 1
+            chunks.append(("\n\n" if i else "") + f"# Chapter {chapter}\n\n")
+        word = rng.choice(WORDS)
+        chunks.append(word + (".\n\n" if i % 97 == 96 else " "))
+    return chunks
+
+def synthetic_events(settings, seed=0, thinking=True):
+    """
+    Messages API stream events for one synthetic generation
+
+    Args:
+        thinking (bool, optional): Stream a thinking block first (the request enabled thinking)
+
+    Yields:
+        tuple: (seconds to wait before sending, event name, data dict)
+    """
+    delay = settings.tokens_per_delta / settings.tokens_per_sec if settings.tokens_per_sec else 0.0
+    yield settings.latency, "message_start", {
+        "type": "message_start",
+        "message": {"id": f"msg_mock_{seed}", "type": "message", "role": "assistant", "model": "mock",
+                    "content": [], "stop_reason": None, "stop_sequence": None,
+                    "usage": {"input_tokens": 100, "output_tokens": 1}}
+    }
+
+    index = 0
+    if settings.thinking_tokens and thinking:
+        yield 0.0, "content_block_start", {"type": "content_block_start", "index": index,
+                                           "content_block": {"type": "thinking", "thinking": "", "signature": ""}}
+        words = synthetic_text(settings.thinking_tokens, settings.thinking_tokens + 1, seed + 1)[1:]
+        for start in range(0, len(words), settings.tokens_per_delta):
+            yield delay, "content_block_delta", {"type": "content_block_delta", "index": index,
+                                                 "delta": {"type": "thinking_delta",
+                                                           "thinking": "".join(words[start:start + settings.tokens_per_delta])}}
+        yield 0.0, "content_block_delta", {"type": "content_block_delta", "index": index,
+                                           "delta": {"type": "signature_delta", "signature": "mock-signature"}}
+        yield 0.0, "content_block_stop", {"type": "content_block_stop", "index": index}
+        index += 1
+
+    yield 0.0, "content_block_start", {"type": "content_block_start", "index": index,
+                                       "content_block": {"type": "text", "text": ""}}
+    chunks = synthetic_text(settings.output_tokens, settings.chapter_tokens, seed, settings.loop_after)
+    for start in range(0, len(chunks), settings.tokens_per_delta):
+        yield delay, "content_block_delta", {"type": "content_block_delta", "index": index,
+                                             "delta": {"type": "text_delta",
+                                                       "text": "".join(chunks[start:start + settings.tokens_per_delta])}}
+    yield 0.0, "content_block_stop", {"type": "content_block_stop", "index": index}
+    yield 0.0, "message_delta", {"type": "message_delta",
+                                 "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                 "usage": {"output_tokens": settings.output_tokens +
+                                           (settings.thinking_tokens if thinking else 0)}}
+    yield 0.0, "message_stop", {"type": "message_stop"}
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    """Serves POST /v1/messages (SSE) and POST /v1/audio/speech (MP3)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            request = {}
+        path = self.path.split("?", 1)[0]
+        if path.endswith("/messages"):
+            self._stream_messages(request)
+        elif path.endswith("/audio/speech"):
+            self._speech(request)
+        else:
+            body = json.dumps({"error": {"type": "not_found_error", "message": f"No mock for {path}"}}).encode('utf-8')
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def _stream_messages(self, request):
+        server = self.server
+        with server.lock:
+            server.requests["messages"] += 1
+            seed = server.requests["messages"]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            for delay, event, data in server.events(seed, request):
+                if delay:
+                    time.sleep(delay)
+                self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped the generation
+            return
+
+    def _speech(self, request):
+        with self.server.lock:
+            self.server.requests["speech"] += 1
+            number = self.server.requests["speech"]
+        delay, body = self.server.speech(number, request)
+        if delay:
+            time.sleep(delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def synthetic_speech(settings):
+    """TTS responder returning a silent MP3 of settings.tts_seconds after settings.tts_latency"""
+    body = SILENT_MP3_FRAME * max(1, int(settings.tts_seconds / 0.026))
+    return lambda number, request: (settings.tts_latency, body)
+
+class MockApiServer(ThreadingHTTPServer):
+    """
+    Threaded mock server.
+
+    events(seed) produces the stream for each /v1/messages request and
+    speech(number, request) returns (delay, MP3 bytes) for each TTS request;
+    both are synthetic by default and can be replaced, e.g. by recorded fixtures.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, settings=None, events=None, speech=None):
+        """
+        Args:
+            host (str, optional): Interface to bind
+            port (int, optional): Port (0 picks a free one)
+            settings (MockSettings, optional): Response speed and size
+            events (callable, optional): (seed, request) -> iterable of (delay, event, data); synthetic by default
+            speech (callable, optional): (request number, request) -> (delay, MP3 bytes); synthetic by default
+        """
+        super().__init__((host, port), MockApiHandler)
+        self.settings = settings or MockSettings()
+        self.events = events or (lambda seed, request: synthetic_events(self.settings, seed, "thinking" in request))
+        self.speech = speech or synthetic_speech(self.settings)
+        self.requests = {"messages": 0, "speech": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock Anthropic and OpenAI endpoints for offline runs")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to first streamed event")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0, help="Streaming rate (0 = as fast as possible)")
+    parser.add_argument("--output-tokens", type=int, default=3000, help="Text tokens per generation")
+    parser.add_argument("--thinking-tokens", type=int, default=300, help="Thinking tokens per generation")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Seconds per TTS request")
+    parser.add_argument("--loop-after", type=int, default=None, help="Text tokens after which the text starts looping")
+
+    args = parser.parse_args()
+
+    settings = MockSettings(latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                            output_tokens=args.output_tokens, thinking_tokens=args.thinking_tokens,
+                            tts_latency=args.tts_latency, loop_after=args.loop_after)
+    server = MockApiServer(args.host, args.port, settings)
+    print(f"Mock API listening on {server.base_url}")
+    print(f"  export ANTHROPIC_BASE_URL={server.base_url} OPENAI_BASE_URL={server.base_url}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -2,9 +2,9 @@ import streamlit as st
 import os
 import time
 import tempfile
-from token_counter import token_counter, estimate_words, estimate_completion
-from storygen2 import generate_novella, convert_to_pdf, convert_to_epub
+import threading
 from audio_gen import AudiobookGenerator
+from job_manager import get_job_manager, run_generation_job, run_export_job, run_audio_job
 
 # Page config
 st.set_page_config(
@@ -37,19 +37,79 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """
+    Load the API SDKs, pooled clients and tokenizer in a background thread, once per server
+    
+    The page renders without waiting for them; the first generation finds them ready.
+    """
+    def warm_up():
+        from api_clients import warm_up as warm_up_clients
+        from token_counter import warm_up as warm_up_tokenizer
+        warm_up_clients()
+        warm_up_tokenizer()
+    
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+# Newer Streamlit versions accept a callable for st.download_button data and only
+# run it when the button is clicked; detect that once at startup
+try:
+    from streamlit.proto.DownloadButton_pb2 import DownloadButton as _DownloadButtonProto
+    DEFERRED_DOWNLOADS = "deferred_file_id" in _DownloadButtonProto.DESCRIPTOR.fields_by_name
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _read_artifact(path, mtime, size):
+    """Read an artifact file once per (path, mtime, size), shared across sessions"""
+    with open(path, "rb") as artifact_file:
+        return artifact_file.read()
+
+def _load_artifact(path):
+    stat = os.stat(path)
+    return _read_artifact(path, stat.st_mtime, stat.st_size)
+
+def artifact_data(path):
+    """
+    Download payload for an artifact file that avoids I/O on idle reruns
+    
+    Returns a callable that reads the file only when the button is clicked if
+    Streamlit supports deferred downloads, otherwise the bytes memoized by
+    (path, mtime, size) in a bounded cache.
+    """
+    if DEFERRED_DOWNLOADS:
+        return lambda: _load_artifact(path)
+    return _load_artifact(path)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def open_novella(path, mtime, size):
+    """Chapter-paginated view of a novella, shared by every session reading it (maps the file per read, holds nothing open)"""
+    from chapter_index import MappedNovella
+    return MappedNovella(path)
+
+def turn_page(step, page_count):
+    """Move the chapter reader by step pages, staying within the book"""
+    page = st.session_state.get("reader_page", 0) + step
+    st.session_state.reader_page = max(0, min(page_count - 1, page))
+
 # Header
 st.markdown('<h1 class="main-header">NovellaGPT</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subheader">Generate professional novellas powered by Claude 3.7</p>', unsafe_allow_html=True)
 
+# Process-wide job manager: jobs keep running across reruns, page reloads and sessions
+jobs = get_job_manager()
+
+# Only the status panels re-run at this interval while a job is active, not the whole page
+PROGRESS_REFRESH_SECONDS = 3
+
 # Initialize session state for generated content
-if 'novella_content' not in st.session_state:
-    st.session_state.novella_content = None
 if 'novella_title' not in st.session_state:
     st.session_state.novella_title = None
 if 'generation_complete' not in st.session_state:
     st.session_state.generation_complete = False
-if 'progress' not in st.session_state:
-    st.session_state.progress = 0
 if 'word_count' not in st.session_state:
     st.session_state.word_count = 0
 if 'audiobook_progress' not in st.session_state:
@@ -60,26 +120,59 @@ if 'audiobook_path' not in st.session_state:
     st.session_state.audiobook_path = None
 if 'audio_segments' not in st.session_state:
     st.session_state.audio_segments = []
+if 'txt_path' not in st.session_state:
+    st.session_state.txt_path = None
+if 'pdf_path' not in st.session_state:
+    st.session_state.pdf_path = None
 if 'epub_path' not in st.session_state:
     st.session_state.epub_path = None
+
+# Job ids live in the URL too, so a browser reload reattaches to running jobs
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
+if 'audio_job_id' not in st.session_state:
+    st.session_state.audio_job_id = st.query_params.get("audio_job")
+if 'export_job_id' not in st.session_state:
+    st.session_state.export_job_id = None
+
+def sync_jobs():
+    """Copy finished job results into session state and return the live job snapshots"""
+    gen_job = jobs.get(st.session_state.job_id) if st.session_state.job_id else None
+    audio_job = jobs.get(st.session_state.audio_job_id) if st.session_state.audio_job_id else None
+    export_job = jobs.get(st.session_state.export_job_id) if st.session_state.export_job_id else None
     
-# Initialize generation progress tracking state
-if 'gen_progress' not in st.session_state:
-    st.session_state.gen_progress = 0
-if 'gen_tokens' not in st.session_state:
-    st.session_state.gen_tokens = 0
-if 'gen_words' not in st.session_state:
-    st.session_state.gen_words = 0
-if 'gen_tokens_per_sec' not in st.session_state:
-    st.session_state.gen_tokens_per_sec = 0
-if 'gen_elapsed_min' not in st.session_state:
-    st.session_state.gen_elapsed_min = 0
-if 'gen_elapsed_sec' not in st.session_state:
-    st.session_state.gen_elapsed_sec = 0
-if 'gen_completed' not in st.session_state:
-    st.session_state.gen_completed = False
-if 'gen_update_time' not in st.session_state:
-    st.session_state.gen_update_time = time.time()
+    if gen_job and gen_job["status"] == "completed" and not st.session_state.generation_complete:
+        artifacts = gen_job["artifacts"]
+        st.session_state.novella_title = gen_job["title"]
+        st.session_state.txt_path = artifacts.get("txt")
+        st.session_state.pdf_path = artifacts.get("pdf")
+        st.session_state.epub_path = artifacts.get("epub")
+        st.session_state.word_count = gen_job["metrics"].get("words", 0)
+        if artifacts.get("audiobook"):
+            st.session_state.audiobook_path = artifacts["audiobook"]
+            st.session_state.audio_segments = artifacts.get("audio_segments", [])
+            st.session_state.audiobook_complete = True
+            st.session_state.audiobook_progress = 100
+        st.session_state.generation_complete = True
+    
+    if audio_job:
+        if audio_job["status"] == "completed" and not st.session_state.audiobook_complete:
+            st.session_state.audiobook_path = audio_job["artifacts"].get("audiobook")
+            st.session_state.audio_segments = audio_job["artifacts"].get("audio_segments", [])
+            st.session_state.audiobook_complete = True
+            st.session_state.audiobook_progress = 100
+        elif audio_job["status"] in ("queued", "running"):
+            st.session_state.audiobook_progress = max(1, audio_job["progress"] * 100)
+    
+    if export_job and export_job["status"] == "completed" and export_job["artifacts"].get("epub"):
+        st.session_state.epub_path = export_job["artifacts"]["epub"]
+    
+    return gen_job, audio_job, export_job
+
+def is_active(job):
+    return bool(job) and job["status"] in ("queued", "running")
+
+gen_job, audio_job, export_job = sync_jobs()
 
 # Sidebar for API key
 with st.sidebar:
@@ -159,45 +252,73 @@ with col1:
     
     generate_button = st.button("Generate Novella")
 
+def render_generation_status():
+    """Generation Status panel body; while a job runs it is re-executed on its own as a fragment"""
+    job = jobs.get(st.session_state.job_id) if st.session_state.job_id else None
+    if is_active(gen_job) and not is_active(job):
+        # The job just finished: rerun the whole page once to show the results
+        st.rerun()
+    
+    status_container = st.empty()
+    progress_bar = st.empty()
+    word_count_container = st.empty()
+    
+    if is_active(job):
+        metrics = job["metrics"]
+        tokens_display = f"{metrics.get('tokens', 0):,}"
+        words_display = f"{metrics.get('words', 0):,}"
+        
+        # Update UI with the job's in-memory progress snapshot
+        progress_bar.progress(job["progress"])
+        
+        # Update word counter with both tokens and estimated words
+        word_count_container.metric(
+            "Generation Progress", 
+            f"{words_display} words", 
+            f"{tokens_display} tokens"
+        )
+        
+        # Display status with time and rate
+        elapsed_min = int(job["elapsed"] // 60)
+        elapsed_sec = int(job["elapsed"] % 60)
+        tokens_per_sec = metrics.get("tokens_per_sec", 0)
+        
+        status_container.info(
+            f"{job['message']}: {elapsed_min}m {elapsed_sec}s elapsed" + 
+            f" | ~{tokens_per_sec:.0f} tokens/sec" +
+            f" | {job['progress']:.1%} complete"
+        )
+        
+        # Add a note about auto-refreshing
+        st.caption("Progress updates automatically every few seconds. You can reload the page without losing it.")
+    elif job and job["status"] == "failed":
+        status_container.error(f"Generation failed: {job['error']}")
+    else:
+        status_container.info("Ready to generate. Fill in the form and click 'Generate Novella'.")
+
+def render_audio_progress():
+    """Audiobook progress for the download column, re-executed on its own as a fragment"""
+    job = jobs.get(st.session_state.audio_job_id) if st.session_state.audio_job_id else None
+    if not is_active(job):
+        st.rerun()
+    st.progress(job["progress"])
+    st.text(f"Generating audiobook: {job['progress'] * 100:.0f}%")
+
+def render_export_progress():
+    """EPUB export progress for the download column, re-executed on its own as a fragment"""
+    job = jobs.get(st.session_state.export_job_id) if st.session_state.export_job_id else None
+    if not is_active(job):
+        st.rerun()
+    st.text("Generating EPUB...")
+
+def polling_fragment(func, active):
+    """Wrap a panel so it alone re-runs every PROGRESS_REFRESH_SECONDS while its job is active"""
+    return st.fragment(run_every=PROGRESS_REFRESH_SECONDS if active else None)(func)
+
 with col2:
     st.subheader("Generation Status")
     if not st.session_state.generation_complete:
-        status_container = st.empty()
-        progress_bar = st.empty()
-        word_count_container = st.empty()
-        
-        # Check if generation is actively running by looking at session state values
-        if 'gen_progress' in st.session_state and st.session_state.gen_progress > 0:
-            # Format tokens with commas
-            tokens_display = f"{st.session_state.gen_tokens:,}" if hasattr(st.session_state, 'gen_tokens') else "0"
-            words_display = f"{st.session_state.gen_words:,}" if hasattr(st.session_state, 'gen_words') else "0"
-            
-            # Update UI with session state values
-            progress_bar.progress(st.session_state.gen_progress)
-            
-            # Update word counter with both tokens and estimated words
-            word_count_container.metric(
-                "Generation Progress", 
-                f"{words_display} words", 
-                f"{tokens_display} tokens"
-            )
-            
-            # Display status with time and rate
-            elapsed_min = st.session_state.gen_elapsed_min
-            elapsed_sec = st.session_state.gen_elapsed_sec
-            tokens_per_sec = st.session_state.gen_tokens_per_sec
-            completion = st.session_state.gen_progress
-            
-            status_container.info(
-                f"Generating: {elapsed_min}m {elapsed_sec}s elapsed" + 
-                f" | ~{tokens_per_sec:.0f} tokens/sec" +
-                f" | {completion:.1%} complete"
-            )
-            
-            # Add a note about auto-refreshing
-            st.caption("Progress updates automatically every few seconds...")
-        else:
-            status_container.info("Ready to generate. Fill in the form and click 'Generate Novella'.")
+        polling_fragment(render_generation_status, is_active(gen_job))()
     else:
         st.success(f"Generation complete! Generated '{st.session_state.novella_title}'")
         st.metric("Word Count", st.session_state.word_count)
@@ -206,13 +327,12 @@ with col2:
         download_container = st.container()
         
         with download_container:
-            # Clean title for filenames
-            clean_title = st.session_state.novella_title.replace(" ", "_")
-            txt_filename = f"{clean_title}.txt"
-            pdf_filename = f"{clean_title}.pdf"
-            epub_filename = f"{clean_title}.epub"
+            # Artifact paths recorded by the generation job
+            txt_filename = st.session_state.txt_path
+            pdf_filename = st.session_state.pdf_path
+            epub_filename = st.session_state.epub_path
+            clean_title = os.path.splitext(os.path.basename(txt_filename))[0]
             audiobook_filename = f"{clean_title}_audiobook.mp3"
-            audiobook_path = os.path.join("audio_files", audiobook_filename)
             
             # Create columns for download buttons
             col_txt, col_pdf, col_epub, col_audio = st.columns(4)
@@ -221,22 +341,19 @@ with col2:
             with col_txt:
                 st.download_button(
                     label="📄 Download TXT",
-                    data=st.session_state.novella_content,
-                    file_name=txt_filename,
+                    data=artifact_data(txt_filename),
+                    file_name=os.path.basename(txt_filename),
                     mime="text/plain",
                     use_container_width=True
                 )
             
             # PDF download button
             with col_pdf:
-                if os.path.exists(pdf_filename):
-                    with open(pdf_filename, "rb") as pdf_file:
-                        pdf_data = pdf_file.read()
-                    
+                if pdf_filename and os.path.exists(pdf_filename):
                     st.download_button(
                         label="📚 Download PDF",
-                        data=pdf_data,
-                        file_name=pdf_filename,
+                        data=artifact_data(pdf_filename),
+                        file_name=os.path.basename(pdf_filename),
                         mime="application/pdf",
                         use_container_width=True
                     )
@@ -246,57 +363,61 @@ with col2:
             # EPUB download button
             with col_epub:
                 # Check if EPUB exists or generate it on demand
-                if os.path.exists(epub_filename):
-                    with open(epub_filename, "rb") as epub_file:
-                        epub_data = epub_file.read()
-                    
+                if epub_filename and os.path.exists(epub_filename):
                     st.download_button(
                         label="📱 Download EPUB",
-                        data=epub_data,
-                        file_name=epub_filename,
+                        data=artifact_data(epub_filename),
+                        file_name=os.path.basename(epub_filename),
                         mime="application/epub+zip",
                         use_container_width=True
                     )
+                elif is_active(export_job):
+                    polling_fragment(render_export_progress, True)()
                 else:
-                    # Button to generate EPUB
+                    if export_job and export_job["status"] == "failed":
+                        st.error(f"Error generating EPUB: {export_job['error']}")
+                    # Button to generate EPUB in the background
                     if st.button("📱 Generate EPUB", use_container_width=True):
-                        try:
-                            with st.spinner("Generating EPUB..."):
-                                epub_file = convert_to_epub(txt_filename, st.session_state.novella_title)
-                                st.success(f"EPUB created: {epub_file}")
-                                st.rerun()
-                        except Exception as e:
-                            st.error(f"Error generating EPUB: {e}")
+                        st.session_state.export_job_id = jobs.submit(
+                            "export", run_export_job, txt_filename, st.session_state.novella_title,
+                            pdf=False, epub=True, title=st.session_state.novella_title
+                        )
+                        st.rerun()
             
             # Audiobook download button
             with col_audio:
                 if st.session_state.audiobook_complete and st.session_state.audiobook_path:
-                    with open(st.session_state.audiobook_path, "rb") as audio_file:
-                        audio_data = audio_file.read()
-                    
                     st.download_button(
                         label="🎧 Download MP3",
-                        data=audio_data,
+                        data=artifact_data(st.session_state.audiobook_path),
                         file_name=audiobook_filename,
                         mime="audio/mpeg",
                         use_container_width=True
                     )
                 else:
-                    if st.session_state.audiobook_progress > 0 and st.session_state.audiobook_progress < 100:
+                    if is_active(audio_job):
                         # Show progress if audiobook is being generated
-                        audio_progress = st.progress(st.session_state.audiobook_progress / 100)
-                        st.text(f"Generating audiobook: {st.session_state.audiobook_progress:.0f}%")
-                    elif 'openai_api_key' in locals() and openai_api_key:
-                        # Button to generate audiobook
+                        polling_fragment(render_audio_progress, True)()
+                    elif openai_api_key:
+                        if audio_job and audio_job["status"] == "failed":
+                            st.error(f"Error generating audiobook: {audio_job['error']}")
+                        # Button to generate audiobook in the background
                         if st.button("🎧 Generate Audiobook", use_container_width=True):
-                            st.session_state.audiobook_progress = 1
+                            st.session_state.audio_job_id = jobs.submit(
+                                "audio", run_audio_job, txt_filename, st.session_state.novella_title,
+                                voice=selected_voice, openai_api_key=openai_api_key,
+                                title=st.session_state.novella_title
+                            )
+                            st.query_params["audio_job"] = st.session_state.audio_job_id
                             st.rerun()
                     else:
                         st.info("Add OpenAI API key to generate audiobook")
             
             # Display file paths
-            file_info = f"Files saved to:\n- TXT: {os.path.abspath(txt_filename)}\n- PDF: {os.path.abspath(pdf_filename)}"
-            if os.path.exists(epub_filename):
+            file_info = f"Files saved to:\n- TXT: {os.path.abspath(txt_filename)}"
+            if pdf_filename and os.path.exists(pdf_filename):
+                file_info += f"\n- PDF: {os.path.abspath(pdf_filename)}"
+            if epub_filename and os.path.exists(epub_filename):
                 file_info += f"\n- EPUB: {os.path.abspath(epub_filename)}"
             if st.session_state.audiobook_complete and st.session_state.audiobook_path:
                 file_info += f"\n- MP3: {os.path.abspath(st.session_state.audiobook_path)}"
@@ -305,15 +426,17 @@ with col2:
             # Display audio segments if available
             if st.session_state.audio_segments:
                 with st.expander("Chapter Audio Files"):
-                    for i, segment_path in enumerate(st.session_state.audio_segments):
-                        if os.path.exists(segment_path):
-                            segment_name = os.path.basename(segment_path)
-                            st.audio(segment_path, format="audio/mp3")
-                            st.caption(f"Chapter {i+1}")
+                    # Players read their files, so only build them on request
+                    if st.toggle("Load chapter players", key="load_chapter_players"):
+                        for i, segment_path in enumerate(st.session_state.audio_segments):
+                            if os.path.exists(segment_path):
+                                segment_name = os.path.basename(segment_path)
+                                st.audio(segment_path, format="audio/mp3")
+                                st.caption(f"Chapter {i+1}")
                     
                     st.caption("You can play individual chapters directly in the browser")
 
-# Handle generation process
+# Handle generation process: submit a background job and return immediately
 if generate_button:
     if not api_key:
         st.error("Please enter your Anthropic API key in the sidebar")
@@ -321,329 +444,77 @@ if generate_button:
         st.error("Please enter a prompt for your novella")
     elif not title:
         st.error("Please enter a title for your novella")
+    elif is_active(gen_job):
+        st.warning("A novella is already being generated in this session")
     else:
-        try:
-            # Update UI to show generation is starting
-            with col2:
-                status_container = st.empty()
-                progress_bar = st.empty()
-                word_count_container = st.empty()
-                
-                status_container.info("Initializing generation...")
-                progress = progress_bar.progress(0)
-                word_count_container.metric("Words Generated", 0)
-            
-            # Call the actual generation function with real Claude API
-            status_container.info("Initializing Claude 3.7 for novella generation...")
-            
-            try:
-                # Set environment variable for API key
-                os.environ["ANTHROPIC_API_KEY"] = api_key
-                
-                # Prepare to capture streaming output
-                start_time = time.time()
-                
-                # Setup monitoring thread for the generation process
-                import threading
-                import time
-                
-                # Set up filename
-                clean_filename = "".join(c if c.isalnum() else "_" for c in title)
-                filename = f"{clean_filename}.txt"
-                
-                # Initialize session state for generation progress
-                if 'gen_progress' not in st.session_state:
-                    st.session_state.gen_progress = 0
-                if 'gen_tokens' not in st.session_state:
-                    st.session_state.gen_tokens = 0
-                if 'gen_words' not in st.session_state:
-                    st.session_state.gen_words = 0
-                if 'gen_tokens_per_sec' not in st.session_state:
-                    st.session_state.gen_tokens_per_sec = 0
-                if 'gen_elapsed_min' not in st.session_state:
-                    st.session_state.gen_elapsed_min = 0
-                if 'gen_elapsed_sec' not in st.session_state:
-                    st.session_state.gen_elapsed_sec = 0
-                if 'gen_completed' not in st.session_state:
-                    st.session_state.gen_completed = False
-                if 'gen_update_time' not in st.session_state:
-                    st.session_state.gen_update_time = time.time()
-                
-                # Create a monitoring function
-                def monitor_generation():
-                    """Monitor the generation process and update session state"""
-                    last_tokens = 0
-                    last_update_time = time.time()
-                    update_interval = 1.0  # Update session state every second
-                    
-                    print("Claude is generating your novella...")
-                    
-                    while True:
-                        # Check if file exists yet
-                        if not os.path.exists(filename):
-                            time.sleep(1)
-                            continue
-                            
-                        try:
-                            with open(filename, "r", encoding="utf-8") as file:
-                                current_content = file.read()
-                            
-                            # Get metrics
-                            tokens = token_counter(current_content)
-                            word_estimate = estimate_words(tokens)
-                            completion = estimate_completion(tokens, target_tokens=100000)
-                            
-                            # Calculate tokens per second
-                            current_time = time.time()
-                            time_diff = current_time - last_update_time
-                            
-                            if time_diff >= update_interval:
-                                # Update session state (thread-safe)
-                                tokens_per_sec = (tokens - last_tokens) / time_diff if time_diff > 0 else 0
-                                
-                                # Add time elapsed
-                                elapsed = current_time - start_time
-                                elapsed_min = int(elapsed // 60)
-                                elapsed_sec = int(elapsed % 60)
-                                
-                                # Update session state with progress data
-                                st.session_state.gen_progress = completion
-                                st.session_state.gen_tokens = tokens
-                                st.session_state.gen_words = word_estimate
-                                st.session_state.gen_tokens_per_sec = tokens_per_sec
-                                st.session_state.gen_elapsed_min = elapsed_min
-                                st.session_state.gen_elapsed_sec = elapsed_sec
-                                st.session_state.gen_update_time = time.time()
-                                
-                                # Print progress to console (useful for debugging)
-                                print(f"Generation progress: {word_estimate:,} words | {tokens:,} tokens | {completion:.1%} complete")
-                                
-                                # Reset for next update
-                                last_tokens = tokens
-                                last_update_time = current_time
-                            
-                            # Check for completion
-                            if "--- END OF NOVELLA ---" in current_content:
-                                # Final update to session state
-                                elapsed = time.time() - start_time
-                                elapsed_min = int(elapsed // 60)
-                                elapsed_sec = int(elapsed % 60)
-                                
-                                # Update final stats
-                                st.session_state.gen_progress = 1.0
-                                st.session_state.gen_elapsed_min = elapsed_min
-                                st.session_state.gen_elapsed_sec = elapsed_sec
-                                st.session_state.gen_completed = True
-                                
-                                print(f"Novella generated successfully in {elapsed_min}m {elapsed_sec}s")
-                                return
-                                
-                        except Exception as e:
-                            # Don't show errors when reading partial files
-                            pass
-                            
-                        time.sleep(0.5)  # Check again in half a second
-                
-                # Start the monitoring thread
-                monitor_thread = threading.Thread(target=monitor_generation)
-                monitor_thread.daemon = True  # Thread will exit when main program exits
-                monitor_thread.start()
-                
-                # Add auto-refresh mechanism to update UI based on session state
-                def auto_refresh():
-                    last_refresh_time = time.time()
-                    refresh_interval = 3.0  # Refresh UI every 3 seconds
-                    
-                    while not st.session_state.gen_completed:
-                        current_time = time.time()
-                        if current_time - last_refresh_time >= refresh_interval:
-                            # Trigger a rerun to update UI
-                            last_refresh_time = current_time
-                            try:
-                                time.sleep(0.1)  # Small delay to prevent race conditions
-                                st.rerun()
-                            except Exception as e:
-                                # If rerun fails, just continue
-                                print(f"Rerun failed: {e}")
-                        
-                        time.sleep(0.5)
-                
-                # Start auto-refresh thread
-                refresh_thread = threading.Thread(target=auto_refresh)
-                refresh_thread.daemon = True
-                refresh_thread.start()
-                
-                # Call generate_novella with streaming (this will block until complete)
-                content, final_title = generate_novella(prompt, title, system_prompt)
-                
-                # Wait for the thread to register completion
-                time.sleep(2)
-                
-                # Read the final file
-                if os.path.exists(filename):
-                    with open(filename, "r", encoding="utf-8") as file:
-                        full_content = file.read()
-                    
-                    # Final token count
-                    tokens = token_counter(full_content)
-                    word_estimate = estimate_words(tokens)
-                    
-                    # Update session state with the results
-                    st.session_state.novella_content = full_content
-                    st.session_state.novella_title = title
-                    st.session_state.generation_complete = True
-                    st.session_state.word_count = word_estimate
-                    
-                    # Update UI
-                    word_count_container.metric("Final Word Count", f"{word_estimate:,}", f"{tokens:,} tokens")
-                else:
-                    st.error("File not found after generation. Something went wrong.")
-            except Exception as e:
-                st.error(f"Error in Claude API generation: {str(e)}")
-                raise e
-            
-            # The text file is already created by generate_novella
-            # But we'll create the PDF here
-            clean_title = title.replace(" ", "_")
-            txt_filename = f"{clean_title}.txt"
-            pdf_filename = f"{clean_title}.pdf"
-            
-            # Generate PDF from the text file
-            try:
-                pdf_file = convert_to_pdf(txt_filename, title)
-                st.session_state.pdf_path = pdf_file
-                st.success(f"PDF created successfully: {pdf_file}")
-            except Exception as e:
-                st.warning(f"Could not generate PDF: {e}")
-                
-            # Generate EPUB from the text file (for Amazon KDP)
-            try:
-                epub_file = convert_to_epub(txt_filename, title)
-                st.session_state.epub_path = epub_file
-                st.success(f"EPUB created successfully: {epub_file}")
-            except Exception as e:
-                st.warning(f"Could not generate EPUB: {e}")
-            
-            # Check if we should generate audiobook immediately after novella generation
-            if 'generate_audio' in locals() and generate_audio and openai_api_key:
-                try:
-                    st.info("Generating audiobook from novella text...")
-                    
-                    # Set environment variable for OpenAI API key
-                    os.environ["OPENAI_API_KEY"] = openai_api_key
-                    
-                    # Audio generation
-                    def update_audio_progress(progress, current, total, final_path=None):
-                        """Callback to update audiobook generation progress"""
-                        st.session_state.audiobook_progress = progress
-                        if final_path:
-                            st.session_state.audiobook_path = final_path
-                            st.session_state.audiobook_complete = True
-                    
-                    # Start audiobook generation in a separate thread
-                    import threading
-                    
-                    def generate_audiobook_thread():
-                        try:
-                            generator = AudiobookGenerator(api_key=openai_api_key)
-                            audio_files, combined = generator.generate_chapter_by_chapter(
-                                txt_filename, 
-                                title, 
-                                voice=selected_voice,
-                                callback=update_audio_progress
-                            )
-                            
-                            # Update session state with results
-                            if audio_files:
-                                st.session_state.audio_segments = audio_files
-                            if combined:
-                                st.session_state.audiobook_path = combined
-                                st.session_state.audiobook_complete = True
-                            
-                            # Final update
-                            st.session_state.audiobook_progress = 100
-                        except Exception as e:
-                            print(f"Error in audiobook generation: {e}")
-                    
-                    # Start the audiobook generation in a background thread
-                    audio_thread = threading.Thread(target=generate_audiobook_thread)
-                    audio_thread.daemon = True
-                    audio_thread.start()
-                    
-                    # Initial progress indicator
-                    st.session_state.audiobook_progress = 1
-                except Exception as e:
-                    st.warning(f"Could not start audiobook generation: {e}")
-            
-            # Trigger a rerun to update the UI with download buttons
-            st.rerun()
-            
-        except Exception as e:
-            st.error(f"Error occurred during generation: {e}")
-
-# Handle standalone audiobook generation if user clicked generate button
-if st.session_state.audiobook_progress == 1 and not st.session_state.audiobook_complete:
-    try:
-        # Set environment variable for OpenAI API key
-        os.environ["OPENAI_API_KEY"] = openai_api_key
-        
-        # Status container
-        audio_status = st.empty()
-        audio_progress_bar = st.progress(0.01)
-        audio_status.info("Initializing audiobook generation...")
-        
-        # Clean title for filenames
-        clean_title = st.session_state.novella_title.replace(" ", "_")
-        txt_filename = f"{clean_title}.txt"
-        
-        # Audio generation callback
-        def update_audio_progress(progress, current, total, final_path=None):
-            """Callback to update audiobook generation progress"""
-            audio_progress_bar.progress(progress / 100)
-            audio_status.info(f"Generating audiobook: Segment {current}/{total} ({progress:.1f}%)")
-            
-            # Update session state
-            st.session_state.audiobook_progress = progress
-            if final_path:
-                st.session_state.audiobook_path = final_path
-                st.session_state.audiobook_complete = True
-                audio_status.success(f"Audiobook generated successfully!")
-        
-        # Create and start the generator
-        generator = AudiobookGenerator(api_key=openai_api_key)
-        audio_files, combined = generator.generate_chapter_by_chapter(
-            txt_filename, 
-            st.session_state.novella_title, 
+        # Keys are passed to the job explicitly rather than through os.environ,
+        # which is shared by every session in this process
+        st.session_state.job_id = jobs.submit(
+            "generate",
+            run_generation_job,
+            prompt,
+            title,
+            system_prompt=system_prompt or None,
+            api_key=api_key,
+            openai_api_key=openai_api_key or None,
+            generate_audio=generate_audio,
             voice=selected_voice,
-            callback=update_audio_progress
+            title=title
         )
+        st.query_params["job"] = st.session_state.job_id
         
-        # Update session state with results
-        if audio_files:
-            st.session_state.audio_segments = audio_files
-        if combined:
-            st.session_state.audiobook_path = combined
-            st.session_state.audiobook_complete = True
-        
-        # Final update and rerun to show download buttons
-        st.session_state.audiobook_progress = 100
-        st.rerun()
-        
-    except Exception as e:
-        st.error(f"Error generating audiobook: {e}")
-        # Reset progress on error
+        # Reset results from any previous novella in this session
+        st.session_state.generation_complete = False
+        st.session_state.audiobook_complete = False
+        st.session_state.audiobook_path = None
         st.session_state.audiobook_progress = 0
+        st.session_state.audio_segments = []
+        st.session_state.audio_job_id = None
+        st.session_state.export_job_id = None
+        if "audio_job" in st.query_params:
+            del st.query_params["audio_job"]
+        st.rerun()
 
-# Display preview if content exists
-if st.session_state.novella_content and st.session_state.generation_complete:
+# Chapter reader: sessions hold only the file path, pages are mapped from the file as they are read
+if st.session_state.generation_complete and st.session_state.txt_path and os.path.exists(st.session_state.txt_path):
     st.subheader("Preview")
-    with st.expander("Show novella preview", expanded=False):
-        preview_content = st.session_state.novella_content[:5000] + "..." \
-            if len(st.session_state.novella_content) > 5000 else st.session_state.novella_content
-        st.text_area("Content Preview", value=preview_content, height=400, disabled=True)
+    with st.expander("Read the novella", expanded=False):
+        txt_stat = os.stat(st.session_state.txt_path)
+        book = open_novella(st.session_state.txt_path, txt_stat.st_mtime, txt_stat.st_size)
+        page_count = len(book.pages)
+        
+        if page_count:
+            if st.session_state.get("reader_page", 0) >= page_count:
+                st.session_state.reader_page = 0
+            
+            col_prev, col_page, col_next = st.columns([1, 4, 1])
+            with col_prev:
+                st.button("◀ Previous", on_click=turn_page, args=(-1, page_count),
+                          disabled=st.session_state.get("reader_page", 0) == 0, use_container_width=True)
+            with col_page:
+                page = st.selectbox(
+                    "Chapter",
+                    options=range(page_count),
+                    format_func=lambda i: f"{i+1}. {book.pages[i]['title']}",
+                    key="reader_page",
+                    label_visibility="collapsed"
+                )
+            with col_next:
+                st.button("Next ▶", on_click=turn_page, args=(1, page_count),
+                          disabled=st.session_state.get("reader_page", 0) >= page_count - 1, use_container_width=True)
+            
+            st.text_area("Chapter Text", value=book.read(page), height=400, disabled=True)
+            st.caption(f"Chapter {page + 1} of {page_count}")
+        else:
+            st.info("The novella file is empty.")
         
     # Audio preview if available
     if st.session_state.audiobook_complete and st.session_state.audiobook_path:
         with st.expander("Listen to Audiobook Preview", expanded=False):
-            st.audio(st.session_state.audiobook_path, format="audio/mp3")
+            # The player reads the whole MP3, so only build it on request
+            if st.toggle("Load audiobook player", key="load_audiobook_player"):
+                st.audio(st.session_state.audiobook_path, format="audio/mp3")
             st.caption("Preview of the complete audiobook")
+
+# Started last, so the warm-up thread doesn't compete with rendering the first page
+start_warm_up()
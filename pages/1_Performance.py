@@ -0,0 +1,156 @@
+import time
+import statistics
+import pandas as pd
+import streamlit as st
+from metrics_store import MetricsStore, estimate_seconds
+from job_manager import TARGET_TOKENS
+
+# Page config
+st.set_page_config(
+    page_title="NovellaGPT Performance",
+    page_icon="📈",
+    layout="wide"
+)
+
+# A run this much slower than the median of earlier runs is flagged
+REGRESSION_FACTOR = 1.25
+
+st.markdown("<h1 style='color: #1E3A8A;'>📈 Performance</h1>", unsafe_allow_html=True)
+st.caption("History of generation, export and audiobook runs recorded in the local metrics store")
+
+@st.cache_resource
+def get_store():
+    return MetricsStore()
+
+store = get_store()
+
+with st.sidebar:
+    st.header("Filters")
+    days = st.slider("History (days)", 1, 90, 30)
+    if st.button("Refresh"):
+        st.rerun()
+
+since = time.time() - days * 24 * 60 * 60
+runs = [run for run in store.runs() if run["started_at"] >= since]
+generations = [run for run in runs if run["kind"] == "generate" and run["status"] == "completed"]
+
+if not runs:
+    st.info("No runs recorded yet. Generate a novella to start collecting metrics.")
+    st.stop()
+
+# Latest generation against the median of the ones before it
+st.subheader("Latest generation")
+if generations:
+    latest = generations[-1]
+    earlier = generations[:-1]
+
+    def median_of(field):
+        values = [run[field] for run in earlier if run[field] is not None]
+        return statistics.median(values) if values else None
+
+    columns = st.columns(5)
+    for column, (label, field, unit, digits, lower_is_better) in zip(columns, [
+        ("Time to first token", "ttft_seconds", "s", 1, True),
+        ("Thinking", "thinking_seconds", "s", 1, True),
+        ("Output tokens/s", "tokens_per_sec", "", 1, False),
+        ("Generation time", "generation_seconds", "s", 0, True),
+        ("Output tokens", "output_tokens", "", 0, False)
+    ]):
+        value = latest[field]
+        baseline = median_of(field)
+        delta = None
+        if value is not None and baseline:
+            delta = f"{value - baseline:+,.{digits}f}{unit} vs median"
+        column.metric(label, f"{value:,.{digits}f}{unit}" if value is not None else "-", delta,
+                      delta_color="inverse" if lower_is_better else "normal")
+
+    baseline_rate = median_of("tokens_per_sec")
+    if baseline_rate and latest["tokens_per_sec"] and latest["tokens_per_sec"] * REGRESSION_FACTOR < baseline_rate:
+        st.warning(f"Output rate of the latest run ({latest['tokens_per_sec']:.1f} tokens/s) is well below "
+                   f"the median of earlier runs ({baseline_rate:.1f} tokens/s)")
+else:
+    st.caption("No completed generations in this period")
+
+# Trends
+if generations:
+    st.subheader("Trends")
+    trend = pd.DataFrame([{
+        "started": pd.to_datetime(run["started_at"], unit="s"),
+        "Time to first token (s)": run["ttft_seconds"],
+        "Thinking (s)": run["thinking_seconds"],
+        "Output tokens/s": run["tokens_per_sec"],
+        "Generation time (s)": run["generation_seconds"]
+    } for run in generations]).set_index("started")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.line_chart(trend[["Output tokens/s"]])
+        st.line_chart(trend[["Generation time (s)"]])
+    with col2:
+        st.line_chart(trend[["Time to first token (s)", "Thinking (s)"]])
+
+# Export stage times
+export_runs = [run for run in runs if run["stages"]]
+if export_runs:
+    st.subheader("Export stage times")
+    stages = pd.DataFrame([
+        {"started": pd.to_datetime(run["started_at"], unit="s"),
+         **{stage: seconds for stage, seconds in run["stages"].items() if stage != "total"}}
+        for run in export_runs
+    ]).set_index("started")
+    st.bar_chart(stages)
+
+# TTS latency distribution
+latencies = store.tts_latencies(since)
+if latencies:
+    st.subheader("TTS request latency")
+    ordered = sorted(latencies)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Requests", f"{len(ordered):,}")
+    col2.metric("p50", f"{ordered[len(ordered) // 2]:.2f}s")
+    col3.metric("p95", f"{ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:.2f}s")
+    histogram = pd.cut(pd.Series(latencies), bins=min(20, max(1, len(set(latencies))))).value_counts(sort=False)
+    histogram.index = [f"{interval.right:.2f}s" for interval in histogram.index]
+    st.bar_chart(histogram)
+
+# Artifact cache
+st.subheader("Artifact cache")
+try:
+    from artifact_cache import ArtifactCache
+    cache_stats = ArtifactCache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+    col2.metric("Hits", f"{cache_stats['hits']:,}")
+    col3.metric("Misses", f"{cache_stats['misses']:,}")
+    col4.metric("Stored", f"{cache_stats['bytes'] / (1024 * 1024):.1f} MB")
+except Exception as e:
+    st.caption(f"Cache statistics unavailable: {e}")
+
+# ETA model
+st.subheader("Generation time model")
+model = store.fit_eta()
+if model:
+    st.write(f"Fitted on {model['runs']} completed generations: "
+             f"**{model['overhead']:.0f}s** fixed (first token and thinking) + "
+             f"**{model['seconds_per_token'] * 1000:.1f}s** per 1,000 output tokens")
+    st.metric("Predicted time for a full novella",
+              f"{estimate_seconds(model, TARGET_TOKENS) / 60:.1f} min",
+              help=f"{TARGET_TOKENS:,} output tokens")
+    points = pd.DataFrame([{"Output tokens": run["output_tokens"], "Generation time (s)": run["generation_seconds"]}
+                           for run in generations if run["output_tokens"] and run["generation_seconds"]])
+    st.scatter_chart(points, x="Output tokens", y="Generation time (s)")
+else:
+    st.caption("At least three completed generations are needed to fit the model")
+
+# Run table
+with st.expander("All runs"):
+    st.dataframe(pd.DataFrame([{
+        "started": pd.to_datetime(run["started_at"], unit="s"),
+        "kind": run["kind"],
+        "title": run["title"],
+        "status": run["status"],
+        "ttft (s)": run["ttft_seconds"],
+        "thinking (s)": run["thinking_seconds"],
+        "tokens": run["output_tokens"],
+        "tokens/s": run["tokens_per_sec"],
+        "total (s)": run["total_seconds"]
+    } for run in reversed(runs)]), use_container_width=True)
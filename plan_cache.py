@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Cache of novella plans, for writing several drafts of one concept.
+
+A generation spends up to 30k thinking tokens planning characters, plot and
+setting before the first line of text. The plan is the thinking of the first
+response (or the output of an explicit planning request); it is stored under
+a key made from the prompt and the settings that shape it, and a later draft
+with the same key sends it along with the prompt and writes straight away,
+without thinking.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+
+from artifact_cache import DEFAULT_CACHE_DIR
+
+# Bump when the plan format or the way plans are used changes
+PLAN_CACHE_VERSION = "1"
+
+# "off": no cache; "save": record the plan of every generation; "reuse": write
+# from a cached plan when there is one (and record it otherwise); "plan": like
+# reuse, but make an explicit planning request on a cache miss. Caching is opt-in
+PLAN_MODES = ("off", "save", "reuse", "plan")
+DEFAULT_PLAN_MODE = "off"
+
+# Size cap for the plan directory before least recently used plans are deleted
+# (overridable with NOVELLA_PLAN_CACHE_MAX_MB)
+DEFAULT_MAX_MB = 64
+
+# Room for the written plan on top of the thinking budget in a planning request
+PLAN_OUTPUT_TOKENS = 16000
+
+PLANNING_INSTRUCTION = """Do not write the novella yet. Plan it in full: character profiles and relationships, plot outline with every major event, chapter-by-chapter breakdown, setting and worldbuilding, themes, timeline, story arc, and the ghostwriter persona and style. Output only the complete plan; it will be handed to the writer of the novella."""
+
+PLAN_CONTEXT = """The planning for this novella is already done. Here is the plan:
+
+<plan>
+{plan}
+</plan>
+
+Write the complete novella now, following this plan. Do not plan again or restate the plan; the output should entirely be the novella text, as it will be saved directly to a txt file."""
+
+def plan_dir_default():
+    """Plan directory: NOVELLA_PLAN_CACHE, or "plans" under the cache directory"""
+    return os.environ.get("NOVELLA_PLAN_CACHE") or os.path.join(
+        os.environ.get("NOVELLA_CACHE_DIR", DEFAULT_CACHE_DIR), "plans")
+
+def plan_mode_default():
+    """Plan mode from NOVELLA_PLAN_MODE, or DEFAULT_PLAN_MODE"""
+    mode = os.environ.get("NOVELLA_PLAN_MODE", DEFAULT_PLAN_MODE).strip().lower()
+    return mode if mode in PLAN_MODES else DEFAULT_PLAN_MODE
+
+def _block_field(block, name):
+    """Field of a content block, whether an SDK object or a plain dict"""
+    if isinstance(block, dict):
+        return block.get(name)
+    return getattr(block, name, None)
+
+def plan_from_content(content, kind="thinking"):
+    """
+    Plan text from the content blocks of a response
+
+    Args:
+        content (list): Content blocks (SDK objects or dicts)
+        kind (str, optional): "thinking" for the thinking blocks of a generation,
+            "text" for the output of a planning request
+
+    Returns:
+        str: The plan, or "" if the response has none (redacted thinking is skipped)
+    """
+    field = "thinking" if kind == "thinking" else "text"
+    parts = [_block_field(block, field) or "" for block in content or []
+             if _block_field(block, "type") == kind]
+    return "\n\n".join(part.strip() for part in parts if part.strip())
+
+def planning_params(params, output_tokens=PLAN_OUTPUT_TOKENS):
+    """
+    Request parameters for an explicit planning call
+
+    Same model, system prompt and thinking budget as the generation, with an
+    instruction to output the plan instead of the novella.
+
+    Args:
+        params (dict): Parameters of the generation request
+        output_tokens (int, optional): Tokens for the written plan
+
+    Returns:
+        dict: Parameters for client.beta.messages.stream()
+    """
+    planning = dict(params)
+    budget = params.get("thinking", {}).get("budget_tokens", 0)
+    planning["max_tokens"] = min(params["max_tokens"], budget + output_tokens)
+    message = params["messages"][0]
+    planning["messages"] = [{"role": "user", "content": list(message["content"]) + [
+        {"type": "text", "text": PLANNING_INSTRUCTION}]}]
+    return planning
+
+def writing_params(params, plan):
+    """
+    Request parameters that write the novella from a cached plan
+
+    The plan follows the prompt in the user turn and thinking is turned off,
+    so the response starts with the novella text. The plan is marked for
+    prompt caching, so drafts written back to back pay for it once.
+
+    Args:
+        params (dict): Parameters of the generation request
+        plan (str): The plan text
+
+    Returns:
+        dict: Parameters for client.beta.messages.stream()
+    """
+    writing = dict(params)
+    writing.pop("thinking", None)
+    message = params["messages"][0]
+    writing["messages"] = [{"role": "user", "content": list(message["content"]) + [
+        {"type": "text", "text": PLAN_CONTEXT.format(plan=plan), "cache_control": {"type": "ephemeral"}}]}]
+    return writing
+
+class PlanCache:
+    """
+    Plans stored as one JSON file per key.
+
+    The key covers the prompt, system prompt, model and thinking settings:
+    anything that changes what the model would plan. Writes are atomic, so
+    concurrent generations can share the directory. A file's mtime is its
+    last use, and the least recently used plans are deleted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Args:
+            cache_dir (str, optional): Directory for plans (default: plan_dir_default())
+            max_bytes (int, optional): Size cap before LRU eviction (NOVELLA_PLAN_CACHE_MAX_MB)
+        """
+        self.cache_dir = cache_dir or plan_dir_default()
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("NOVELLA_PLAN_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(params):
+        """
+        Build the key for a generation request
+
+        Args:
+            params (dict): Parameters of the generation request (before any plan is applied)
+
+        Returns:
+            str: Hex digest identifying the plan
+        """
+        settings = {
+            "version": PLAN_CACHE_VERSION,
+            "model": params.get("model"),
+            "system": params.get("system"),
+            "messages": params.get("messages"),
+            "thinking": params.get("thinking")
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key, touch=True):
+        """
+        Look up a plan
+
+        Args:
+            key (str): Key from make_key
+            touch (bool, optional): Mark the plan as used, for LRU eviction
+
+        Returns:
+            dict: The entry (plan, source, created, prompt...), or None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != PLAN_CACHE_VERSION or not entry.get("plan"):
+            return None
+        if touch:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return entry
+
+    def put(self, key, plan, source, prompt=None, **info):
+        """
+        Store a plan, replacing any earlier one for the key
+
+        Args:
+            key (str): Key from make_key
+            plan (str): The plan text
+            source (str): "thinking" or "planning"
+            prompt (str, optional): The prompt, kept for listing
+            **info: Extra fields (model, output tokens...)
+
+        Returns:
+            dict: The stored entry
+        """
+        entry = {
+            "version": PLAN_CACHE_VERSION,
+            "key": key,
+            "source": source,
+            "created": time.time(),
+            "prompt": prompt,
+            "plan": plan,
+            **info
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, self._path(key))
+        self._evict(keep=key)
+        return entry
+
+    def _evict(self, keep=None):
+        """Delete least recently used plans until the directory fits under max_bytes"""
+        plans = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json") and name != f"{keep}.json":
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                plans.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in plans)
+        if keep:
+            try:
+                total += os.path.getsize(self._path(keep))
+            except FileNotFoundError:
+                pass
+        for _, size, name in sorted(plans):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def entries(self):
+        """All stored plans, newest first"""
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    entry = self.get(name[:-len(".json")], touch=False)
+                    if entry:
+                        entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["created"], reverse=True)
+
+    def remove(self, key):
+        """Delete a plan; returns whether it existed"""
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List, show or delete cached novella plans")
+    parser.add_argument("--cache", type=str, default=None, help="Plan directory (default: .novella_cache/plans)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List cached plans")
+    show_parser = subparsers.add_parser("show", help="Print a plan")
+    show_parser.add_argument("key", type=str, help="Plan key (a unique prefix is enough)")
+    remove_parser = subparsers.add_parser("remove", help="Delete plans")
+    remove_parser.add_argument("keys", type=str, nargs="*", help="Plan keys (unique prefixes)")
+    remove_parser.add_argument("--all", action="store_true", help="Delete every plan")
+
+    args = parser.parse_args()
+    cache = PlanCache(args.cache)
+    entries = cache.entries()
+
+    def find(prefix):
+        matches = [entry for entry in entries if entry["key"].startswith(prefix)]
+        if len(matches) != 1:
+            print(f"{'No' if not matches else 'More than one'} plan matches '{prefix}'")
+            return None
+        return matches[0]
+
+    if args.command == "list":
+        if not entries:
+            print(f"No plans in {cache.cache_dir}")
+        for entry in entries:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+            prompt = " ".join((entry.get("prompt") or "").split())
+            print(f"{entry['key'][:12]}  {created}  {entry['source']:<8}  {len(entry['plan'].split()):>6} words  "
+                  f"{prompt[:60]}")
+    elif args.command == "show":
+        entry = find(args.key)
+        if entry:
+            print(entry["plan"])
+    else:
+        targets = entries if args.all else [entry for entry in map(find, args.keys) if entry]
+        for entry in targets:
+            cache.remove(entry["key"])
+        print(f"Removed {len(targets)} plan(s)")
@@ -0,0 +1,240 @@
+"""
+Streaming repetition and loop detection for generated text.
+
+Every paragraph is cut into word n-gram shingles, each hashed with a rolling
+hash as the words go by. A paragraph whose shingles mostly appeared earlier
+(in earlier paragraphs or earlier in itself) is a near-duplicate; a run of
+near-duplicates, or a paragraph that repeats itself, is a loop. The policy
+decides what the generator does about it.
+"""
+
+import os
+import re
+import time
+import zlib
+from collections import Counter
+
+# What the generator does when the text loops: "off", "warn" (report and keep
+# streaming), "stop" (end the stream and cut the loop) or "continue" (cut the
+# loop and ask for a continuation with corrective guidance)
+REPETITION_POLICIES = ("off", "warn", "stop", "continue")
+DEFAULT_POLICY = "warn"
+
+# Words per shingle; 8 consecutive words rarely repeat by chance in prose
+SHINGLE_WORDS = 8
+
+# Share of a paragraph's shingles seen before that makes it a near-duplicate
+DUPLICATE_THRESHOLD = 0.5
+
+# Paragraphs shorter than this are not judged (short dialogue lines repeat naturally)
+MIN_PARAGRAPH_WORDS = 20
+
+# Consecutive near-duplicate paragraphs that make a loop
+LOOP_PARAGRAPHS = 2
+
+# A paragraph without a break is judged once it gets this long (loops inside one paragraph)
+MAX_PARAGRAPH_CHARS = 6000
+
+# Continuation requests allowed per generation before the policy falls back to stopping
+MAX_CONTINUATIONS = 2
+
+# Thinking budget for a continuation; the plan is already in the text so far
+CONTINUATION_THINKING_TOKENS = 4000
+
+CONTINUATION_GUIDANCE = """Your novella above started repeating itself: the passage beginning "{excerpt}" duplicated text you had already written, so it was cut. Continue the novella from exactly where the text above ends. Do not repeat or paraphrase earlier paragraphs; move the story forward with new events, and finish it with the ending you planned. Output only the continuation of the novella text."""
+
+# Rolling hash parameters (polynomial hash mod a Mersenne prime)
+_HASH_BASE = 1000003
+_HASH_MOD = (1 << 61) - 1
+
+_WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+def policy_default():
+    """Repetition policy from NOVELLA_REPETITION_POLICY, or DEFAULT_POLICY"""
+    policy = os.environ.get("NOVELLA_REPETITION_POLICY", DEFAULT_POLICY).strip().lower()
+    return policy if policy in REPETITION_POLICIES else DEFAULT_POLICY
+
+class RepetitionDetector:
+    """
+    Incremental near-duplicate paragraph and loop detector.
+
+    Feed it the streamed text deltas; each completed paragraph is checked once,
+    so the cost per delta is proportional to the delta, not to the text so far.
+    """
+
+    def __init__(self, shingle_words=SHINGLE_WORDS, threshold=DUPLICATE_THRESHOLD,
+                 min_words=MIN_PARAGRAPH_WORDS, loop_paragraphs=LOOP_PARAGRAPHS):
+        """
+        Args:
+            shingle_words (int, optional): Words per shingle
+            threshold (float, optional): Share of repeated shingles that flags a paragraph
+            min_words (int, optional): Shortest paragraph that is judged
+            loop_paragraphs (int, optional): Consecutive flagged paragraphs that make a loop
+        """
+        self.shingle_words = shingle_words
+        self.threshold = threshold
+        self.min_words = min_words
+        self.loop_paragraphs = loop_paragraphs
+        self.findings = []
+        self.repeated_chars = 0
+        self.repeated_seconds = 0.0
+
+        self._top = pow(_HASH_BASE, shingle_words - 1, _HASH_MOD)
+        self._reset()
+
+    def _reset(self):
+        self._seen = {}
+        self._paragraphs = 0
+        self._pending = ""
+        self._pending_start = 0
+        self._pending_since = None
+        self._streak = []
+
+    def rewind(self, text):
+        """
+        Start over from the text kept after a loop was cut, keeping the totals
+
+        Args:
+            text (str): The text kept so far (ending at a paragraph break)
+        """
+        self._reset()
+        for paragraph in text.split("\n\n"):
+            words = _WORD_PATTERN.findall(paragraph.lower())
+            if len(words) >= self.min_words:
+                for shingle in self._shingles(words):
+                    self._seen.setdefault(shingle, self._paragraphs)
+                self._paragraphs += 1
+        self._pending_start = len(text)
+
+    def feed(self, text, now=None):
+        """
+        Add a streamed delta
+
+        Args:
+            text (str): Text as received from the stream
+            now (float, optional): Arrival time (default: time.time())
+
+        Returns:
+            list: Findings for paragraphs completed by this delta (see _check)
+        """
+        now = now or time.time()
+        if self._pending_since is None:
+            self._pending_since = now
+        scan_from = max(0, len(self._pending) - 1)
+        self._pending += text
+        findings = []
+        while True:
+            end = self._pending.find("\n\n", scan_from)
+            if end == -1:
+                if len(self._pending) < MAX_PARAGRAPH_CHARS:
+                    break
+                # No paragraph break in sight: judge what we have up to the last line or word break
+                end = max(self._pending.rfind("\n"), self._pending.rfind(" "))
+                if end <= 0:
+                    end = len(self._pending)
+                cut = end
+            else:
+                cut = end + 2
+            finding = self._check(self._pending[:end], self._pending_start, now - self._pending_since)
+            if finding:
+                findings.append(finding)
+            self._pending_start += cut
+            self._pending = self._pending[cut:]
+            self._pending_since = now
+            scan_from = 0
+        return findings
+
+    def _shingles(self, words):
+        """Rolling hashes of every run of shingle_words consecutive words"""
+        n = self.shingle_words
+        word_hashes = [zlib.crc32(word.encode('utf-8')) for word in words]
+        shingles = []
+        value = 0
+        for i, word_hash in enumerate(word_hashes):
+            if i >= n:
+                value = (value - word_hashes[i - n] * self._top) % _HASH_MOD
+            value = (value * _HASH_BASE + word_hash) % _HASH_MOD
+            if i >= n - 1:
+                shingles.append(value)
+        return shingles
+
+    def _check(self, paragraph, start, seconds):
+        """
+        Judge one paragraph and remember its shingles
+
+        Returns:
+            dict: None, or a finding with the paragraph number, its start/end
+                offsets in the fed text, similarity, the earlier paragraph it
+                mostly repeats (None if it repeats itself), loop (bool) and
+                loop_start (offset where the run of repeated paragraphs began)
+        """
+        words = _WORD_PATTERN.findall(paragraph.lower())
+        if len(words) < self.min_words:
+            return None
+
+        number = self._paragraphs
+        self._paragraphs += 1
+        shingles = self._shingles(words)
+        sources = Counter()
+        own = set()
+        repeated = 0
+        self_repeats = 0
+        for shingle in shingles:
+            source = self._seen.get(shingle)
+            if source is not None:
+                repeated += 1
+                sources[source] += 1
+            elif shingle in own:
+                repeated += 1
+                self_repeats += 1
+            own.add(shingle)
+        for shingle in own:
+            self._seen.setdefault(shingle, number)
+
+        similarity = repeated / len(shingles)
+        if similarity < self.threshold:
+            self._streak = []
+            return None
+
+        finding = {
+            "paragraph": number,
+            "start": start,
+            "end": start + len(paragraph),
+            "similarity": round(similarity, 3),
+            "source": sources.most_common(1)[0][0] if sources else None,
+            "excerpt": " ".join(paragraph.split())[:80],
+            "seconds": seconds
+        }
+        self._streak.append(finding)
+        finding["loop"] = len(self._streak) >= self.loop_paragraphs or self_repeats / len(shingles) >= self.threshold
+        finding["loop_start"] = self._streak[0]["start"]
+        self.findings.append(finding)
+        self.repeated_chars += len(paragraph)
+        self.repeated_seconds += seconds
+        return finding
+
+def continuation_params(params, text, finding, thinking_tokens=CONTINUATION_THINKING_TOKENS):
+    """
+    Request parameters that ask the model to continue a novella cut at a loop
+
+    The text so far goes back as the assistant turn, followed by corrective
+    guidance naming the passage that was repeated.
+
+    Args:
+        params (dict): Parameters of the original request
+        text (str): The novella text kept so far
+        finding (dict): The loop finding that ended the previous stream
+        thinking_tokens (int, optional): Thinking budget for the continuation
+
+    Returns:
+        dict: Parameters for client.beta.messages.stream()
+    """
+    continuation = dict(params)
+    continuation["messages"] = list(params["messages"]) + [
+        {"role": "assistant", "content": [{"type": "text", "text": text.rstrip()}]},
+        {"role": "user", "content": [{"type": "text",
+                                      "text": CONTINUATION_GUIDANCE.format(excerpt=finding["excerpt"])}]}
+    ]
+    if "thinking" in params:
+        continuation["thinking"] = {"type": "enabled", "budget_tokens": thinking_tokens}
+    return continuation
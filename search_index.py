@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Full-text search over a library of novellas.
+
+The index is a directory of immutable segments plus a JSON manifest. Each
+segment holds a sorted term dictionary and the postings for its books: one
+(book, word position, byte offset) record per occurrence, read through
+memory maps, so a query only touches the pages of the terms it looks up.
+Chapters are resolved from the byte offset with the book's chapter starts.
+
+Saving or re-saving a book writes a new small segment and retires the old
+copy of that book; once there are more than MAX_SEGMENTS segments they are
+merged into one. Queries support words (all must match), "quoted phrases"
+and prefix* terms.
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import time
+import heapq
+import hashlib
+import argparse
+import contextlib
+import multiprocessing
+import concurrent.futures
+
+import numpy as np
+
+from artifact_cache import DEFAULT_CACHE_DIR
+from chapter_index import HEADING_PATTERN, END_MARKERS
+
+# Bump when the on-disk layout changes so old indexes are rebuilt
+INDEX_VERSION = 1
+
+# Segments are merged into one once there are more than this many
+MAX_SEGMENTS = 8
+
+# A build flushes a segment after this much source text, to bound memory
+SEGMENT_SOURCE_BYTES = 32 * 1024 * 1024
+
+# Context shown on each side of a match
+SNIPPET_BYTES = 80
+
+# Words, keeping inner apostrophes ("don't"); terms are lowercased with curly apostrophes straightened
+WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+# On-disk records: one posting per occurrence, one lexicon entry per term
+POSTING_DTYPE = np.dtype([("doc", "<u4"), ("position", "<u4"), ("offset", "<u4")])
+LEXICON_DTYPE = np.dtype([("term_offset", "<u8"), ("term_length", "<u4"), ("count", "<u4"), ("start", "<u8")])
+
+def index_dir_default():
+    """Index directory: NOVELLA_SEARCH_INDEX, or "search" under the cache directory"""
+    return os.environ.get("NOVELLA_SEARCH_INDEX") or os.path.join(
+        os.environ.get("NOVELLA_CACHE_DIR", DEFAULT_CACHE_DIR), "search")
+
+def normalize(word):
+    """Index term for a word"""
+    return word.lower().replace("’", "'")
+
+def tokenize_file(path):
+    """
+    Split a novella file into terms with their word positions and byte offsets
+
+    Runs in build worker processes. The generation header line is skipped and
+    the text stops at the end marker; every markdown heading starts a chapter.
+
+    Args:
+        path (str): Novella text file
+
+    Returns:
+        tuple: (book info dict, {term: (positions, offsets)} with uint32 arrays)
+    """
+    terms = {}
+    chapters = []
+    title = None
+    position = 0
+    line_offset = 0
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        ended = False
+        for line in file:
+            digest.update(line)
+            if ended:
+                continue
+            stripped = line.rstrip(b"\r\n")
+            if stripped.startswith(END_MARKERS):
+                ended = True
+                continue
+            if line_offset == 0 and stripped.startswith(b"--- NOVELLA:"):
+                title = stripped[12:].rstrip(b"- ").strip().decode('utf-8', errors='replace')
+                line_offset += len(line)
+                continue
+            if HEADING_PATTERN.match(stripped):
+                chapters.append([line_offset, stripped.lstrip(b"#").strip().decode('utf-8', errors='replace')])
+
+            text = line.decode('utf-8', errors='replace')
+            # Fold the whole line at once; the rare case mapping that changes length folds word by word
+            folded = normalize(text)
+            per_word = len(folded) != len(text)
+            ascii_only = len(text) == len(line)
+            char_position = 0
+            byte_position = line_offset
+            for match in WORD_PATTERN.finditer(text if per_word else folded):
+                start = match.start()
+                # Byte offsets: walk the line once, encoding only the gaps between matches
+                if ascii_only:
+                    byte_position = line_offset + start
+                else:
+                    byte_position += len(text[char_position:start].encode('utf-8'))
+                    char_position = start
+                term = normalize(match.group()) if per_word else match.group()
+                entry = terms.get(term)
+                if entry is None:
+                    entry = terms[term] = ([], [])
+                entry[0].append(position)
+                entry[1].append(byte_position)
+                position += 1
+            line_offset += len(line)
+
+    book = {
+        "path": os.path.abspath(path),
+        "title": title or os.path.splitext(os.path.basename(path))[0],
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": digest.hexdigest(),
+        "words": position,
+        "chapters": chapters
+    }
+    postings = {term: (np.array(positions, dtype=np.uint32), np.array(offsets, dtype=np.uint32))
+                for term, (positions, offsets) in terms.items()}
+    return book, postings
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_segment(index_dir, name, items):
+    """
+    Write one segment from (term bytes, postings array) pairs in ascending term order
+
+    Returns:
+        int: Number of terms written
+    """
+    lexicon = []
+    term_offset = 0
+    start = 0
+    with open(os.path.join(index_dir, f"{name}.terms"), 'wb') as terms_file, \
+            open(os.path.join(index_dir, f"{name}.post"), 'wb') as postings_file:
+        for term, postings in items:
+            if not len(postings):
+                continue
+            terms_file.write(term)
+            postings_file.write(postings.tobytes())
+            lexicon.append((term_offset, len(term), len(postings), start))
+            term_offset += len(term)
+            start += len(postings)
+    np.array(lexicon, dtype=LEXICON_DTYPE).tofile(os.path.join(index_dir, f"{name}.lex"))
+    return len(lexicon)
+
+def _map_file(path):
+    """Read-only memory map of a file (None if empty)"""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class Segment:
+    """
+    Read-only view of one index segment.
+
+    The lexicon and postings are NumPy arrays over memory maps, so opening a
+    segment reads nothing until a term is looked up.
+    """
+
+    def __init__(self, index_dir, name):
+        self.name = name
+        self._maps = [_map_file(os.path.join(index_dir, f"{name}.{suffix}")) for suffix in ("terms", "lex", "post")]
+        self._terms = self._maps[0] or b""
+        self.lexicon = np.frombuffer(self._maps[1], dtype=LEXICON_DTYPE) if self._maps[1] else \
+            np.zeros(0, dtype=LEXICON_DTYPE)
+        self.postings = np.frombuffer(self._maps[2], dtype=POSTING_DTYPE) if self._maps[2] else \
+            np.zeros(0, dtype=POSTING_DTYPE)
+
+    def term(self, i):
+        entry = self.lexicon[i]
+        offset = int(entry["term_offset"])
+        return self._terms[offset:offset + int(entry["term_length"])]
+
+    def _lower_bound(self, term):
+        """Index of the first term >= term"""
+        low, high = 0, len(self.lexicon)
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < term:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def term_range(self, term, prefix=False):
+        """Lexicon indexes [start, end) of a term, or of every term starting with it"""
+        start = self._lower_bound(term)
+        if prefix:
+            # UTF-8 never contains 0xff, so this sorts after every term with the prefix
+            return start, self._lower_bound(term + b"\xff")
+        return start, start + 1 if start < len(self.lexicon) and self.term(start) == term else start
+
+    def lookup(self, term, prefix=False):
+        """Postings of a term (or prefix), as a record array (a prefix's terms one after another)"""
+        start, end = self.term_range(term, prefix)
+        if start == end:
+            return np.zeros(0, dtype=POSTING_DTYPE)
+        if end == start + 1:
+            return self._postings_at(start)
+        return np.concatenate([self._postings_at(i) for i in range(start, end)])
+
+    def _postings_at(self, i):
+        entry = self.lexicon[i]
+        start = int(entry["start"])
+        return self.postings[start:start + int(entry["count"])]
+
+    def __iter__(self):
+        """(term bytes, postings) for every term, in term order"""
+        for i in range(len(self.lexicon)):
+            yield self.term(i), self._postings_at(i)
+
+    def close(self):
+        # Arrays still referencing a map keep it open; drop ours first
+        self.lexicon = self.postings = None
+        for mapped in self._maps:
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass
+
+class SearchIndex:
+    """
+    An on-disk inverted index over novella text files.
+
+    Readers see the segments listed in the manifest when they opened the
+    index; writers take an exclusive lock, add new segments and replace the
+    manifest atomically, so searches never see a half-written update.
+    """
+
+    def __init__(self, index_dir=None):
+        """
+        Open (or start) an index
+
+        Args:
+            index_dir (str, optional): Index directory (default: index_dir_default())
+        """
+        self.index_dir = index_dir or index_dir_default()
+        self.segments = []
+        self._load()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.index_dir, "manifest.json")
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def _load(self, retry=True):
+        for segment in self.segments:
+            segment.close()
+        self.manifest = {"version": INDEX_VERSION, "next_doc": 0, "next_segment": 0, "segments": [], "docs": {}}
+        self.segments = []
+        self._live = np.zeros(0, dtype=bool)
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != INDEX_VERSION:
+            return
+        try:
+            segments = [Segment(self.index_dir, name) for name in manifest["segments"]]
+        except FileNotFoundError:
+            # A merge retired these segments after we read the manifest; read the new one
+            if not retry:
+                raise
+            return self._load(retry=False)
+        self.manifest = manifest
+        self.segments = segments
+        self._live = np.zeros(manifest["next_doc"], dtype=bool)
+        self._live[[int(doc) for doc in manifest["docs"]]] = True
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Exclusive writer lock; reloads the manifest so updates start from the latest state"""
+        import fcntl
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, "lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.manifest, file, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+
+    def _docs_by_path(self):
+        return {book["path"]: doc for doc, book in self.manifest["docs"].items()}
+
+    def update(self, paths, prune=False, workers=None):
+        """
+        Index new and changed books, and retire the old copies of changed ones
+
+        A book is unchanged while its size and mtime match; if only the mtime
+        moved, the content hash decides.
+
+        Args:
+            paths (list): Novella text files
+            prune (bool, optional): Also drop indexed books whose files no longer exist
+            workers (int, optional): Tokenizer processes (default: CPU count; 1 runs inline)
+
+        Returns:
+            dict: Counts of added, updated, removed and unchanged books
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._writing():
+            docs = self.manifest["docs"]
+            by_path = self._docs_by_path()
+            pending = []
+            touched = False
+            for path in dict.fromkeys(os.path.abspath(path) for path in paths):
+                doc = by_path.get(path)
+                if doc is not None:
+                    book = docs[doc]
+                    stat = os.stat(path)
+                    if book["size"] == stat.st_size and (book["mtime"] == stat.st_mtime or
+                                                         book["sha256"] == _file_sha256(path)):
+                        if book["mtime"] != stat.st_mtime:
+                            book["mtime"] = stat.st_mtime
+                            touched = True
+                        counts["unchanged"] += 1
+                        continue
+                pending.append(path)
+
+            if prune:
+                for path, doc in by_path.items():
+                    if not os.path.exists(path):
+                        del docs[doc]
+                        counts["removed"] += 1
+
+            if pending:
+                self._add_books(pending, by_path, counts, workers)
+            if pending or touched or counts["removed"] or not self.exists():
+                if len(self.manifest["segments"]) > MAX_SEGMENTS:
+                    self._merge()
+                self._save_manifest()
+                self._load()
+        return counts
+
+    def _add_books(self, paths, by_path, counts, workers):
+        """Tokenize books (in a process pool for several) and write them as new segments"""
+        docs = self.manifest["docs"]
+        batch = {}
+        batch_bytes = 0
+
+        def flush():
+            nonlocal batch, batch_bytes
+            if batch:
+                name = f"seg{self.manifest['next_segment']:06d}"
+                self.manifest["next_segment"] += 1
+                _write_segment(self.index_dir, name, self._batch_items(batch))
+                self.manifest["segments"].append(name)
+            batch = {}
+            batch_bytes = 0
+
+        if len(paths) == 1 or workers == 1:
+            results = map(tokenize_file, paths)
+            executor = None
+        else:
+            # Spawned, not forked: saves from the app and job threads update the index too
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                              mp_context=multiprocessing.get_context("spawn"))
+            results = executor.map(tokenize_file, paths)
+        try:
+            for path, (book, postings) in zip(paths, results):
+                old = by_path.get(path)
+                if old is not None:
+                    del docs[old]
+                    counts["updated"] += 1
+                else:
+                    counts["added"] += 1
+                doc = self.manifest["next_doc"]
+                self.manifest["next_doc"] += 1
+                docs[str(doc)] = book
+                for term, (positions, offsets) in postings.items():
+                    batch.setdefault(term, []).append((doc, positions, offsets))
+                batch_bytes += book["size"]
+                if batch_bytes >= SEGMENT_SOURCE_BYTES:
+                    flush()
+            flush()
+        finally:
+            if executor:
+                executor.shutdown()
+
+    @staticmethod
+    def _batch_items(batch):
+        """(term bytes, postings) for an in-memory batch, in byte order of the terms"""
+        for term_bytes, term in sorted((term.encode('utf-8'), term) for term in batch):
+            entries = batch[term]
+            postings = np.empty(sum(len(positions) for _, positions, _ in entries), dtype=POSTING_DTYPE)
+            start = 0
+            for doc, positions, offsets in entries:
+                end = start + len(positions)
+                postings["doc"][start:end] = doc
+                postings["position"][start:end] = positions
+                postings["offset"][start:end] = offsets
+                start = end
+            yield term_bytes, postings
+
+    def _merge(self):
+        """Merge every segment into one, dropping retired books (streams terms, never loads a whole segment)"""
+        live = np.zeros(self.manifest["next_doc"], dtype=bool)
+        live[[int(doc) for doc in self.manifest["docs"]]] = True
+        segments = [Segment(self.index_dir, name) for name in self.manifest["segments"]]
+
+        def merged_terms():
+            # Doc ids grow with segment order, so concatenating in that order keeps postings sorted
+            current, parts = None, []
+            for term, number, postings in heapq.merge(*[((term, number, postings) for term, postings in segment)
+                                                      for number, segment in enumerate(segments)],
+                                                    key=lambda item: (item[0], item[1])):
+                if term != current:
+                    if parts:
+                        yield current, self._live_postings(parts, live)
+                    current, parts = term, []
+                parts.append(postings)
+            if parts:
+                yield current, self._live_postings(parts, live)
+
+        name = f"seg{self.manifest['next_segment']:06d}"
+        self.manifest["next_segment"] += 1
+        try:
+            _write_segment(self.index_dir, name, merged_terms())
+        finally:
+            for segment in segments:
+                segment.close()
+        retired = self.manifest["segments"]
+        self.manifest["segments"] = [name]
+        self._save_manifest()
+        for old in retired:
+            for suffix in ("terms", "lex", "post"):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.index_dir, f"{old}.{suffix}"))
+
+    @staticmethod
+    def _live_postings(parts, live):
+        postings = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        return postings[live[postings["doc"]]]
+
+    def compact(self):
+        """Merge all segments now"""
+        with self._writing():
+            if self.manifest["segments"]:
+                self._merge()
+                self._load()
+
+    def _occurrences(self, term, prefix=False):
+        """Live postings of a term (or prefix) across all segments"""
+        parts = [segment.lookup(term.encode('utf-8'), prefix) for segment in self.segments]
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return np.zeros(0, dtype=POSTING_DTYPE)
+        postings = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        return postings[self._live[postings["doc"]]]
+
+    def _clause(self, words):
+        """Occurrences of a phrase (list of (term, prefix) pairs), anchored at its first word"""
+        first = self._occurrences(*words[0])
+        keys = (first["doc"].astype(np.uint64) << 32) | first["position"]
+        for distance, word in enumerate(words[1:], start=1):
+            following = self._occurrences(*word)
+            following_keys = (following["doc"].astype(np.uint64) << 32) | following["position"]
+            matched = np.isin(keys + distance, following_keys)
+            first, keys = first[matched], keys[matched]
+        return first
+
+    def search(self, query, limit=20, matches_per_book=3):
+        """
+        Find books matching every clause of a query
+
+        Args:
+            query (str): Words, "quoted phrases" and prefix* terms
+            limit (int, optional): Maximum books returned
+            matches_per_book (int, optional): Matches (with chapter and snippet) returned per book
+
+        Returns:
+            list: Per book, most matches first: path, title, hits and the first matches
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+
+        results = [self._clause(words) for words in clauses]
+        # Books matching every clause, ranked by their total matches
+        matching = np.ones(len(self._live), dtype=bool)
+        totals = np.zeros(len(self._live), dtype=np.int64)
+        for occurrences in results:
+            counts = np.bincount(occurrences["doc"], minlength=len(self._live))
+            matching &= counts > 0
+            totals += counts
+        totals[~matching] = 0
+        ranked = [doc for doc in np.argsort(-totals, kind="stable")[:limit].tolist() if totals[doc]]
+        if not ranked:
+            return []
+
+        # Only the listed books' matches are sorted by position
+        listed = np.zeros(len(self._live), dtype=bool)
+        listed[ranked] = True
+        hits = np.concatenate(results)
+        hits = hits[listed[hits["doc"]]]
+        hits = hits[np.lexsort((hits["offset"], hits["doc"]))]
+        docs, starts = np.unique(hits["doc"], return_index=True)
+        first_hit = dict(zip(docs.tolist(), starts.tolist()))
+
+        books_found = []
+        for doc in ranked:
+            book = self.manifest["docs"][str(doc)]
+            start = first_hit[doc]
+            total = int(totals[doc])
+            matches = [self._match(book, int(offset)) for offset in hits["offset"][start:start + min(total, matches_per_book)]]
+            books_found.append({"path": book["path"], "title": book["title"], "hits": total, "matches": matches})
+        return books_found
+
+    def _match(self, book, offset):
+        """Chapter and snippet around a byte offset"""
+        chapter_number, chapter_title = None, None
+        for number, (start, title) in enumerate(book["chapters"]):
+            if start > offset:
+                break
+            chapter_number, chapter_title = number + 1, title
+        try:
+            with open(book["path"], 'rb') as file:
+                start = max(0, offset - SNIPPET_BYTES)
+                file.seek(start)
+                data = file.read(offset - start + SNIPPET_BYTES)
+            snippet = " ".join(data.decode('utf-8', errors='ignore').split())
+        except OSError:
+            snippet = None
+        return {"offset": offset, "chapter": chapter_number, "chapter_title": chapter_title, "snippet": snippet}
+
+    def stats(self):
+        """Books, segments, terms (summed over segments) and postings in the index"""
+        return {
+            "books": len(self.manifest["docs"]),
+            "segments": len(self.segments),
+            "terms": sum(len(segment.lexicon) for segment in self.segments),
+            "postings": sum(len(segment.postings) for segment in self.segments),
+            "bytes": sum(os.path.getsize(os.path.join(self.index_dir, f"{segment.name}.{suffix}"))
+                         for segment in self.segments for suffix in ("terms", "lex", "post"))
+        }
+
+def parse_query(query):
+    """
+    Split a query into clauses
+
+    Returns:
+        list: One list of (term, prefix) pairs per word or "quoted phrase"
+    """
+    clauses = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        text = phrase or word
+        terms = [normalize(match) for match in WORD_PATTERN.findall(text)]
+        if not terms:
+            continue
+        words = [(term, False) for term in terms]
+        if text.rstrip().endswith("*"):
+            words[-1] = (terms[-1], True)
+        clauses.append(words)
+    return clauses
+
+def index_saved_book(txt_filename, index_dir=None):
+    """
+    Add a just-saved novella to the search index, if one has been built
+
+    Returns:
+        dict: Update counts, or None when there is no index to update
+    """
+    index = SearchIndex(index_dir)
+    try:
+        if not index.exists():
+            return None
+        return index.update([txt_filename], workers=1)
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    from batch_export import find_novellas
+
+    parser = argparse.ArgumentParser(description="Build and query a full-text index over novella text files")
+    parser.add_argument("--index", type=str, default=None, help="Index directory (default: NOVELLA_SEARCH_INDEX or .novella_cache/search)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Index new and changed books")
+    build_parser.add_argument("targets", nargs="*", default=["archives"], help="Directories or globs of .txt files (default: archives)")
+    build_parser.add_argument("--prune", action="store_true", help="Drop books whose files no longer exist")
+    build_parser.add_argument("--workers", type=int, default=None, help="Tokenizer processes (default: CPU count)")
+
+    query_parser = subparsers.add_parser("query", help="Search the index")
+    query_parser.add_argument("query", type=str, help='Words (all must match), "quoted phrases" and prefix* terms')
+    query_parser.add_argument("--limit", type=int, default=20, help="Maximum books to list")
+    query_parser.add_argument("--matches", type=int, default=3, help="Matches to show per book")
+    query_parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    subparsers.add_parser("compact", help="Merge all segments into one")
+    subparsers.add_parser("stats", help="Show index size")
+
+    args = parser.parse_args()
+    index = SearchIndex(args.index)
+
+    if args.command == "build":
+        paths = [path for target in args.targets for path in find_novellas(target)]
+        start_time = time.time()
+        counts = index.update(paths, prune=args.prune, workers=args.workers)
+        print(f"{counts['added']} added, {counts['updated']} updated, {counts['removed']} removed, "
+              f"{counts['unchanged']} unchanged in {time.time() - start_time:.2f}s")
+    elif args.command == "query":
+        if not index.exists():
+            print(f"No index in {index.index_dir}; run: python search_index.py build <directory>")
+            sys.exit(1)
+        start_time = time.time()
+        results = index.search(args.query, limit=args.limit, matches_per_book=args.matches)
+        elapsed = time.time() - start_time
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for book in results:
+                print(f"{book['title']} ({book['hits']} matches) - {book['path']}")
+                for match in book["matches"]:
+                    where = f"ch. {match['chapter']} {match['chapter_title']}" if match["chapter"] else "front matter"
+                    print(f"  [{where[:40]}] ...{match['snippet']}...")
+            print(f"{len(results)} books in {elapsed * 1000:.1f} ms")
+    elif args.command == "compact":
+        index.compact()
+        print(f"Compacted to {len(index.segments)} segment(s)")
+    elif args.command == "stats":
+        stats = index.stats()
+        print(f"{stats['books']} books, {stats['segments']} segments, {stats['terms']:,} terms, "
+              f"{stats['postings']:,} postings, {stats['bytes'] / (1024 * 1024):.1f} MB")
+    index.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Sample CPU and memory of a running NovellaGPT server process (and its children)
+from /proc, e.g. to compare per-viewer CPU cost before and after a UI change.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _read_stat(pid):
+    """Return (parent pid, cpu seconds, rss bytes) for a pid from /proc/<pid>/stat"""
+    with open(f"/proc/{pid}/stat", "r") as file:
+        data = file.read()
+    # The command name is in parentheses and may contain spaces
+    fields = data[data.rindex(")") + 2:].split()
+    ppid = int(fields[1])
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    rss_bytes = int(fields[21]) * PAGE_SIZE
+    return ppid, cpu_seconds, rss_bytes
+
+def process_tree(pid):
+    """
+    List a process and all of its descendants
+
+    Args:
+        pid (int): Root process id
+
+    Returns:
+        list: Process ids in the tree
+    """
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            ppid, _, _ = _read_stat(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    tree = []
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+def usage(pid):
+    """
+    Total CPU seconds and RSS of a process tree
+
+    Args:
+        pid (int): Root process id
+
+    Returns:
+        tuple: (cpu seconds, rss bytes)
+    """
+    cpu_total = 0.0
+    rss_total = 0
+    for member in process_tree(pid):
+        try:
+            _, cpu_seconds, rss_bytes = _read_stat(member)
+        except (OSError, ValueError, IndexError):
+            continue
+        cpu_total += cpu_seconds
+        rss_total += rss_bytes
+    return cpu_total, rss_total
+
+def sample_process(pid, seconds=30.0, interval=1.0):
+    """
+    Measure a process tree's CPU use and memory over a window
+
+    Args:
+        pid (int): Root process id
+        seconds (float): Length of the sampling window
+        interval (float): Time between RSS samples
+
+    Returns:
+        dict: cpu_percent (of one core), cpu_seconds, peak_rss_mb, seconds
+    """
+    start_cpu, peak_rss = usage(pid)
+    start_time = time.time()
+    while time.time() - start_time < seconds:
+        time.sleep(interval)
+        _, rss = usage(pid)
+        peak_rss = max(peak_rss, rss)
+    end_cpu, rss = usage(pid)
+    elapsed = time.time() - start_time
+    cpu_seconds = end_cpu - start_cpu
+    return {
+        "cpu_percent": 100.0 * cpu_seconds / elapsed if elapsed > 0 else 0.0,
+        "cpu_seconds": cpu_seconds,
+        "peak_rss_mb": max(peak_rss, rss) / (1024 * 1024),
+        "seconds": elapsed
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CPU and memory of the NovellaGPT server process")
+    parser.add_argument("--pid", type=int, default=None, help="Server pid (default: read streamlit_app.pid)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Sampling window in seconds")
+    parser.add_argument("--viewers", type=int, default=1, help="Number of open viewers, to report CPU per viewer")
+
+    args = parser.parse_args()
+
+    pid = args.pid
+    if pid is None:
+        try:
+            with open("streamlit_app.pid", "r") as file:
+                pid = int(file.read().strip())
+        except (OSError, ValueError):
+            print("No --pid given and streamlit_app.pid not found (start the app with ./start_app_background.sh)")
+            sys.exit(1)
+
+    if not os.path.exists(f"/proc/{pid}"):
+        print(f"No running process with pid {pid} (this tool needs Linux /proc)")
+        sys.exit(1)
+
+    print(f"Sampling pid {pid} and its children for {args.seconds:.0f}s...")
+    stats = sample_process(pid, args.seconds)
+    print(f"CPU: {stats['cpu_percent']:.1f}% of one core ({stats['cpu_seconds']:.2f}s CPU)")
+    print(f"CPU per viewer: {stats['cpu_percent'] / max(1, args.viewers):.2f}%")
+    print(f"Peak RSS: {stats['peak_rss_mb']:.1f} MB")
@@ -0,0 +1,239 @@
+import os
+import re
+import concurrent.futures
+
+class ChapterStreamExporter:
+    """
+    Export chapters speculatively while a novella is still streaming.
+
+    Text deltas are fed in as they arrive; a new markdown heading closes the
+    previous chapter, which is immediately rendered to EPUB XHTML and queued
+    for TTS narration. When the stream ends only the last chapter is still
+    outstanding, so most export and narration work overlaps with generation.
+    Text taken back with discard() reopens the chapter it started in, and the
+    work already queued for any chapter past that point is cancelled.
+    """
+
+    # Same rule convert_epub uses to split chapters, applied one line at a time
+    HEADING_PATTERN = re.compile(r'^#+\s+.*$')
+
+    def __init__(self, title, epub=True, audio=False, voice=None, openai_api_key=None, max_workers=4,
+                 audio_dir="audio_files"):
+        """
+        Initialize the exporter
+
+        Args:
+            title (str): Title of the novella
+            epub (bool, optional): Render EPUB chapters as they complete
+            audio (bool, optional): Narrate chapters as they complete
+            voice (str, optional): Voice to use for TTS
+            openai_api_key (str, optional): OpenAI API key for narration
+            max_workers (int, optional): Number of parallel TTS requests
+            audio_dir (str, optional): Directory for segment and audiobook files
+        """
+        self.title = title
+        self.epub = epub
+        self.voice = voice
+        self.rendered_chapters = {}
+        self.chapters_closed = 0
+
+        self._pending_line = ""
+        self._header = None
+        self._lines = []
+        # Offset of the next complete line in the fed text, and of the open chapter
+        self._offset = 0
+        self._chapter_start = 0
+        # Closed chapters: start offset, header, lines and the index of their first render/TTS future
+        self._closed = []
+        self._segments_submitted = 0
+
+        # EPUB rendering is cheap, a single worker keeps it off the stream loop
+        self._render_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1) if epub else None
+        self._render_futures = []
+
+        self._generator = None
+        self._tts_pool = None
+        self._tts_futures = []
+        if audio:
+            from audio_gen import AudiobookGenerator
+            self._generator = AudiobookGenerator(api_key=openai_api_key, output_dir=audio_dir)
+            clean_title = ''.join(c if c.isalnum() else '_' for c in title)
+            self._audiobook_dir = os.path.join(audio_dir, clean_title)
+            os.makedirs(self._audiobook_dir, exist_ok=True)
+            self._tts_pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def feed(self, text):
+        """
+        Feed a streamed text delta
+
+        Args:
+            text (str): Text as received from the stream
+        """
+        self._pending_line += text
+        if "\n" not in self._pending_line:
+            return
+
+        *complete_lines, self._pending_line = self._pending_line.split("\n")
+        for line in complete_lines:
+            if self.HEADING_PATTERN.match(line):
+                self._close_chapter()
+                self._header = line
+                self._lines = []
+                self._chapter_start = self._offset
+            else:
+                self._lines.append(line)
+            self._offset += len(line) + 1
+
+    def discard(self, count):
+        """
+        Take back the last characters fed, e.g. a repeated passage cut from the stream
+
+        The chapter the cut lands in becomes the open chapter again; chapters
+        after it are dropped, their queued rendering and narration cancelled
+        and segments already narrated from them deleted.
+
+        Args:
+            count (int): Number of characters to drop
+        """
+        end = max(0, self._offset + len(self._pending_line) - count)
+        if end >= self._chapter_start:
+            start = self._chapter_start
+            text = _chapter_text(self._header, self._lines, self._pending_line)
+        else:
+            keep = [i for i, chapter in enumerate(self._closed) if chapter["start"] < end]
+            if not keep:
+                # Cut before the first chapter: nothing before it is exported
+                self._drop_chapters(0)
+                self._reset(end)
+                return
+            chapter = self._closed[keep[-1]]
+            self._drop_chapters(keep[-1])
+            start = chapter["start"]
+            text = _chapter_text(chapter["header"], chapter["lines"])
+        self._reset(start)
+        self.feed(text[:end - start])
+
+    def _reset(self, offset):
+        """Start an empty open chapter at a fed-text offset"""
+        self._header = None
+        self._lines = []
+        self._pending_line = ""
+        self._offset = offset
+        self._chapter_start = offset
+
+    def _drop_chapters(self, index):
+        """Forget closed chapters from index on and cancel their work"""
+        dropped = self._closed[index:]
+        if not dropped:
+            return
+        del self._closed[index:]
+        self.chapters_closed -= len(dropped)
+
+        render_start = dropped[0]["render_start"]
+        for future in self._render_futures[render_start:]:
+            # A render that already ran only leaves an entry under a key no chapter will look up
+            future.cancel()
+        del self._render_futures[render_start:]
+
+        tts_start = dropped[0]["tts_start"]
+        for future in self._tts_futures[tts_start:]:
+            if not future.cancel():
+                future.add_done_callback(_remove_segment)
+        del self._tts_futures[tts_start:]
+
+    def _close_chapter(self):
+        """Hand the chapter collected so far to the EPUB renderer and TTS queue"""
+        if self._header is None:
+            # Text before the first heading is not part of any EPUB chapter
+            self._lines = []
+            return
+
+        content_text = "\n".join(self._lines)
+        if not content_text.strip():
+            return
+
+        self.chapters_closed += 1
+        self._closed.append({
+            "start": self._chapter_start,
+            "header": self._header,
+            "lines": self._lines,
+            "render_start": len(self._render_futures),
+            "tts_start": len(self._tts_futures)
+        })
+        header_text = self._header.strip('#').strip()
+
+        if self._render_pool:
+            self._render_futures.append(
+                self._render_pool.submit(self._render, header_text, content_text)
+            )
+
+        if self._tts_pool:
+            for segment in self._generator.prepare_segments(f"{self._header}\n{content_text}"):
+                # Numbered by submission, so a segment replacing a cancelled one never shares its file
+                self._segments_submitted += 1
+                segment_filename = os.path.join(self._audiobook_dir, f"segment_{self._segments_submitted:03d}.mp3")
+                self._tts_futures.append(self._tts_pool.submit(
+                    self._generator.generate_audio_for_text,
+                    segment,
+                    voice=self.voice,
+                    output_file=segment_filename
+                ))
+
+    def _render(self, header_text, content_text):
+        """Render one chapter and store it under the key convert_epub looks up"""
+        from convert_epub import chapter_key, render_chapter
+        self.rendered_chapters[chapter_key(header_text, content_text)] = render_chapter(header_text, content_text)
+
+    def finish(self):
+        """
+        Close the last chapter and wait for all outstanding work
+
+        Returns:
+            dict: 'rendered_chapters' for convert_to_epub, 'audio_segments' in reading order,
+                'audiobook' (combined MP3 path or None) and 'tts_latencies' (seconds per TTS request)
+        """
+        if self._pending_line:
+            self._lines.append(self._pending_line)
+            self._pending_line = ""
+        self._close_chapter()
+        self._header = None
+
+        if self._render_pool:
+            for future in self._render_futures:
+                future.result()
+            self._render_pool.shutdown()
+
+        audio_segments = []
+        audiobook = None
+        if self._tts_pool:
+            audio_segments = [future.result() for future in self._tts_futures]
+            self._tts_pool.shutdown()
+            # Remove any None entries (in case of errors)
+            audio_segments = [f for f in audio_segments if f]
+            audiobook = self._generator.finish_audiobook(list(audio_segments), self.title)
+
+        return {
+            "rendered_chapters": self.rendered_chapters,
+            "audio_segments": audio_segments,
+            "audiobook": audiobook,
+            "tts_latencies": list(self._generator.segment_latencies) if self._generator else []
+        }
+
+    def cancel(self):
+        """Drop queued work, e.g. when generation is interrupted"""
+        for pool in (self._render_pool, self._tts_pool):
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+def _chapter_text(header, lines, pending_line=""):
+    """Text of a chapter as it was fed: the heading line (if any), its lines, then the unfinished line"""
+    return "".join(line + "\n" for line in ([header] if header is not None else []) + lines) + pending_line
+
+def _remove_segment(future):
+    """Delete a narrated segment whose chapter was dropped after its request had started"""
+    try:
+        path = future.result()
+    except Exception:
+        return
+    if path and os.path.exists(path):
+        os.remove(path)
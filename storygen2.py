@@ -1,15 +1,23 @@
-import anthropic
 import os
 import argparse
 import sys
 import time
 import re
+import tracing
 from dotenv import load_dotenv
+from api_clients import get_anthropic_client
+from stream_renderer import RENDER_MODES, JsonLinesRenderer, create_renderer
+from repetition import RepetitionDetector, REPETITION_POLICIES, MAX_CONTINUATIONS, continuation_params, policy_default
+from plan_cache import (PlanCache, PLAN_MODES, plan_mode_default, plan_from_content, planning_params,
+                        writing_params)
 
 # Load environment variables from .env file
 load_dotenv()
 
-def generate_novella(prompt, title=None, system_prompt=None, api_key=None):
+@tracing.traced("generate.request")
+def generate_novella(prompt, title=None, system_prompt=None, api_key=None, exporter=None, progress_callback=None,
+                     output_dir=None, metrics=None, repetition_policy=None, renderer=None, plan_mode=None,
+                     plan_cache=None, index_search=True):
     """
     Generate a novella using Claude 3.7 with extended thinking and output capabilities.
     
@@ -18,9 +26,32 @@ def generate_novella(prompt, title=None, system_prompt=None, api_key=None):
         title (str, optional): Title for the novella
         system_prompt (str, optional): Custom system prompt
         api_key (str, optional): Anthropic API key
+        exporter (ChapterStreamExporter, optional): Receives each streamed delta so finished
+            chapters can be exported and narrated before the stream ends
+        progress_callback (function, optional): Called as progress_callback(word_count, elapsed_seconds, stats)
+            about once a second, thinking phase included; stats is StreamProgress.snapshot()
+        output_dir (str, optional): Directory for the text file (default: the working directory)
+        metrics (dict, optional): Filled with ttft_seconds, thinking_seconds, first_text_seconds,
+            generation_seconds, output_tokens, words and tokens_per_sec when the generation completes,
+            plus repeated_tokens, repeated_seconds, loops_cut and continuations
+        repetition_policy (str, optional): What to do when the text loops: "off", "warn", "stop" or
+            "continue" (see repetition.py; default: NOVELLA_REPETITION_POLICY or "warn")
+        renderer (Renderer, optional): Terminal output (see stream_renderer.py; default: the
+            NOVELLA_PROGRESS mode, interactive on a terminal and quiet otherwise)
+        plan_mode (str, optional): Plan caching: "off", "save", "reuse" or "plan" (see plan_cache.py;
+            default: NOVELLA_PLAN_MODE or "off"); a reused plan skips the thinking phase
+        plan_cache (PlanCache, optional): Where plans are kept (default: .novella_cache/plans)
+        index_search (bool, optional): Add the finished file to the search index; off when
+            output_dir is a job's work directory and the caller indexes the published copy
     
     Returns:
         str: The generated novella
+    
+    Raises:
+        ValueError: No API key was given or found in the environment
+        KeyboardInterrupt: The user stopped the generation (the partial novella is saved first)
+        Exception: API and I/O errors, after they are reported through the renderer (queued
+            chapter exports are cancelled first)
     """
     # Use provided API key or try to get from environment
     if not api_key:
@@ -28,7 +59,8 @@ def generate_novella(prompt, title=None, system_prompt=None, api_key=None):
         if not api_key:
             raise ValueError("API key not provided and ANTHROPIC_API_KEY environment variable not set")
     
-    client = anthropic.Anthropic(api_key=api_key)
+    # Shared per key, so repeated generations reuse the same connection pool
+    client = get_anthropic_client(api_key)
     
     # Default system prompt if none provided
     if not system_prompt:
@@ -56,8 +88,10 @@ First, create a detailed plan in your thinking tokens (30k tokens budget) only t
 
 Then use the remaining ~100k output tokens to generate the complete novella. The actual output (as opposed to thinking tokens) should entirely be a novella, as it will be directly saved to a txt file and later converted into a pdf ebook"""
     
-    print("Generating novella with Claude 3.7... (this may take several minutes)")
-    print("Content will stream as it's generated. Press Ctrl+C to stop at any time.")
+    if renderer is None:
+        renderer = create_renderer()
+    renderer.message("Generating novella with Claude 3.7... (this may take several minutes)")
+    renderer.message("Content will stream as it's generated. Press Ctrl+C to stop at any time.")
     start_time = time.time()
     
     try:
@@ -85,75 +119,398 @@ Then use the remaining ~100k output tokens to generate the complete novella. The
             "betas": ["output-128k-2025-02-19"]
         }
         
+        # Draft from a cached plan (or an explicit planning request) instead of planning again
+        if plan_mode is None:
+            plan_mode = plan_mode_default()
+        plans = None
+        plan_key = None
+        plan = None
+        plan_reused = False
+        planning_tokens = 0
+        if plan_mode != "off":
+            plans = plan_cache or PlanCache()
+            plan_key = plans.make_key(params)
+            if plan_mode in ("reuse", "plan"):
+                plan = plans.get(plan_key)
+                if plan is None and plan_mode == "plan":
+                    plan = _plan_novella(client, params, prompt, plans, plan_key, renderer)
+                    planning_tokens = plan["output_tokens"] if plan else 0
+            if plan:
+                renderer.message(f"Writing from the cached plan {plan_key[:12]} "
+                                 f"({len(plan['plan'].split()):,} words, {plan['source']})")
+                params = writing_params(params, plan["plan"])
+                plan_reused = True
+        # Otherwise the thinking of this generation becomes the plan
+        save_plan = plans is not None and not plan_reused
+        
         # Initialize an empty string to collect the streamed content
         full_content = ""
-        filename = save_novella_partial("", title, initial=True)
+        filename = save_novella_partial("", title, initial=True, output_dir=output_dir)
         
-        with client.beta.messages.stream(**params) as stream:
-            try:
-                print("\nStreaming novella content (saving chunks to file as they arrive):")
-                print("-" * 50)
-                # Use a buffer to collect chunks before writing to file
-                buffer = ""
-                chunk_size = 5000  # Characters to collect before writing
-                word_count = 0
-                last_update_time = time.time()
-                update_interval = 5  # Update word count every 5 seconds
-                
-                for text in stream.text_stream:
-                    print(text, end="", flush=True)
-                    full_content += text
-                    buffer += text
-                    
-                    # Update word count at intervals
-                    current_time = time.time()
-                    if current_time - last_update_time >= update_interval:
-                        # Count words in current buffer
-                        current_words = count_words(full_content)
-                        # Update progress in terminal title bar
-                        sys.stdout.write(f"\033]0;Generating: {title} - {current_words} words\007")
-                        sys.stdout.flush()
-                        last_update_time = current_time
+        # Watch for repeated paragraphs and loops as the text streams
+        if repetition_policy is None:
+            repetition_policy = policy_default()
+        detector = RepetitionDetector() if repetition_policy != "off" else None
+        request_params = params
+        continuations = 0
+        loops_cut = 0
+        message = None
+        
+        # Use a buffer to collect chunks before writing to file
+        buffer = ""
+        chunk_size = 5000  # Characters to collect before writing
+        last_update_time = time.time()
+        update_interval = 1  # Report progress every second, thinking included
+        
+        progress = StreamProgress(start_time)
+        stream_times = progress.times
+        renderer.start(title, progress)
+        try:
+            while True:
+                loop = None
+                with client.beta.messages.stream(**request_params) as stream:
+                    for text in progress.follow(stream):
+                        if text:
+                            renderer.text(text)
+                            if save_plan:
+                                # The thinking is complete once the text starts: keep it as the plan
+                                save_plan = False
+                                plan = _save_plan(plans, plan_key, stream.current_message_snapshot, prompt,
+                                                  params["model"], progress.output_tokens, renderer)
+                            full_content += text
+                            buffer += text
+                            
+                            # Let finished chapters start exporting while the rest streams
+                            if exporter:
+                                exporter.feed(text)
+                            
+                            if detector:
+                                loop = _report_repetition(detector.feed(text), renderer)
+                                if loop and repetition_policy in ("stop", "continue"):
+                                    break
+                                loop = None
+                        else:
+                            renderer.tick()
+                        
+                        # Report progress at intervals, from the stream's own counts
+                        current_time = time.time()
+                        if current_time - last_update_time >= update_interval:
+                            if progress_callback:
+                                progress_callback(progress.words, current_time - start_time, progress.snapshot())
+                            last_update_time = current_time
+                        
+                        # When buffer reaches threshold, write to file
+                        if len(buffer) >= chunk_size:
+                            with tracing.span("generate.flush", chars=len(buffer)):
+                                save_novella_partial(buffer, title, output_dir=output_dir)
+                            buffer = ""  # Reset buffer after writing
                     
-                    # When buffer reaches threshold, write to file
-                    if len(buffer) >= chunk_size:
-                        save_novella_partial(buffer, title)
-                        buffer = ""  # Reset buffer after writing
-                
-                # Save any remaining text in buffer
-                if buffer:
-                    save_novella_partial(buffer, title)
-                
-                # Add final marker
-                save_novella_partial("", title, final=True)
+                    if loop is None:
+                        message = stream.get_final_message()
                 
-                # Final word count
-                final_word_count = count_words(full_content)
-                sys.stdout.write(f"\033]0;Completed: {title} - {final_word_count} words\007")
-                sys.stdout.flush()
+                if loop is None:
+                    break
                 
-                message = stream.get_final_message()
+                # Leaving the stream closed the connection, so the loop stops costing tokens;
+                # cut the repeated run from the text, the file and the chapter exporter
+                loops_cut += 1
+                continuing = repetition_policy == "continue" and continuations < MAX_CONTINUATIONS
+                cut = loop["loop_start"]
+                if not continuing:
+                    # Nothing follows, so drop the paragraph break too
+                    cut = len(full_content[:cut].rstrip())
+                removed = full_content[cut:]
+                full_content = full_content[:cut]
+                buffer = _discard_text(filename, buffer, removed)
+                if exporter:
+                    exporter.discard(len(removed))
+                progress.discard_text(full_content)
+                detector.rewind(full_content)
                 
-                elapsed_time = time.time() - start_time
-                print(f"\n\nNovella generated in {elapsed_time:.2f} seconds")
-                print(f"Final word count: {final_word_count}")
-                
-                return message.content, title
+                if continuing:
+                    continuations += 1
+                    renderer.event("loop_cut", f"Loop cut ({len(removed)} characters); asking Claude to continue "
+                                   "without repeating", chars=len(removed), action="continue")
+                    request_params = continuation_params(params, full_content, loop)
+                    progress.next_request()
+                    continue
+                renderer.event("loop_cut", f"Loop cut ({len(removed)} characters); stopping the generation",
+                               chars=len(removed), action="stop")
+                message = None
+                break
             
-            except KeyboardInterrupt:
-                print("\n\nGeneration stopped by user.")
-                # Save any remaining text in buffer
-                if buffer:
-                    save_novella_partial(buffer, title)
-                
-                # Add final interrupted marker
-                save_novella_partial("", title, final=True, interrupted=True)
-                print(f"Partial novella saved to file: {filename}")
-                sys.exit(0)
+            _record_stream_spans(stream_times, start_time, time.time(), len(full_content))
+            
+            # Save any remaining text in buffer
+            if buffer:
+                with tracing.span("generate.flush", chars=len(buffer)):
+                    save_novella_partial(buffer, title, output_dir=output_dir)
+            
+            # Add final marker
+            with tracing.span("generate.finalize"):
+                save_novella_partial("", title, final=True, output_dir=output_dir,
+                                     index_search=index_search)
+            
+            # Final word count
+            final_word_count = count_words(full_content)
+            elapsed_time = time.time() - start_time
+            
+            # Tokens of every request, exact for each one that ran to completion
+            output_tokens = progress.output_tokens
+            repetition_metrics = {}
+            if detector:
+                repetition_metrics = {
+                    "repetition_policy": repetition_policy,
+                    "repeated_tokens": int(detector.repeated_chars / CHARS_PER_TOKEN),
+                    "repeated_seconds": detector.repeated_seconds,
+                    "loops_cut": loops_cut,
+                    "continuations": continuations
+                }
+            plan_metrics = {}
+            if plans:
+                plan_metrics = {"plan_mode": plan_mode, "plan_key": plan_key,
+                                "plan_source": plan["source"] if plan else None,
+                                "plan_reused": plan_reused, "planning_tokens": planning_tokens}
+            renderer.finish({"seconds": elapsed_time, "words": final_word_count, "output_tokens": output_tokens,
+                             **repetition_metrics, **plan_metrics})
+            if detector and detector.findings:
+                renderer.message(f"Repeated text: about {repetition_metrics['repeated_tokens']} tokens "
+                                 f"({detector.repeated_seconds / 60:.1f} minutes of streaming)")
+            
+            tracing.annotate(model=params["model"], output_tokens=output_tokens, words=final_word_count,
+                             **repetition_metrics, **plan_metrics)
+            if metrics is not None:
+                metrics.update(stream_metrics(stream_times, start_time, elapsed_time, output_tokens,
+                                              final_word_count))
+                metrics.update(repetition_metrics)
+                metrics.update(plan_metrics)
+            
+            # The last response alone is not the novella once text was cut or continued
+            if message is None or loops_cut:
+                return [{"type": "text", "text": full_content}], title
+            return message.content, title
+        
+        except KeyboardInterrupt:
+            _record_stream_spans(stream_times, start_time, time.time(), len(full_content), interrupted=True)
+            renderer.close()
+            renderer.message("\n\nGeneration stopped by user.")
+            if exporter:
+                exporter.cancel()
+            # Save any remaining text in buffer
+            if buffer:
+                save_novella_partial(buffer, title, output_dir=output_dir)
+            
+            # Add final interrupted marker
+            save_novella_partial("", title, final=True, interrupted=True, output_dir=output_dir,
+                                 index_search=index_search)
+            renderer.message(f"Partial novella saved to file: {filename}")
+            raise
     
     except Exception as e:
-        print(f"Error generating novella: {e}")
-        sys.exit(1)
+        renderer.close()
+        renderer.message(f"Error generating novella: {e}")
+        # Don't keep narrating and rendering chapters of a failed generation
+        if exporter:
+            exporter.cancel()
+        raise
+
+@tracing.traced("generate.plan")
+def _plan_novella(client, params, prompt, plans, plan_key, renderer):
+    """
+    Make an explicit planning request and cache its plan
+
+    Returns:
+        dict: The cached plan entry, or None if the response had no plan
+    """
+    renderer.message("Planning the novella (the plan is cached for later drafts)...")
+    start_time = time.time()
+    with client.beta.messages.stream(**planning_params(params)) as stream:
+        message = stream.get_final_message()
+    text = plan_from_content(message.content, "text") or plan_from_content(message.content)
+    tracing.annotate(output_tokens=message.usage.output_tokens, seconds=time.time() - start_time)
+    if not text:
+        return None
+    return plans.put(plan_key, text, "planning", prompt=prompt, model=params["model"],
+                     output_tokens=message.usage.output_tokens)
+
+def _save_plan(plans, plan_key, snapshot, prompt, model, output_tokens, renderer):
+    """
+    Cache the thinking of a generation as its plan
+
+    Returns:
+        dict: The cached plan entry, or None if there was no thinking to keep
+    """
+    text = plan_from_content(snapshot.content)
+    if not text:
+        return None
+    try:
+        return plans.put(plan_key, text, "thinking", prompt=prompt, model=model, output_tokens=output_tokens)
+    except OSError as e:
+        renderer.message(f"Could not cache the plan: {e}")
+        return None
+
+def _report_repetition(findings, renderer):
+    """Report repeated passages as they are found; returns the first one that is a loop (or None)"""
+    loop = None
+    for finding in findings:
+        kind = "Loop" if finding["loop"] else "Repeated passage"
+        renderer.event("repetition", f"{kind}: {finding['similarity']:.0%} already written: "
+                       f"\"{finding['excerpt'][:60]}...\"", **finding)
+        if finding["loop"] and loop is None:
+            loop = finding
+    return loop
+
+def _discard_text(filename, buffer, removed):
+    """
+    Take text back from the end of a partial novella: from the write buffer first, then from the file
+
+    Returns:
+        str: The remaining buffer
+    """
+    if len(removed) <= len(buffer):
+        return buffer[:len(buffer) - len(removed)]
+    written = removed[:len(removed) - len(buffer)]
+    os.truncate(filename, os.path.getsize(filename) - len(written.encode('utf-8')))
+    return ""
+
+# Rough characters per output token, to estimate tokens between the API's usage reports
+CHARS_PER_TOKEN = 3.8
+
+class StreamProgress:
+    """
+    Progress of a streamed generation, taken from the stream's own events.
+
+    The API reports exact output usage in message_start and message_delta
+    events; until the final report the token count is estimated from the size
+    of the thinking and text deltas received, never below the last report.
+    Words are counted incrementally from the text deltas, so no tokenizer or
+    full-text scan runs on the streaming path. A generation may span several
+    requests (continuations); tokens of the earlier ones are carried over.
+    """
+
+    def __init__(self, start_time=None):
+        self.start_time = start_time or time.time()
+        self.times = {}
+        self.phase = "waiting"
+        self.thinking_chars = 0
+        self.text_chars = 0
+        self.reported_tokens = 0
+        self.final_usage = False
+        self.words = 0
+        self._in_word = False
+        self._carried_tokens = 0
+        self._request_chars = 0
+
+    def follow(self, stream):
+        """
+        Yield a message stream's text deltas, updating the progress from every event
+
+        Yields None for events without text (thinking, usage...) so the caller
+        can report progress while the model is still thinking.
+        """
+        for event in stream:
+            now = time.time()
+            if event.type == "thinking":
+                self.times.setdefault("first_token", now)
+                self.times.setdefault("thinking_start", now)
+                self.times["thinking_end"] = now
+                self.phase = "thinking"
+                self.thinking_chars += len(event.thinking)
+                yield None
+            elif event.type == "text":
+                self.times.setdefault("first_token", now)
+                self.times.setdefault("first_text", now)
+                self.phase = "writing"
+                self.text_chars += len(event.text)
+                self._count_words(event.text)
+                yield event.text
+            elif event.type == "message_start":
+                self.reported_tokens = event.message.usage.output_tokens or 0
+                yield None
+            elif event.type == "message_delta":
+                self.reported_tokens = event.usage.output_tokens or self.reported_tokens
+                self.final_usage = True
+                yield None
+        self.phase = "done"
+
+    def _count_words(self, text):
+        """Add the words of a delta, joining words split across deltas"""
+        parts = text.split()
+        if not parts:
+            self._in_word = False
+            return
+        self.words += len(parts)
+        if self._in_word and not text[0].isspace():
+            self.words -= 1
+        self._in_word = not text[-1].isspace()
+
+    def discard_text(self, kept_text):
+        """Recount words after text was cut from the end (the tokens were still spent)"""
+        self.words = len(kept_text.split())
+        self._in_word = bool(kept_text) and not kept_text[-1].isspace()
+
+    def next_request(self):
+        """Start following a continuation request, carrying the tokens spent so far"""
+        self._carried_tokens = self.output_tokens
+        self._request_chars = self.thinking_chars + self.text_chars
+        self.reported_tokens = 0
+        self.final_usage = False
+
+    @property
+    def thinking_tokens(self):
+        return int(self.thinking_chars / CHARS_PER_TOKEN)
+
+    @property
+    def output_tokens(self):
+        """Output tokens so far, thinking included (exact once the final usage has arrived)"""
+        if self.final_usage:
+            return self._carried_tokens + self.reported_tokens
+        request_chars = self.thinking_chars + self.text_chars - self._request_chars
+        return self._carried_tokens + max(self.reported_tokens, int(request_chars / CHARS_PER_TOKEN))
+
+    def snapshot(self):
+        """Progress numbers for callbacks and job status"""
+        elapsed = time.time() - self.start_time
+        first_text = self.times.get("first_text")
+        return {
+            "phase": self.phase,
+            "output_tokens": self.output_tokens,
+            "thinking_tokens": self.thinking_tokens,
+            "text_tokens": int(self.text_chars / CHARS_PER_TOKEN),
+            "words": self.words,
+            "tokens_per_sec": self.output_tokens / elapsed if elapsed > 0 else 0.0,
+            "first_text_seconds": first_text - self.start_time if first_text else None,
+            "estimated": not self.final_usage
+        }
+
+def _record_stream_spans(times, start_time, end_time, chars, interrupted=False):
+    """Trace the phases of a message stream: time to first token, thinking and text streaming"""
+    if not tracing.enabled():
+        return
+    tracing.record_span("generate.ttft", start_time, times.get("first_token"))
+    if "thinking_start" in times:
+        tracing.record_span("generate.thinking", times["thinking_start"],
+                            times.get("first_text", times["thinking_end"]))
+    tracing.record_span("generate.text_stream", times.get("first_text"), end_time, chars=chars,
+                        interrupted=interrupted)
+
+def stream_metrics(times, start_time, elapsed_time, output_tokens, words):
+    """Run metrics for the metrics store from the stream timestamps"""
+    thinking_seconds = None
+    if "thinking_start" in times:
+        thinking_seconds = times.get("first_text", times["thinking_end"]) - times["thinking_start"]
+    first_text_seconds = times["first_text"] - start_time if "first_text" in times else None
+    return {
+        "ttft_seconds": times["first_token"] - start_time if "first_token" in times else None,
+        "thinking_seconds": thinking_seconds,
+        "first_text_seconds": first_text_seconds,
+        "generation_seconds": elapsed_time,
+        "output_tokens": output_tokens,
+        "words": words,
+        # Output tokens include thinking; rate over the whole stream
+        "tokens_per_sec": output_tokens / elapsed_time if elapsed_time > 0 else None,
+        "text_seconds": elapsed_time - first_text_seconds if first_text_seconds is not None else None
+    }
 
 def count_words(text):
     """Count the number of words in the text"""
@@ -189,14 +546,20 @@ def count_words(text):
     
     return len(words)
 
-def save_novella_partial(content, title=None, initial=False, final=False, interrupted=False):
-    """Save partial novella content to a file"""
+def save_novella_partial(content, title=None, initial=False, final=False, interrupted=False, output_dir=None,
+                         index_search=True):
+    """
+    Save partial novella content to a file (in output_dir, default the working directory)
+
+    A final save also writes the chapter index and, unless index_search is off, adds
+    the file to the search index.
+    """
     if not title:
         title = "generated_novella"
     
     # Clean filename - replace spaces with underscores and remove special characters
     filename = "".join(c if c.isalnum() else "_" for c in title)
-    filename = f"{filename}.txt"
+    filename = os.path.join(output_dir or "", f"{filename}.txt")
     
     mode = "w" if initial else "a"
     
@@ -218,14 +581,36 @@ def save_novella_partial(content, title=None, initial=False, final=False, interr
         else:
             file.write(content)
     
+    # Index chapter offsets once the file is complete
+    if final:
+        write_chapter_index(filename)
+        if index_search:
+            update_search_index(filename)
+    
     return filename
 
+def write_chapter_index(txt_filename):
+    """Write the chapter offset index sidecar (.idx) for a finished novella file"""
+    try:
+        from chapter_index import build_index
+        build_index(txt_filename)
+    except Exception as e:
+        print(f"Could not write chapter index for {txt_filename}: {e}")
+
+def update_search_index(txt_filename):
+    """Add a finished novella to the full-text search index, if one has been built"""
+    try:
+        from search_index import index_saved_book
+        index_saved_book(txt_filename)
+    except Exception as e:
+        print(f"Could not update search index for {txt_filename}: {e}")
+
 def convert_to_pdf(txt_filename, title):
     """Convert a text file to PDF format"""
     # Import from separate module to avoid encoding issues
     try:
-        from convert_pdf import create_ebook_pdf
-        return create_ebook_pdf(txt_filename, title)
+        from export_pipeline import export_pdf
+        return export_pdf(txt_filename, title)
     except ImportError:
         print("Error: convert_pdf.py module not found.")
         print("Please make sure convert_pdf.py is in the same directory.")
@@ -234,8 +619,8 @@ def convert_to_pdf(txt_filename, title):
 def convert_to_epub(txt_filename, title, author="Generated with Claude 3.7"):
     """Convert a text file to EPUB format for e-readers including Amazon KDP"""
     try:
-        from convert_epub import convert_to_epub
-        return convert_to_epub(txt_filename, title, author)
+        from export_pipeline import export_epub
+        return export_epub(txt_filename, title, author)
     except ImportError:
         print("Error: convert_epub.py module not found.")
         print("Please make sure convert_epub.py is in the same directory.")
@@ -269,17 +654,16 @@ def save_novella(content, title=None, generate_epub=False, author=None):
         file.write("\n\n--- END OF NOVELLA ---\n")
         file.write(f"--- WORD COUNT: {word_count} ---\n")
     
-    # Convert to PDF
-    pdf_filename = convert_to_pdf(filename, title)
+    write_chapter_index(filename)
+    update_search_index(filename)
     
-    # Convert to EPUB if requested
-    epub_filename = None
-    if generate_epub:
-        if not author:
-            author = "Generated with Claude 3.7"
-        epub_filename = convert_to_epub(filename, title, author)
+    # Convert to PDF (and EPUB if requested) concurrently
+    from export_pipeline import export_all
+    if not author:
+        author = "Generated with Claude 3.7"
+    results, _ = export_all(filename, title, pdf=True, epub=generate_epub, author=author)
     
-    return filename, pdf_filename, epub_filename
+    return filename, results.get("pdf"), results.get("epub")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate a novella using Claude 3.7")
@@ -289,6 +673,18 @@ if __name__ == "__main__":
     parser.add_argument("--no-pdf", action="store_true", help="Skip PDF generation")
     parser.add_argument("--epub", action="store_true", help="Generate EPUB format (for Amazon KDP)")
     parser.add_argument("--author", type=str, help="Author name for EPUB metadata", default="Generated with Claude 3.7")
+    parser.add_argument("--audio", action="store_true", help="Narrate an audiobook while generating (needs OPENAI_API_KEY)")
+    parser.add_argument("--voice", type=str, help="Voice for the audiobook", default=None)
+    parser.add_argument("--on-repetition", type=str, choices=REPETITION_POLICIES, default=None,
+                        help="When the text loops: warn, stop, or continue with a corrective request (default: warn)")
+    parser.add_argument("--progress", type=str, choices=RENDER_MODES, default=None,
+                        help="Output: interactive text with a status line, quiet summary lines, or jsonl records "
+                             "(default: NOVELLA_PROGRESS, else interactive on a terminal and quiet otherwise)")
+    parser.add_argument("--progress-interval", type=float, default=None,
+                        help="Seconds between quiet/jsonl progress lines")
+    parser.add_argument("--plan", type=str, choices=PLAN_MODES, default=None,
+                        help="Plan caching: save the plan, reuse a cached plan for another draft of the same prompt, "
+                             "or plan with a separate request first (default: NOVELLA_PLAN_MODE, else off)")
     
     args = parser.parse_args()
     
@@ -310,7 +706,30 @@ if __name__ == "__main__":
             print("\nNo input detected. Using default title.")
             title = "Generated_Novella"
     
-    content, _ = generate_novella(prompt, title, api_key=args.api_key)
+    renderer = create_renderer(args.progress, interval=args.progress_interval)
+    if isinstance(renderer, JsonLinesRenderer):
+        # Keep stdout for the JSON records; anything else printed goes to stderr
+        sys.stdout = sys.stderr
+    
+    # Render EPUB chapters and narrate audio as chapters finish streaming
+    from speculative_export import ChapterStreamExporter
+    exporter = ChapterStreamExporter(title, epub=args.epub, audio=args.audio, voice=args.voice)
+    
+    run_metrics = {}
+    run_start = time.time()
+    try:
+        content, _ = generate_novella(prompt, title, api_key=args.api_key, exporter=exporter, metrics=run_metrics,
+                                      repetition_policy=args.on_repetition, renderer=renderer, plan_mode=args.plan)
+    except KeyboardInterrupt:
+        sys.exit(0)
+    except ValueError as e:
+        # Missing API key, raised before generation starts
+        print(f"Error: {e}")
+        sys.exit(1)
+    except Exception:
+        # Already reported by generate_novella
+        sys.exit(1)
+    speculative = exporter.finish()
     
     # Process the generated content
     txt_filename = "".join(c if c.isalnum() else "_" for c in title) + ".txt"
@@ -320,23 +739,32 @@ if __name__ == "__main__":
         text = file.read()
         word_count = count_words(text)
     
-    print(f"\nNovella has been saved to '{txt_filename}'")
-    print(f"Total word count: {word_count}")
+    renderer.message(f"\nNovella has been saved to '{txt_filename}'")
+    renderer.message(f"Total word count: {word_count}")
     
-    # Generate PDF if not disabled
-    if not args.no_pdf:
-        try:
-            pdf_filename = convert_to_pdf(txt_filename, title)
-            print(f"PDF version saved to '{pdf_filename}'")
-        except Exception as e:
-            print(f"Error generating PDF: {e}")
-            print("The text version is still available.")
-    
-    # Generate EPUB if requested
-    if args.epub:
-        try:
-            epub_filename = convert_to_epub(txt_filename, title, args.author)
-            print(f"EPUB version saved to '{epub_filename}' (KDP-compatible)")
-        except Exception as e:
-            print(f"Error generating EPUB: {e}")
-            print("The text version is still available.")
+    # Generate PDF and/or EPUB concurrently
+    if not args.no_pdf or args.epub:
+        from export_pipeline import export_all
+        results, timings = export_all(txt_filename, title, pdf=not args.no_pdf, epub=args.epub, author=args.author,
+                                      rendered_chapters=speculative["rendered_chapters"])
+        
+        if not args.no_pdf:
+            if results.get("pdf"):
+                renderer.message(f"PDF version saved to '{results['pdf']}'")
+            else:
+                renderer.message("The text version is still available.")
+        
+        if args.epub:
+            if results.get("epub"):
+                renderer.message(f"EPUB version saved to '{results['epub']}' (KDP-compatible)")
+            else:
+                renderer.message("The text version is still available.")
+    
+    if speculative["audiobook"]:
+        renderer.message(f"Audiobook saved to '{speculative['audiobook']}'")
+    
+    # Keep the run's numbers for the performance dashboard
+    from metrics_store import record_run
+    record_run("generate", title, started_at=run_start, total_seconds=time.time() - run_start,
+               stage_timings=timings if not args.no_pdf or args.epub else None,
+               tts_latencies=speculative["tts_latencies"], **run_metrics)
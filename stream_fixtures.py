@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Record and replay Anthropic streams and OpenAI TTS responses as fixture files.
+
+    record   Run a recording proxy in front of the real APIs; point the SDKs at it
+             (ANTHROPIC_BASE_URL / OPENAI_BASE_URL) and every streamed event and
+             TTS response is saved to the fixture directory while passing through.
+    replay   Serve a fixture directory from a local mock server at real or
+             accelerated speed.
+    e2e      Run generation, progress monitoring, export and audio assembly
+             offline against a fixture directory and report the timings.
+
+Fixture directory layout:
+    messages_001.jsonl   One streamed generation: {"t": seconds since request, "event", "data"} per line
+    speech.jsonl         One line per TTS response: {"file", "seconds", "chars"}
+    speech_001.mp3       TTS response bodies
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import threading
+import http.client
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mock_api import MockApiServer
+
+ANTHROPIC_UPSTREAM = "https://api.anthropic.com"
+OPENAI_UPSTREAM = "https://api.openai.com"
+
+# Request headers that must not be forwarded as-is
+HOP_BY_HOP = {"host", "connection", "content-length", "accept-encoding", "keep-alive", "transfer-encoding"}
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """Forwards /v1/messages and /v1/audio/speech upstream and records the responses"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path
+        upstream = self.server.openai_upstream if "/audio/" in path else self.server.anthropic_upstream
+        url = urllib.parse.urlsplit(upstream)
+        connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(url.netloc, timeout=600)
+        headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP}
+        headers["Accept-Encoding"] = "identity"
+
+        start_time = time.time()
+        connection.request("POST", url.path.rstrip("/") + path, body=body, headers=headers)
+        response = connection.getresponse()
+        try:
+            if response.status == 200 and response.getheader("Content-Type", "").startswith("text/event-stream"):
+                self._relay_stream(response, start_time)
+            else:
+                data = response.read()
+                if response.status == 200 and "/audio/speech" in path:
+                    self._record_speech(data, time.time() - start_time, body)
+                self.send_response(response.status)
+                for name, value in response.getheaders():
+                    if name.lower() not in HOP_BY_HOP:
+                        self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        finally:
+            connection.close()
+
+    def _relay_stream(self, response, start_time):
+        """Pass SSE lines through as they arrive, logging each event with its arrival time"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        events = []
+        event = None
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            self.wfile.write(line)
+            self.wfile.flush()
+            text = line.decode('utf-8').rstrip("\r\n")
+            if text.startswith("event:"):
+                event = text[6:].strip()
+            elif text.startswith("data:"):
+                events.append({"t": round(time.time() - start_time, 4), "event": event,
+                               "data": json.loads(text[5:].strip())})
+        self.server.save_messages(events)
+
+    def _record_speech(self, data, seconds, request_body):
+        try:
+            chars = len(json.loads(request_body).get("input", ""))
+        except ValueError:
+            chars = None
+        self.server.save_speech(data, seconds, chars)
+
+    def log_message(self, format, *args):
+        pass
+
+class RecordingProxy(ThreadingHTTPServer):
+    """Recording proxy writing fixtures to a directory"""
+
+    daemon_threads = True
+
+    def __init__(self, fixture_dir, host="127.0.0.1", port=0,
+                 anthropic_upstream=ANTHROPIC_UPSTREAM, openai_upstream=OPENAI_UPSTREAM):
+        super().__init__((host, port), RecordingHandler)
+        self.fixture_dir = fixture_dir
+        self.anthropic_upstream = anthropic_upstream
+        self.openai_upstream = openai_upstream
+        self.lock = threading.Lock()
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def _next_name(self, pattern):
+        return pattern % (len(glob.glob(os.path.join(self.fixture_dir, pattern.replace("%03d", "*")))) + 1)
+
+    def save_messages(self, events):
+        with self.lock:
+            path = os.path.join(self.fixture_dir, self._next_name("messages_%03d.jsonl"))
+            with open(path, 'w', encoding='utf-8') as file:
+                for event in events:
+                    file.write(json.dumps(event) + "\n")
+        print(f"Recorded {len(events)} stream events to {path}")
+
+    def save_speech(self, data, seconds, chars):
+        with self.lock:
+            name = self._next_name("speech_%03d.mp3")
+            with open(os.path.join(self.fixture_dir, name), 'wb') as file:
+                file.write(data)
+            with open(os.path.join(self.fixture_dir, "speech.jsonl"), 'a', encoding='utf-8') as file:
+                file.write(json.dumps({"file": name, "seconds": round(seconds, 4), "chars": chars}) + "\n")
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def load_fixtures(fixture_dir):
+    """
+    Read a fixture directory
+
+    Returns:
+        tuple: (list of recorded streams, each a list of events; list of speech entries with 'body' bytes)
+    """
+    streams = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "messages_*.jsonl"))):
+        with open(path, 'r', encoding='utf-8') as file:
+            streams.append([json.loads(line) for line in file if line.strip()])
+    speech = []
+    speech_index = os.path.join(fixture_dir, "speech.jsonl")
+    if os.path.exists(speech_index):
+        with open(speech_index, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    with open(os.path.join(fixture_dir, entry["file"]), 'rb') as audio:
+                        entry["body"] = audio.read()
+                    speech.append(entry)
+    if not streams:
+        raise FileNotFoundError(f"No recorded streams (messages_*.jsonl) in {fixture_dir}")
+    return streams, speech
+
+def replay_server(fixture_dir, speed=1.0, host="127.0.0.1", port=0):
+    """
+    Mock server that plays back a fixture directory
+
+    Recorded streams are served round-robin with their original inter-event
+    gaps divided by speed (0 sends everything at once); TTS requests get the
+    recorded responses round-robin after their recorded latency / speed.
+
+    Returns:
+        MockApiServer: The (not yet started) server
+    """
+    streams, speech = load_fixtures(fixture_dir)
+
+    def events(seed, request):
+        previous = 0.0
+        for event in streams[(seed - 1) % len(streams)]:
+            delay = (event["t"] - previous) / speed if speed else 0.0
+            previous = event["t"]
+            yield delay, event["event"], event["data"]
+
+    speech_responder = None
+    if speech:
+        def speech_responder(number, request):
+            entry = speech[(number - 1) % len(speech)]
+            return (entry["seconds"] / speed if speed else 0.0), entry["body"]
+
+    return MockApiServer(host, port, events=events, speech=speech_responder)
+
+def run_e2e(fixture_dir, speed=0.0, audio=True, workdir=None):
+    """
+    Generate, monitor, export and narrate one novella against replayed fixtures
+
+    Returns:
+        dict: Job status, progress update count, artifacts and timings
+    """
+    import tempfile
+
+    server = replay_server(fixture_dir, speed).start()
+    workdir = workdir or tempfile.mkdtemp(prefix="novella_e2e_")
+    os.environ.update({
+        "ANTHROPIC_BASE_URL": server.base_url,
+        "OPENAI_BASE_URL": f"{server.base_url}/v1",
+        "NOVELLA_WORKSPACE_ROOT": os.path.join(workdir, "workspaces"),
+        "NOVELLA_CACHE_DIR": os.path.join(workdir, "cache"),
+        "NOVELLA_METRICS_DB": os.path.join(workdir, "metrics.db")
+    })
+    from job_manager import JobManager, run_generation_job
+
+    manager = JobManager(max_workers=1)
+    start_time = time.time()
+    job_id = manager.submit("generate", run_generation_job, "Replay", "Replay Fixture",
+                            api_key="fixture-anthropic-key", openai_api_key="fixture-openai-key",
+                            generate_audio=audio, title="Replay Fixture")
+    updates = 0
+    snapshot = manager.get(job_id)
+    while snapshot["status"] not in ("completed", "failed"):
+        snapshot = manager.wait_for_change(job_id, snapshot["version"], timeout=60)
+        updates += 1
+    server.shutdown()
+    return {
+        "status": snapshot["status"],
+        "error": snapshot["error"],
+        "seconds": time.time() - start_time,
+        "progress_updates": updates,
+        "metrics": snapshot["metrics"],
+        "artifacts": {name: path for name, path in snapshot["artifacts"].items() if isinstance(path, str)},
+        "requests": dict(server.requests)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and replay API fixtures for offline runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Run a recording proxy")
+    record_parser.add_argument("fixture_dir", type=str)
+    record_parser.add_argument("--port", type=int, default=8701)
+    record_parser.add_argument("--anthropic-upstream", type=str, default=ANTHROPIC_UPSTREAM)
+    record_parser.add_argument("--openai-upstream", type=str, default=OPENAI_UPSTREAM)
+
+    replay_parser = subparsers.add_parser("replay", help="Serve recorded fixtures")
+    replay_parser.add_argument("fixture_dir", type=str)
+    replay_parser.add_argument("--port", type=int, default=8700)
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Playback speed (0 = no delays)")
+
+    e2e_parser = subparsers.add_parser("e2e", help="Run the whole pipeline offline against fixtures")
+    e2e_parser.add_argument("fixture_dir", type=str)
+    e2e_parser.add_argument("--speed", type=float, default=0.0, help="Playback speed (0 = no delays)")
+    e2e_parser.add_argument("--no-audio", action="store_true", help="Skip narration")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        proxy = RecordingProxy(args.fixture_dir, port=args.port, anthropic_upstream=args.anthropic_upstream,
+                               openai_upstream=args.openai_upstream)
+        print(f"Recording to {args.fixture_dir} via {proxy.base_url}")
+        print(f"  export ANTHROPIC_BASE_URL={proxy.base_url} OPENAI_BASE_URL={proxy.base_url}/v1")
+        try:
+            proxy.serve_forever()
+        except KeyboardInterrupt:
+            proxy.server_close()
+    elif args.command == "replay":
+        try:
+            server = replay_server(args.fixture_dir, args.speed, port=args.port)
+        except FileNotFoundError as e:
+            print(e)
+            sys.exit(1)
+        print(f"Replaying {args.fixture_dir} at {server.base_url} (speed {args.speed or 'unlimited'})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    elif args.command == "e2e":
+        try:
+            result = run_e2e(args.fixture_dir, args.speed, audio=not args.no_audio)
+        except FileNotFoundError as e:
+            print(e)
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["status"] == "completed" else 1)
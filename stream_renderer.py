@@ -0,0 +1,264 @@
+"""
+Terminal output for streamed generations.
+
+generate_novella() reports through a renderer instead of printing every
+delta. Three modes:
+
+- interactive: the text as it streams, written at most FRAME_RATE times a
+  second, with a live status line (phase, words, tokens/s, ETA) pinned to the
+  bottom row of the terminal
+- quiet: no novella text, one summary line every QUIET_INTERVAL seconds
+- jsonl: one JSON object per line (start, progress, event, message, done)
+  for orchestration
+
+"auto" picks interactive on a terminal and quiet otherwise.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+
+RENDER_MODES = ("auto", "interactive", "quiet", "jsonl")
+
+# Redraws per second in interactive mode
+FRAME_RATE = 10
+
+# Seconds between summary lines (quiet) and progress records (jsonl)
+QUIET_INTERVAL = 30
+JSONL_INTERVAL = 5
+
+# Output tokens of a typical novella (thinking included), for the ETA
+EXPECTED_OUTPUT_TOKENS = 100000
+
+def mode_default():
+    """Render mode from NOVELLA_PROGRESS, or "auto" """
+    mode = os.environ.get("NOVELLA_PROGRESS", "auto").strip().lower()
+    return mode if mode in RENDER_MODES else "auto"
+
+def create_renderer(mode=None, stream=None, interval=None):
+    """
+    Build the renderer for a mode
+
+    Args:
+        mode (str, optional): One of RENDER_MODES (default: mode_default())
+        stream (file, optional): Output stream (default: sys.stdout)
+        interval (float, optional): Seconds between quiet/jsonl progress lines
+
+    Returns:
+        Renderer: The renderer
+    """
+    stream = stream or sys.stdout
+    mode = mode or mode_default()
+    if mode == "auto":
+        mode = "interactive" if stream.isatty() and os.environ.get("TERM") != "dumb" else "quiet"
+    if mode == "interactive":
+        return InteractiveRenderer(stream)
+    if mode == "jsonl":
+        return JsonLinesRenderer(stream, interval or JSONL_INTERVAL)
+    return QuietRenderer(stream, interval or QUIET_INTERVAL)
+
+def _duration(seconds):
+    """Compact duration: 45s, 12m05s, 1h02m"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+class Renderer:
+    """
+    Base renderer: tracks timing and builds the status from a StreamProgress.
+
+    Subclasses decide what reaches the output and when.
+    """
+
+    def __init__(self, stream, interval, expected_tokens=EXPECTED_OUTPUT_TOKENS):
+        self.stream = stream
+        self.interval = interval
+        self.expected_tokens = expected_tokens
+        self.title = None
+        self.progress = None
+        self._next_update = 0.0
+
+    def start(self, title, progress):
+        """
+        Begin rendering a generation
+
+        Args:
+            title (str): Novella title
+            progress (StreamProgress): Progress of the stream, read at each update
+        """
+        self.title = title
+        self.progress = progress
+        self._next_update = time.time() + self.interval
+
+    def text(self, delta):
+        """A streamed text delta"""
+        self.tick()
+
+    def tick(self):
+        """Called for every stream event; updates when the interval has passed"""
+        now = time.time()
+        if now >= self._next_update:
+            self._next_update = now + self.interval
+            self.update(now)
+
+    def update(self, now):
+        """Show the current progress"""
+
+    def status(self, now=None):
+        """Progress snapshot plus elapsed seconds and an ETA (None until text streams)"""
+        stats = self.progress.snapshot()
+        stats["elapsed"] = (now or time.time()) - self.progress.start_time
+        rate = stats["tokens_per_sec"]
+        stats["eta_seconds"] = None
+        if stats["phase"] == "writing" and rate > 0:
+            stats["eta_seconds"] = max(0.0, (self.expected_tokens - stats["output_tokens"]) / rate)
+        return stats
+
+    def status_line(self, now=None):
+        stats = self.status(now)
+        eta = f", ETA {_duration(stats['eta_seconds'])}" if stats["eta_seconds"] else ""
+        return (f"{stats['phase'].capitalize()} {_duration(stats['elapsed'])}: {stats['words']:,} words, "
+                f"{stats['output_tokens']:,} tokens, {stats['tokens_per_sec']:.0f} tok/s{eta}")
+
+    def message(self, text):
+        """An informational line"""
+        self._write_line(text)
+
+    def event(self, name, text, **data):
+        """
+        Something notable happened (a repeated passage, a loop cut...)
+
+        Args:
+            name (str): Event name
+            text (str): Human-readable description
+            **data: Details for machine-readable output
+        """
+        self._write_line(f"[{text}]")
+
+    def finish(self, summary):
+        """
+        The generation ended
+
+        Args:
+            summary (dict): Final numbers (seconds, words, output_tokens...)
+        """
+        self._write_line(f"Novella generated in {summary['seconds']:.2f} seconds")
+        self._write_line(f"Final word count: {summary['words']}")
+
+    def close(self):
+        """Restore the terminal; safe to call more than once"""
+
+    def _write_line(self, text):
+        self.stream.write(text + "\n")
+        self.stream.flush()
+
+class InteractiveRenderer(Renderer):
+    """
+    Streams the text with a status line pinned to the bottom row.
+
+    Deltas are buffered and written once per frame; the status line lives
+    outside a scroll region covering the rest of the screen, so the text
+    scrolls above it without being redrawn.
+    """
+
+    def __init__(self, stream, frame_rate=FRAME_RATE, expected_tokens=EXPECTED_OUTPUT_TOKENS):
+        super().__init__(stream, 1.0 / frame_rate, expected_tokens)
+        self._pending = []
+        self._rows = None
+
+    def start(self, title, progress):
+        super().start(title, progress)
+        self.stream.write("\nStreaming novella content (saving chunks to file as they arrive):\n" + "-" * 50 + "\n")
+        self._set_region()
+        self.stream.flush()
+
+    def _set_region(self):
+        columns, rows = shutil.get_terminal_size()
+        if rows < 3:
+            self._rows = None
+            return
+        if rows != self._rows:
+            # Free the bottom row, then scroll only the rows above it
+            self.stream.write(f"\n\0337\033[1;{rows - 1}r\0338\033[1A")
+            self._rows = rows
+
+    def text(self, delta):
+        self._pending.append(delta)
+        self.tick()
+
+    def update(self, now):
+        self._set_region()
+        frame = "".join(self._pending)
+        self._pending = []
+        if self._rows:
+            columns = shutil.get_terminal_size().columns
+            frame += f"\0337\033[{self._rows};1H\033[2K{self.status_line(now)[:columns - 1]}\0338"
+        frame += f"\033]0;{self.progress.phase.capitalize()}: {self.title} - {self.progress.words} words\007"
+        self.stream.write(frame)
+        self.stream.flush()
+
+    def _flush_text(self):
+        if self._pending:
+            self.stream.write("".join(self._pending))
+            self._pending = []
+
+    def message(self, text):
+        self._flush_text()
+        super().message(text)
+
+    def event(self, name, text, **data):
+        self._flush_text()
+        self._write_line(f"\n[{text}]")
+
+    def finish(self, summary):
+        self.close()
+        self.stream.write(f"\033]0;Completed: {self.title} - {summary['words']} words\007\n\n")
+        super().finish(summary)
+
+    def close(self):
+        self._flush_text()
+        if self._rows:
+            # Clear the status line and give the whole screen back
+            self.stream.write(f"\0337\033[{self._rows};1H\033[2K\033[r\0338")
+            self._rows = None
+        self.stream.flush()
+
+class QuietRenderer(Renderer):
+    """Summary lines only, for logs and cron jobs"""
+
+    def start(self, title, progress):
+        super().start(title, progress)
+        self._write_line(f"Generating '{title}'")
+
+    def update(self, now):
+        # Titled, so concurrent generations sharing a log stay apart
+        self._write_line(f"[{self.title}] {self.status_line(now)}")
+
+class JsonLinesRenderer(Renderer):
+    """One JSON object per line on the output stream"""
+
+    def _record(self, event, **fields):
+        fields = {"event": event, "time": round(time.time(), 3), **fields}
+        self.stream.write(json.dumps(fields, default=str) + "\n")
+        self.stream.flush()
+
+    def start(self, title, progress):
+        super().start(title, progress)
+        self._record("start", title=title)
+
+    def update(self, now):
+        self._record("progress", **self.status(now))
+
+    def message(self, text):
+        self._record("message", text=text)
+
+    def event(self, name, text, **data):
+        self._record(name, text=text, **data)
+
+    def finish(self, summary):
+        self._record("done", title=self.title, **summary)
@@ -1,70 +1,208 @@
-import tiktoken
+import os
 import re
+import base64
+import shutil
+import time
+import hashlib
+import tempfile
+import threading
+
+# Encoding used for token counts, where it is downloaded from and its checksum
+ENCODING_NAME = "cl100k_base"
+BPE_URL = "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+BPE_SHA256 = "223921b76ee99bde995b7ff738513eef100fb51d18c93597a113bcffe865b2a7"
+
+# Split pattern and special tokens of cl100k_base (as in tiktoken_ext.openai_public),
+# so the encoder can be built from the local BPE file without tiktoken's own cache
+PATTERN = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+SPECIAL_TOKENS = {
+    "<|endoftext|>": 100257,
+    "<|fim_prefix|>": 100258,
+    "<|fim_middle|>": 100259,
+    "<|fim_suffix|>": 100260,
+    "<|endofprompt|>": 100276
+}
+
+# Local tokenizer cache, so the BPE file is downloaded once per install rather than
+# once per temp-dir cleanup; ship this directory (or point NOVELLA_TOKENIZER_CACHE at
+# a copy of it) to run on hosts without network access
+DEFAULT_TOKENIZER_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".novella_cache", "tokenizer")
+
+# After a failed load (e.g. offline without a cached BPE file), warm_up() stops retrying for this long
+RETRY_AFTER_SECONDS = 300
+
+_encoder = None
+_encoder_lock = threading.Lock()
+_unavailable_until = 0.0
+
+def tokenizer_cache_dir():
+    """Directory the BPE file is cached in (TIKTOKEN_CACHE_DIR wins if set)"""
+    return os.environ.get("TIKTOKEN_CACHE_DIR") or os.environ.get("NOVELLA_TOKENIZER_CACHE", DEFAULT_TOKENIZER_CACHE)
+
+def _cache_path(cache_dir):
+    # Named like tiktoken's own cache (SHA-1 of the URL), so either cache directory can be reused
+    return os.path.join(cache_dir, hashlib.sha1(BPE_URL.encode()).hexdigest())
+
+def _bundled_path(cache_dir):
+    # A plain cl100k_base.tiktoken dropped into the cache directory is picked up too
+    return os.path.join(cache_dir, f"{ENCODING_NAME}.tiktoken")
+
+def is_cached(cache_dir=None):
+    """
+    Whether the encoder can be built without a download
+
+    Args:
+        cache_dir (str, optional): Cache directory (default: tokenizer_cache_dir())
+
+    Returns:
+        bool: True if the encoder is loaded or the BPE file is in the cache
+    """
+    if _encoder is not None:
+        return True
+    cache_dir = cache_dir or tokenizer_cache_dir()
+    return os.path.exists(_cache_path(cache_dir)) or os.path.exists(_bundled_path(cache_dir))
+
+def install_bpe_file(path, cache_dir=None):
+    """
+    Put a downloaded cl100k_base.tiktoken file into the tokenizer cache
+
+    Args:
+        path (str): The .tiktoken file
+        cache_dir (str, optional): Cache directory (default: tokenizer_cache_dir())
+
+    Returns:
+        str: Path of the cached copy
+    """
+    cache_dir = cache_dir or tokenizer_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    target = _cache_path(cache_dir)
+    shutil.copyfile(path, target)
+    return target
+
+def _read_bpe(cache_dir):
+    """Contents of the BPE file, downloading it into cache_dir if it is not there yet"""
+    path = _cache_path(cache_dir)
+    bundled = _bundled_path(cache_dir)
+    if not os.path.exists(path) and os.path.exists(bundled):
+        install_bpe_file(bundled, cache_dir)
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            contents = file.read()
+        if hashlib.sha256(contents).hexdigest() == BPE_SHA256:
+            return contents
+
+    from tiktoken.load import read_file
+    contents = read_file(BPE_URL)
+    if hashlib.sha256(contents).hexdigest() != BPE_SHA256:
+        raise ValueError(f"Checksum mismatch for {BPE_URL}")
+    # Write to a temp file first so concurrent loads never read a partial file
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, 'wb') as file:
+        file.write(contents)
+    os.replace(tmp_path, path)
+    return contents
+
+def _get_encoder():
+    """Build the encoder on first use from the BPE file in tokenizer_cache_dir()"""
+    global _encoder
+    if _encoder is not None:
+        return _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            ranks = {}
+            for line in _read_bpe(tokenizer_cache_dir()).splitlines():
+                if line:
+                    token, rank = line.split()
+                    ranks[base64.b64decode(token)] = int(rank)
+
+            import tiktoken
+            _encoder = tiktoken.Encoding(name=ENCODING_NAME, pat_str=PATTERN,
+                                         mergeable_ranks=ranks, special_tokens=SPECIAL_TOKENS)
+    return _encoder
+
+def get_encoder():
+    """The tiktoken encoder, for callers that need batch encoding (raises if it cannot be loaded)"""
+    return _get_encoder()
+
+def warm_up():
+    """
+    Load the encoder now (e.g. from a background thread at startup) instead of on the first count
+
+    Returns:
+        bool: True if the tokenizer is available
+    """
+    global _unavailable_until
+    if _encoder is None and time.time() < _unavailable_until:
+        return False
+    try:
+        _get_encoder()
+        return True
+    except Exception as e:
+        _unavailable_until = time.time() + RETRY_AFTER_SECONDS
+        print(f"Tokenizer unavailable ({e.__class__.__name__}); token counts will be skipped")
+        return False
 
 def get_token_counter():
     """
     Creates a token counter function that uses tiktoken to count tokens
     in the Claude tokenizer format (cl100k_base)
-    
+
+    The encoder is built on the first count, not here, so importing this
+    module stays cheap and works offline.
+
     Returns:
         A function that counts tokens in text
     """
-    # Initialize the encoder with Claude's tokenizer model
-    try:
-        enc = tiktoken.get_encoding("cl100k_base")
-    except KeyError:
-        # Fall back to GPT-4 tokenizer if Claude's isn't available
-        enc = tiktoken.get_encoding("p50k_base")
-    
     def count_tokens(text):
         """
         Count the number of tokens in the given text
-        
+
         Args:
             text (str): The text to count tokens in
-            
+
         Returns:
             int: The token count
         """
         if not text:
             return 0
-        
+
         # Clean the text a bit (remove headers/footers that may be present)
         clean_text = re.sub(r'--- NOVELLA: .*? ---\n\n', '', text)
         clean_text = re.sub(r'\n\n--- END OF NOVELLA ---\n', '', clean_text)
         clean_text = re.sub(r'--- WORD COUNT: \d+ ---\n', '', clean_text)
-        
+
         # Count tokens
-        return len(enc.encode(clean_text))
-    
+        return len(_get_encoder().encode(clean_text))
+
     def estimate_words_from_tokens(tokens):
         """
         Estimate the number of words based on token count
         Using average ratio for English text (tokens:words)
-        
+
         Args:
             tokens (int): Token count
-            
+
         Returns:
             int: Estimated word count
         """
         # Common ratio of tokens to words is about 4:3 (or 1.33:1)
         # But Claude tokenizer is more efficient, closer to 1.2:1
         return int(tokens / 1.2)
-    
+
     def estimate_completion_percentage(tokens, target_tokens=120000):
         """
         Estimate completion percentage based on token count
-        
+
         Args:
             tokens (int): Current token count
             target_tokens (int): Target token count for completion
-            
+
         Returns:
             float: Completion percentage (0-1)
         """
         return min(1.0, tokens / target_tokens)
-    
+
     # Return functions as a tuple
     return count_tokens, estimate_words_from_tokens, estimate_completion_percentage
 
@@ -73,12 +211,29 @@ token_counter, estimate_words, estimate_completion = get_token_counter()
 
 # For testing
 if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Count tokens, or prepare the tokenizer cache for offline hosts")
+    parser.add_argument("--download", action="store_true", help="Download the BPE file into the tokenizer cache")
+    parser.add_argument("--install", type=str, default=None, help="Copy a cl100k_base.tiktoken file into the cache")
+    args = parser.parse_args()
+
+    if args.install:
+        print(f"Installed {args.install} as {install_bpe_file(args.install)}")
+        sys.exit(0)
+    if args.download:
+        if not warm_up():
+            sys.exit(1)
+        print(f"Tokenizer cached in {tokenizer_cache_dir()}")
+        sys.exit(0)
+
     sample_text = "This is a sample text to test the token counter functionality."
     tokens = token_counter(sample_text)
     words = estimate_words(tokens)
     completion = estimate_completion(tokens)
-    
+
     print(f"Text: '{sample_text}'")
     print(f"Token count: {tokens}")
     print(f"Estimated words: {words}")
-    print(f"Completion percentage: {completion:.2%}")
\ No newline at end of file
+    print(f"Completion percentage: {completion:.2%}")
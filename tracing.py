@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Lightweight timing spans for generation, export and TTS.
+
+Tracing is off unless NOVELLA_TRACE names a JSONL file (or enable() is called).
+When it is off, span() returns a shared no-op object, so instrumented code
+pays one global lookup per span. When it is on, every finished span is
+appended to the file as one JSON line:
+
+    {"trace_id", "span_id", "parent_id", "name", "start", "duration", "status", "error", "attributes"}
+
+Spans nest through a context variable within a thread; pass
+current_context() to run_in_context() to continue a trace in a worker
+thread or process. The same file can be summarized, converted to the
+Prometheus text format, or served on a /metrics endpoint:
+
+    python tracing.py summary trace.jsonl
+    python tracing.py prometheus trace.jsonl -o novella.prom
+    python tracing.py serve trace.jsonl --port 9464
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import functools
+import threading
+import contextvars
+
+# Upper bounds (seconds) of the Prometheus duration histogram buckets
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+_current = contextvars.ContextVar("novella_span", default=None)
+_fd = None
+_path = None
+_lock = threading.Lock()
+
+class _NoopSpan:
+    """Returned by span() when tracing is off"""
+
+    trace_id = None
+    span_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def set_error(self, error):
+        pass
+
+_NOOP = _NoopSpan()
+
+class Span:
+    """One timed operation; use as a context manager"""
+
+    def __init__(self, name, parent=None, attributes=None):
+        """
+        Args:
+            name (str): Span name, e.g. "generate.request" or "tts.segment"
+            parent (tuple, optional): (trace_id, span_id) to attach to; the current span by default
+            attributes (dict, optional): Initial attributes
+        """
+        if parent is None:
+            current = _current.get()
+            parent = (current.trace_id, current.span_id) if current else None
+        self.name = name
+        self.trace_id = parent[0] if parent else uuid.uuid4().hex
+        self.parent_id = parent[1] if parent else None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.start = None
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        """Add or change attributes"""
+        self.attributes.update(attributes)
+
+    def set_error(self, error):
+        """Mark the span failed for an error the code handled itself"""
+        self.error = str(error)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        error = self.error
+        if exc_type and not issubclass(exc_type, GeneratorExit) and not (issubclass(exc_type, SystemExit) and not exc.code):
+            error = f"{exc_type.__name__}: {exc}"
+        _emit(self.trace_id, self.span_id, self.parent_id, self.name, self.start,
+              time.time() - self.start, error, self.attributes)
+        return False
+
+def _open(path):
+    global _fd, _path
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # O_APPEND: each span is a single write, so threads and worker processes
+    # sharing the file never interleave lines
+    _fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    _path = path
+
+def enable(path):
+    """
+    Start writing spans to a JSONL file (also sets NOVELLA_TRACE for child processes)
+
+    Args:
+        path (str): JSONL file to append to
+    """
+    disable()
+    with _lock:
+        _open(path)
+    os.environ["NOVELLA_TRACE"] = path
+
+def disable():
+    """Stop tracing"""
+    global _fd, _path
+    with _lock:
+        if _fd is not None:
+            os.close(_fd)
+        _fd = None
+        _path = None
+    os.environ.pop("NOVELLA_TRACE", None)
+
+def enabled():
+    """Whether spans are being recorded"""
+    return _fd is not None
+
+def trace_path():
+    """The JSONL file spans go to (None when tracing is off)"""
+    return _path
+
+def _emit(trace_id, span_id, parent_id, name, start, duration, error, attributes):
+    line = json.dumps({
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "start": round(start, 6),
+        "duration": round(duration, 6),
+        "status": "error" if error else "ok",
+        "error": error,
+        "attributes": attributes
+    }, default=str) + "\n"
+    fd = _fd
+    if fd is not None:
+        try:
+            os.write(fd, line.encode('utf-8'))
+        except OSError as e:
+            print(f"Could not write trace span: {e}")
+
+def span(name, parent=None, **attributes):
+    """
+    Time a block of code as a span
+
+    Args:
+        name (str): Span name
+        parent (tuple, optional): (trace_id, span_id) from current_context(), for work
+            started on another thread or process
+        **attributes: Span attributes
+
+    Returns:
+        Span: Context manager (a no-op when tracing is off)
+    """
+    if _fd is None:
+        return _NOOP
+    return Span(name, parent, attributes)
+
+def traced(name, **attributes):
+    """
+    Decorator running every call of a function in a span
+
+    Args:
+        name (str): Span name
+        **attributes: Span attributes
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _fd is None:
+                return func(*args, **kwargs)
+            with Span(name, None, attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def annotate(**attributes):
+    """Add attributes to the current span (no-op when tracing is off)"""
+    if _fd is None:
+        return
+    current = _current.get()
+    if isinstance(current, Span):
+        current.set(**attributes)
+
+def record_span(name, start, end, parent=None, error=None, **attributes):
+    """
+    Record a span whose start and end were measured elsewhere (e.g. time to first token)
+
+    Args:
+        name (str): Span name
+        start (float): Start time (time.time())
+        end (float): End time (time.time())
+        parent (tuple, optional): (trace_id, span_id); the current span by default
+        error (str, optional): Error description
+        **attributes: Span attributes
+    """
+    if _fd is None or start is None or end is None:
+        return
+    if parent is None:
+        current = _current.get()
+        parent = (current.trace_id, current.span_id) if current else (uuid.uuid4().hex, None)
+    _emit(parent[0], uuid.uuid4().hex[:16], parent[1], name, start, max(0.0, end - start), error, attributes)
+
+def current_context():
+    """(trace_id, span_id) of the current span, or None; picklable for worker processes"""
+    current = _current.get()
+    if current is None or current is _NOOP:
+        return None
+    return (current.trace_id, current.span_id)
+
+def run_in_context(context, func, *args, **kwargs):
+    """
+    Call func with context as the current span, so its spans join that trace
+
+    Submit this to a thread or process pool instead of func itself.
+    """
+    if context is None or _fd is None:
+        return func(*args, **kwargs)
+    parent = _ContextSpan(*context)
+    token = _current.set(parent)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current.reset(token)
+
+class _ContextSpan:
+    """Stand-in current span for a context handed over from another thread or process"""
+
+    def __init__(self, trace_id, span_id):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+def load_spans(path):
+    """Read every span from a JSONL trace file (skipping partial lines)"""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue
+    return spans
+
+class Aggregator:
+    """Per-span-name duration histograms, fed span by span"""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def add(self, record):
+        histogram = self.histograms.setdefault(record["name"], {
+            "buckets": [0] * len(HISTOGRAM_BUCKETS), "count": 0, "sum": 0.0, "errors": 0
+        })
+        duration = record["duration"]
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if duration <= bound:
+                histogram["buckets"][i] += 1
+        histogram["count"] += 1
+        histogram["sum"] += duration
+        if record.get("status") == "error":
+            histogram["errors"] += 1
+
+    def prometheus_text(self):
+        """The histograms in the Prometheus text exposition format"""
+        lines = [
+            "# HELP novella_span_duration_seconds Duration of traced NovellaGPT operations",
+            "# TYPE novella_span_duration_seconds histogram"
+        ]
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for bound, count in zip(HISTOGRAM_BUCKETS, histogram["buckets"]):
+                lines.append(f'novella_span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+            lines.append(f'novella_span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'novella_span_duration_seconds_sum{{span="{label}"}} {histogram["sum"]:.6f}')
+            lines.append(f'novella_span_duration_seconds_count{{span="{label}"}} {histogram["count"]}')
+        lines.append("# HELP novella_span_errors_total Traced NovellaGPT operations that raised")
+        lines.append("# TYPE novella_span_errors_total counter")
+        for name in sorted(self.histograms):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'novella_span_errors_total{{span="{label}"}} {self.histograms[name]["errors"]}')
+        return "\n".join(lines) + "\n"
+
+class _FileTail:
+    """Aggregates a growing trace file, reading only the lines added since the last call"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.aggregator = Aggregator()
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as file:
+                    file.seek(self.offset)
+                    data = file.read()
+            except FileNotFoundError:
+                return self.aggregator
+            # Leave an unfinished last line for the next refresh
+            end = data.rfind(b"\n") + 1
+            self.offset += end
+            for line in data[:end].splitlines():
+                try:
+                    self.aggregator.add(json.loads(line))
+                except ValueError:
+                    continue
+            return self.aggregator
+
+def metrics_server(trace_file, host="127.0.0.1", port=9464):
+    """
+    HTTP server answering GET /metrics from a trace file (call serve_forever() on it)
+
+    Only the lines appended since the previous scrape are read.
+    """
+    # Imported here so instrumented modules don't pay for http.server at startup
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = self.server.tail.refresh().prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.tail = _FileTail(trace_file)
+    return server
+
+def summarize(spans):
+    """
+    Count, total, p50, p95 and max duration per span name
+
+    Returns:
+        list: One dict per span name, slowest total first
+    """
+    durations = {}
+    errors = {}
+    for record in spans:
+        durations.setdefault(record["name"], []).append(record["duration"])
+        if record.get("status") == "error":
+            errors[record["name"]] = errors.get(record["name"], 0) + 1
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "total": sum(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+            "errors": errors.get(name, 0)
+        })
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+if os.environ.get("NOVELLA_TRACE"):
+    try:
+        _open(os.environ["NOVELLA_TRACE"])
+    except OSError as e:
+        print(f"Could not open trace file {os.environ['NOVELLA_TRACE']}: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and export NovellaGPT trace spans")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = subparsers.add_parser("summary", help="Time spent per span name")
+    summary_parser.add_argument("trace_file", type=str)
+
+    prometheus_parser = subparsers.add_parser("prometheus", help="Write the spans as Prometheus metrics")
+    prometheus_parser.add_argument("trace_file", type=str)
+    prometheus_parser.add_argument("-o", "--output", type=str, default=None, help="Output file (default: stdout)")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve /metrics for Prometheus to scrape")
+    serve_parser.add_argument("trace_file", type=str)
+    serve_parser.add_argument("--host", type=str, default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=9464)
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = metrics_server(args.trace_file, args.host, args.port)
+        print(f"Serving metrics from {args.trace_file} on http://{args.host}:{args.port}/metrics")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        sys.exit(0)
+
+    try:
+        spans = load_spans(args.trace_file)
+    except OSError as e:
+        print(f"Could not read {args.trace_file}: {e}")
+        sys.exit(1)
+
+    if args.command == "summary":
+        print(f"{'span':32s} {'count':>7s} {'total s':>10s} {'p50 s':>9s} {'p95 s':>9s} {'max s':>9s} {'errors':>6s}")
+        for row in summarize(spans):
+            print(f"{row['name']:32s} {row['count']:7d} {row['total']:10.3f} {row['p50']:9.3f} "
+                  f"{row['p95']:9.3f} {row['max']:9.3f} {row['errors']:6d}")
+    elif args.command == "prometheus":
+        aggregator = Aggregator()
+        for record in spans:
+            aggregator.add(record)
+        text = aggregator.prometheus_text()
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                file.write(text)
+            print(f"Metrics written to {args.output}")
+        else:
+            sys.stdout.write(text)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Queue worker: leases jobs from the SQLite job queue and runs novella generation,
+PDF, EPUB and audiobook jobs with a configurable concurrency per job type.
+Run several worker processes on one host to spread the load; they share the queue safely,
+and each job writes into its own workspace (see workspace.py).
+"""
+
+import os
+import sys
+import time
+import socket
+import signal
+import argparse
+import threading
+import concurrent.futures
+from dotenv import load_dotenv
+
+from job_queue import JobQueue, DEFAULT_LEASE_SECONDS
+from workspace import Workspace
+import tracing
+from metrics_store import record_run
+
+# Load API keys for the job handlers from .env
+load_dotenv()
+
+DEFAULT_CONCURRENCY = {"generate": 1, "pdf": 2, "epub": 2, "audio": 1}
+
+class LeaseLost(Exception):
+    """Raised from a job's progress report once another worker has taken the job over"""
+
+def handle_generate(queue, payload, workspace, report):
+    """Generate a novella, publish the text, then enqueue its export jobs"""
+    from storygen2 import generate_novella, update_search_index
+    from chapter_index import index_path
+    from job_manager import txt_filename_for, TARGET_TOKENS
+    from stream_renderer import create_renderer
+
+    title = payload["title"]
+
+    def on_progress(word_count, elapsed, stats):
+        if stats["phase"] == "thinking":
+            message = f"Thinking ({stats['thinking_tokens']:,} tokens)"
+        else:
+            message = f"{word_count:,} words"
+        report(min(0.99, stats["output_tokens"] / TARGET_TOKENS), message)
+
+    run_metrics = {}
+    start_time = time.time()
+    generate_novella(payload["prompt"], title, payload.get("system_prompt"), progress_callback=on_progress,
+                     output_dir=workspace.work_dir, metrics=run_metrics, renderer=create_renderer("quiet"),
+                     index_search=False)
+    record_run("generate", title, started_at=start_time, total_seconds=time.time() - start_time, **run_metrics)
+    # Stops here if the lease was lost, before publishing or enqueueing exports twice
+    report(0.99, "Publishing")
+    work_txt = txt_filename_for(title, workspace.work_dir)
+    if os.path.exists(index_path(work_txt)):
+        workspace.publish("index", index_path(work_txt))
+    txt_filename = workspace.publish("txt", work_txt)
+    update_search_index(txt_filename)
+
+    follow_up = {}
+    for kind in payload.get("exports", ["pdf", "epub"]):
+        export_payload = {"txt_filename": txt_filename, "title": title}
+        if kind == "epub" and payload.get("author"):
+            export_payload["author"] = payload["author"]
+        if kind == "audio" and payload.get("voice"):
+            export_payload["voice"] = payload["voice"]
+        follow_up[kind] = queue.enqueue(kind, export_payload)
+    return {"txt": txt_filename, "follow_up_jobs": follow_up}
+
+def handle_pdf(queue, payload, workspace, report):
+    """Build the PDF with create_ebook_pdf (through the artifact cache)"""
+    from export_pipeline import export_pdf
+    pdf_filename = export_pdf(workspace.import_file(payload["txt_filename"]), payload["title"])
+    return {"pdf": workspace.publish("pdf", pdf_filename)}
+
+def handle_epub(queue, payload, workspace, report):
+    """Build the EPUB with convert_to_epub (through the artifact cache)"""
+    from export_pipeline import export_epub, DEFAULT_AUTHOR
+    epub_filename = export_epub(workspace.import_file(payload["txt_filename"]), payload["title"],
+                                payload.get("author", DEFAULT_AUTHOR))
+    return {"epub": workspace.publish("epub", epub_filename)}
+
+def handle_audio(queue, payload, workspace, report):
+    """Narrate the audiobook with AudiobookGenerator (through the artifact cache)"""
+    from export_pipeline import export_audio
+    combined = export_audio(payload["txt_filename"], payload["title"], voice=payload.get("voice"),
+                            output_dir=workspace.file("audio"))
+    if not combined:
+        raise RuntimeError("No audio was generated")
+    return {"audiobook": workspace.publish("audiobook", combined)}
+
+HANDLERS = {
+    "generate": handle_generate,
+    "pdf": handle_pdf,
+    "epub": handle_epub,
+    "audio": handle_audio
+}
+
+class Worker:
+    """Lease loop with a fixed number of slots per job type"""
+
+    def __init__(self, queue, concurrency, poll_interval=1.0, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Initialize the worker
+
+        Args:
+            queue (JobQueue): Queue to lease from
+            concurrency (dict): Job type -> number of jobs of that type to run at once
+            poll_interval (float, optional): Seconds to sleep when no job is ready
+            lease_seconds (float, optional): Lease length, renewed by heartbeats
+        """
+        self.queue = queue
+        self.concurrency = {kind: n for kind, n in concurrency.items() if n > 0}
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._running = {kind: 0 for kind in self.concurrency}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=sum(self.concurrency.values()))
+
+    def stop(self, *args):
+        """Stop leasing new jobs; running jobs are allowed to finish"""
+        if not self._stopping.is_set():
+            print(f"[{self.worker_id}] Stopping after running jobs finish...")
+        self._stopping.set()
+
+    def _free_kinds(self):
+        with self._lock:
+            return [kind for kind, limit in self.concurrency.items() if self._running[kind] < limit]
+
+    def run(self):
+        """Lease and run jobs until stop() is called"""
+        print(f"[{self.worker_id}] Worker started with concurrency "
+              + ", ".join(f"{kind}={n}" for kind, n in self.concurrency.items()))
+        try:
+            while not self._stopping.is_set():
+                job = self.queue.lease(self.worker_id, self._free_kinds(), self.lease_seconds)
+                if job is None:
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                with self._lock:
+                    self._running[job["kind"]] += 1
+                self._executor.submit(self._execute, job)
+        except KeyboardInterrupt:
+            self.stop()
+        self._executor.shutdown(wait=True)
+        print(f"[{self.worker_id}] Worker stopped")
+
+    def _execute(self, job):
+        """Run one leased job with a heartbeat thread renewing its lease"""
+        state = {"progress": None, "message": None}
+        done = threading.Event()
+        lost = threading.Event()
+
+        def report(progress=None, message=None):
+            # Handlers report progress often; stop the job there once it belongs to another worker
+            if lost.is_set():
+                raise LeaseLost(f"Lease on job {job['id']} was lost")
+            state["progress"] = progress
+            state["message"] = message
+
+        def heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                if not self.queue.heartbeat(job["id"], self.worker_id, self.lease_seconds,
+                                            state["progress"], state["message"]):
+                    print(f"[{self.worker_id}] Lost the lease on job {job['id']}, abandoning it")
+                    lost.set()
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        start_time = time.time()
+        print(f"[{self.worker_id}] Running {job['kind']} job {job['id']} (attempt {job['attempts']})")
+        try:
+            workspace = Workspace(job["id"])
+            with tracing.span("job.run", kind=job["kind"], job_id=job["id"], attempt=job["attempts"]):
+                # Time from becoming runnable (enqueue or retry backoff) to being leased
+                tracing.record_span("job.queued", job["run_after"], start_time)
+                result = HANDLERS[job["kind"]](self.queue, job["payload"], workspace, report)
+            workspace.clean_work()
+            done.set()
+            if self.queue.complete(job["id"], self.worker_id, result):
+                print(f"[{self.worker_id}] Completed {job['kind']} job {job['id']} in {time.time() - start_time:.1f}s")
+            else:
+                print(f"[{self.worker_id}] Finished {job['kind']} job {job['id']} after losing its lease; "
+                      "result discarded")
+        except LeaseLost as e:
+            done.set()
+            print(f"[{self.worker_id}] Abandoned {job['kind']} job {job['id']}: {e}")
+        except Exception as e:
+            done.set()
+            status = self.queue.fail(job["id"], self.worker_id, str(e) or e.__class__.__name__,
+                                     retry=_retryable(e))
+            print(f"[{self.worker_id}] {job['kind']} job {job['id']} failed ({status}): {e}")
+        finally:
+            with self._lock:
+                self._running[job["kind"]] -= 1
+
+def _retryable(error):
+    """Whether a failed job is worth another attempt: not for bad input or rejected API requests"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in (408, 409, 429) or status_code >= 500
+    return not isinstance(error, (ValueError, TypeError, KeyError, FileNotFoundError))
+
+def parse_concurrency(spec):
+    """
+    Parse a concurrency spec like "generate=1,pdf=2"
+
+    Returns:
+        dict: Job type -> slots, starting from DEFAULT_CONCURRENCY
+    """
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        kind, _, count = item.partition("=")
+        if kind not in HANDLERS or not count.isdigit():
+            raise ValueError(f"Invalid concurrency setting '{item}' (job types: {', '.join(HANDLERS)})")
+        concurrency[kind] = int(count)
+    return concurrency
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run NovellaGPT queue jobs (generate, pdf, epub, audio)")
+    parser.add_argument("--db", type=str, default=None, help="Queue database (default: NOVELLA_QUEUE_DB or novella_jobs.db)")
+    parser.add_argument("--concurrency", type=str, default=os.environ.get("NOVELLA_WORKER_CONCURRENCY"),
+                        help="Jobs per type, e.g. generate=1,pdf=2,epub=2,audio=1")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls when idle")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Lease length in seconds")
+
+    args = parser.parse_args()
+
+    try:
+        concurrency = parse_concurrency(args.concurrency)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    worker = Worker(JobQueue(args.db), concurrency, args.poll, args.lease)
+    signal.signal(signal.SIGTERM, worker.stop)
+    worker.run()
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+# Root directory holding one workspace per job
+DEFAULT_WORKSPACE_ROOT = "workspaces"
+
+MANIFEST_NAME = "manifest.json"
+
+def workspace_root():
+    """Configured workspace root (NOVELLA_WORKSPACE_ROOT, default workspaces/)"""
+    return os.environ.get("NOVELLA_WORKSPACE_ROOT", DEFAULT_WORKSPACE_ROOT)
+
+def safe_name(title):
+    """File name stem for a title (the rule generate_novella and the exporters use)"""
+    return "".join(c if c.isalnum() else "_" for c in (title or "generated_novella"))
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class Workspace:
+    """
+    Private directory for one job.
+
+    A job writes everything it produces under work/, where nothing else looks.
+    Finished artifacts are moved into artifacts/ with an atomic rename and
+    recorded in manifest.json, so a reader sees either a complete artifact or
+    none at all, and jobs with the same title never touch each other's files.
+    """
+
+    def __init__(self, job_id, root=None):
+        """
+        Create (or reopen) a job's workspace
+
+        Args:
+            job_id (str): Job id, used as the directory name
+            root (str, optional): Workspace root (default: NOVELLA_WORKSPACE_ROOT or workspaces/)
+        """
+        self.job_id = job_id
+        self.path = os.path.join(root or workspace_root(), job_id)
+        self.work_dir = os.path.join(self.path, "work")
+        self.artifacts_dir = os.path.join(self.path, "artifacts")
+        os.makedirs(self.work_dir, exist_ok=True)
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+
+    def file(self, name):
+        """Path of a scratch file in the work directory"""
+        return os.path.join(self.work_dir, name)
+
+    def import_file(self, path):
+        """
+        Copy an input file into the work directory
+
+        Exporters name their output after their input, so working on a copy
+        keeps the outputs inside the workspace.
+
+        Returns:
+            str: Path of the copy
+        """
+        target = self.file(os.path.basename(path))
+        shutil.copyfile(path, target)
+        return target
+
+    def publish(self, name, paths):
+        """
+        Move finished files into artifacts/ and record them in the manifest
+
+        Args:
+            name (str): Artifact name ("txt", "pdf", "epub", "audiobook", ...)
+            paths (str or list): File produced in the work directory, or a list of them
+
+        Returns:
+            str or list: Published path(s), mirroring the paths argument
+        """
+        if not paths:
+            return paths
+        single = isinstance(paths, str)
+        files = [paths] if single else list(paths)
+        target_dir = self.artifacts_dir if single else os.path.join(self.artifacts_dir, name)
+        os.makedirs(target_dir, exist_ok=True)
+
+        published = []
+        entries = []
+        for path in files:
+            target = os.path.join(target_dir, os.path.basename(path))
+            if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.path)]) != os.path.abspath(self.path):
+                # Outside the workspace (e.g. a shared file): copy first so the rename stays atomic
+                tmp_path = target + ".tmp"
+                shutil.copyfile(path, tmp_path)
+                path = tmp_path
+            os.replace(path, target)
+            published.append(target)
+            entries.append({
+                "path": os.path.relpath(target, self.path),
+                "size": os.path.getsize(target),
+                "sha256": _sha256(target)
+            })
+
+        manifest = self.manifest()
+        manifest["artifacts"][name] = {
+            "files": entries,
+            "list": not single,
+            "published_at": time.time()
+        }
+        self._write_manifest(manifest)
+        return published[0] if single else published
+
+    def manifest(self):
+        """
+        Read the workspace manifest
+
+        Returns:
+            dict: {"job_id", "created_at", "artifacts": {name: {"files": [...], "list", "published_at"}}}
+        """
+        try:
+            with open(os.path.join(self.path, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"job_id": self.job_id, "created_at": time.time(), "artifacts": {}}
+
+    def _write_manifest(self, manifest):
+        """Replace the manifest atomically so readers never see a partial one"""
+        path = os.path.join(self.path, MANIFEST_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_path, path)
+
+    def clean_work(self):
+        """Remove the scratch files once everything has been published"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+def published_artifacts(job_id, root=None):
+    """
+    Published artifact paths of a job, from its manifest
+
+    Returns:
+        dict: Artifact name -> path (or list of paths)
+    """
+    workspace_path = os.path.join(root or workspace_root(), job_id)
+    try:
+        with open(os.path.join(workspace_path, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    artifacts = {}
+    for name, entry in manifest["artifacts"].items():
+        paths = [os.path.join(workspace_path, f["path"]) for f in entry["files"]]
+        artifacts[name] = paths if entry["list"] else paths[0]
+    return artifacts
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List job workspaces and their published artifacts")
+    parser.add_argument("job_ids", nargs="*", help="Job ids (default: all workspaces)")
+    parser.add_argument("--root", type=str, default=None, help="Workspace root (default: NOVELLA_WORKSPACE_ROOT or workspaces/)")
+
+    args = parser.parse_args()
+
+    root = args.root or workspace_root()
+    job_ids = args.job_ids or (sorted(os.listdir(root)) if os.path.isdir(root) else [])
+    for job_id in job_ids:
+        artifacts = published_artifacts(job_id, root)
+        print(f"{job_id}: {len(artifacts)} artifacts")
+        for name, paths in artifacts.items():
+            for path in ([paths] if isinstance(paths, str) else paths):
+                print(f"  {name:15s} {path}")